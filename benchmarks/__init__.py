@@ -0,0 +1,22 @@
+"""
+QuickNote Benchmarks Package
+
+Description:
+    This package measures the performance of the QuickNote routes.
+    It seeds a database with a configurable number of users and notes,
+    then drives the real endpoints, either in process through the Flask
+    test client or over HTTP with a local multi-threaded load generator.
+    For every endpoint it reports the p50, p95 and p99 latency, the
+    throughput and the peak resident memory, and stores the results as
+    JSON so that runs from different commits can be compared.
+
+    Run 'python -m benchmarks run --help' and
+    'python -m benchmarks compare --help' for the available options.
+
+    Modules:
+    - seed: Fills the database with benchmark users and notes.
+    - scenarios: One function per benchmarked endpoint.
+    - drivers: Sends requests through the test client or over HTTP.
+    - report: Summarises, saves and compares benchmark results.
+    - storage: Measures the space saved by compressing note contents.
+"""
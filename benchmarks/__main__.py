@@ -0,0 +1,224 @@
+"""
+QuickNote Benchmark Command Line
+
+Description:
+    This module is the entry point of 'python -m benchmarks'.
+
+    'python -m benchmarks run' seeds the database and benchmarks every
+    endpoint, through the Flask test client ('--mode client'), over HTTP
+    ('--mode http') or both, then prints a summary and saves the results
+    as JSON. The database is the one configured in the environment, as
+    for the application itself; without one, a temporary SQLite database
+    is used. HTTP requests go to an in-process server unless '--url'
+    points at a running deployment using the same database, such as
+    Gunicorn started with 'gunicorn --config gunicorn.conf.py run:app'.
+
+    'python -m benchmarks compare BASELINE CANDIDATE' compares two result
+    files and exits with status 1 if any endpoint's p95 latency grew, or
+    its throughput shrank, by more than '--threshold' percent.
+
+    'python -m benchmarks storage' seeds notes with long contents and
+    reports the note table's size, the pages read and the cache hits
+    before and after compressing them (see 'benchmarks.storage').
+
+    Dependencies:
+    - argparse: Parses the command line.
+    - os, sys, tempfile: Locate the output files and temporary database.
+    - quicknote: Provides the application factory and database.
+    - benchmarks: Provides seeding, scenarios, drivers and reporting.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from benchmarks import report
+from benchmarks.drivers import (ClientSession, HttpSession, local_server,
+                                run_scenario)
+from benchmarks.scenarios import SCENARIOS, Worker
+from benchmarks.seed import seed
+from benchmarks.storage import print_storage, run_storage
+
+
+# Where results are saved when no '--output' is given
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def _create_app():
+    """
+    Create the application to benchmark, with a database to use.
+    """
+    from quicknote import config, create_app, db
+
+    settings = {}
+    if not config.from_env().get("SQLALCHEMY_DATABASE_URI"):
+        path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+        settings["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    if not os.environ.get("SECRET_KEY"):
+        settings["SECRET_KEY"] = "benchmark"
+
+    app = create_app(settings)
+    with app.app_context():
+        db.create_all()
+    return app, db
+
+
+def _benchmark(app, args, workers_count, new_session):
+    """
+    Seed fresh accounts and run every selected scenario.
+
+    Returns:
+        dict: The summary of each endpoint.
+    """
+    with app.app_context():
+        accounts = seed(max(args.users, workers_count), args.notes)
+        victims = seed(args.requests, args.victim_notes)
+
+    workers = [Worker(new_session, account, victims[offset::workers_count])
+               for offset, account in enumerate(accounts[:workers_count])]
+
+    summaries = {}
+    for endpoint in args.endpoints:
+        scenario, expected_status = SCENARIOS[endpoint]
+        measurement = run_scenario(workers, scenario, expected_status,
+                                   args.requests)
+        summaries[endpoint] = report.summarize(measurement)
+        _print_summary(endpoint, summaries[endpoint])
+    return summaries
+
+
+def _print_summary(endpoint, summary):
+    def show(value):
+        return "-" if value is None else f"{value:.1f}"
+
+    print(f"  {endpoint:<12} {summary['requests']:>6} ok "
+          f"{summary['errors']:>4} err {summary['skipped']:>4} skip  "
+          f"p50 {show(summary['p50_ms']):>7} ms  "
+          f"p95 {show(summary['p95_ms']):>7} ms  "
+          f"p99 {show(summary['p99_ms']):>7} ms  "
+          f"{show(summary['throughput_rps']):>7} req/s  "
+          f"rss {summary['peak_rss_kb'] or '-'} kB")
+
+
+def run(args):
+    app, db = _create_app()
+    with app.app_context():
+        database = db.engine.dialect.name
+
+    modes = {}
+    if args.mode in ("client", "both"):
+        print("Flask test client, 1 worker")
+        modes["client"] = _benchmark(app, args, 1,
+                                     lambda: ClientSession(app))
+
+    if args.mode in ("http", "both"):
+        print(f"HTTP, {args.concurrency} workers")
+        if args.url:
+            modes["http"] = _benchmark(app, args, args.concurrency,
+                                       lambda: HttpSession(args.url))
+        else:
+            with local_server(app) as url:
+                modes["http"] = _benchmark(app, args, args.concurrency,
+                                           lambda: HttpSession(url))
+
+    options = {name: value for name, value in vars(args).items()
+               if name not in ("command", "output")}
+    results = report.build_results(options, database, modes)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR,
+                              f"{results['commit'] or 'results'}.json")
+    report.save(results, output)
+    print(f"Results saved to {output}")
+    return 0
+
+
+def compare(args):
+    baseline = report.load(args.baseline)
+    candidate = report.load(args.candidate)
+    print(f"{baseline['commit']} -> {candidate['commit']}")
+
+    def show(value):
+        return "-" if value is None else f"{value:+.1f}%"
+
+    regressions = 0
+    for mode, endpoint, p95, throughput, regressed in report.compare(
+            baseline, candidate, args.threshold):
+        regressions += regressed
+        print(f"  {mode:<7} {endpoint:<12} p95 {show(p95):>8}  "
+              f"throughput {show(throughput):>8}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return 1 if regressions else 0
+
+
+def storage(args):
+    app, _ = _create_app()
+    print_storage(run_storage(app, args.users, args.notes, args.size,
+                              args.passes))
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark the QuickNote endpoints.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser(
+        "run", help="seed the database and benchmark the endpoints")
+    run_parser.add_argument("--mode", choices=("client", "http", "both"),
+                            default="both")
+    run_parser.add_argument("--users", type=int, default=10,
+                            help="seeded users per mode (default 10)")
+    run_parser.add_argument("--notes", type=int, default=200,
+                            help="notes per seeded user (default 200)")
+    run_parser.add_argument("--victim-notes", type=int, default=20,
+                            help="notes per user deleted by the "
+                                 "delete_user benchmark (default 20)")
+    run_parser.add_argument("--requests", type=int, default=200,
+                            help="requests per endpoint (default 200)")
+    run_parser.add_argument("--concurrency", type=int, default=4,
+                            help="concurrent HTTP workers (default 4)")
+    run_parser.add_argument("--url",
+                            help="benchmark a running server instead of "
+                                 "an in-process one")
+    run_parser.add_argument("--endpoints", nargs="+", choices=SCENARIOS,
+                            default=list(SCENARIOS),
+                            help="endpoints to benchmark (default all)")
+    run_parser.add_argument("--output",
+                            help="result file (default "
+                                 "benchmarks/results/<commit>.json)")
+
+    compare_parser = commands.add_parser(
+        "compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=10,
+                                help="allowed change in percent "
+                                     "(default 10)")
+
+    storage_parser = commands.add_parser(
+        "storage", help="measure the space saved by compressing notes")
+    storage_parser.add_argument("--users", type=int, default=10,
+                                help="seeded users (default 10)")
+    storage_parser.add_argument("--notes", type=int, default=500,
+                                help="notes per seeded user (default 500)")
+    storage_parser.add_argument("--size", type=int, default=3000,
+                                help="characters per note (default 3000)")
+    storage_parser.add_argument("--passes", type=int, default=3,
+                                help="times every note is read "
+                                     "(default 3)")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        if args.concurrency < 1:
+            parser.error("--concurrency must be at least 1")
+        return run(args)
+    if args.command == "storage":
+        return storage(args)
+    return compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
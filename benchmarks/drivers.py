@@ -0,0 +1,157 @@
+"""
+QuickNote Benchmark Drivers Module
+
+Description:
+    This module sends the benchmark requests.
+    'ClientSession' goes through the Flask test client, which measures the
+    application on its own, without any server or network in the way.
+    'HttpSession' goes over HTTP with its own cookie jar, either to an
+    in-process threaded Werkzeug server started with 'local_server', or
+    to any running QuickNote deployment, such as Gunicorn on localhost.
+    'run_scenario' spreads the requests of one scenario across the
+    workers, running each worker on its own thread, and collects the
+    latencies.
+    Redirects are never followed, so each timed request is exactly one
+    round trip.
+
+    Dependencies:
+    - threading: Runs the in-process HTTP server.
+    - time: Measures the wall clock time of each scenario.
+    - concurrent.futures: Runs the workers concurrently.
+    - contextlib.contextmanager: Builds the 'local_server' context manager.
+    - http.cookiejar, urllib: Send HTTP requests and keep their cookies.
+    - werkzeug.serving: Provides the in-process HTTP server.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import (HTTPCookieProcessor, HTTPRedirectHandler,
+                            Request, build_opener)
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+
+class ClientSession:
+    """
+    Sends requests through a Flask test client with its own cookies.
+    """
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data)
+        response.close()
+        return response.status_code
+
+
+class _NoRedirect(HTTPRedirectHandler):
+    """
+    Redirect handler that returns redirects instead of following them.
+    """
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class HttpSession:
+    """
+    Sends HTTP requests to a base URL with its own cookie jar.
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.opener = build_opener(HTTPCookieProcessor(CookieJar()),
+                                   _NoRedirect())
+
+    def request(self, method, path, data=None):
+        body = urlencode(data).encode() if data is not None else None
+        request = Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(request) as response:
+                response.read()
+                return response.status
+        except HTTPError as error:
+            # Redirects and error responses both arrive as HTTPError
+            error.read()
+            return error.code
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    """
+    Request handler that does not log every request.
+    """
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+@contextmanager
+def local_server(app):
+    """
+    Serve an application over HTTP on a free local port.
+
+    Args:
+        app (Flask): The application to serve.
+
+    Description:
+        A threaded Werkzeug server handles each request on its own thread,
+        so concurrent workers are served concurrently.
+
+    Yields:
+        str: The base URL of the server.
+    """
+    server = make_server("127.0.0.1", 0, app, threaded=True,
+                         request_handler=_QuietRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        thread.join()
+
+
+def run_scenario(workers, scenario, expected_status, requests):
+    """
+    Run the requests of one scenario across the workers.
+
+    Args:
+        workers (list): The workers to send the requests from.
+        scenario (callable): The scenario sending one timed request.
+        expected_status (int): The status code of a successful request.
+        requests (int): The total number of requests to send.
+
+    Returns:
+        dict: The latencies of the successful requests in seconds, the
+        number of errors and skipped requests, and the elapsed seconds.
+    """
+    def run_worker(offset):
+        latencies, errors, skipped = [], 0, 0
+        for number in range(offset, requests, len(workers)):
+            result = scenario(workers[offset], number)
+            if result is None:
+                skipped += 1
+                continue
+            status, seconds = result
+            if status == expected_status:
+                latencies.append(seconds)
+            else:
+                errors += 1
+        return latencies, errors, skipped
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(workers)) as executor:
+        results = list(executor.map(run_worker, range(len(workers))))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "latencies": [seconds for latencies, _, _ in results
+                      for seconds in latencies],
+        "errors": sum(errors for _, errors, _ in results),
+        "skipped": sum(skipped for _, _, skipped in results),
+        "seconds": elapsed,
+    }
@@ -0,0 +1,181 @@
+"""
+QuickNote Benchmark Report Module
+
+Description:
+    This module turns raw benchmark measurements into results that can be
+    stored and compared.
+    Each endpoint is summarised by its p50, p95 and p99 latency, its
+    throughput in requests per second and the peak resident memory of the
+    benchmark process so far. The memory figure is a high-water mark for
+    the whole process, so it only grows as the endpoints run; with an
+    in-process server it includes the application.
+    Results are saved as JSON together with the commit they were measured
+    on, and two result files can be compared to find regressions.
+
+    Dependencies:
+    - json: Reads and writes result files.
+    - platform, sys: Describe the machine the benchmark ran on.
+    - subprocess: Finds the current git commit.
+    - datetime: Timestamps the results.
+    - resource: Reads the peak resident memory (not on Windows).
+"""
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def percentile(values, percent):
+    """
+    Return a percentile of sorted values, interpolating between them.
+
+    Args:
+        values (list): The values, sorted in ascending order.
+        percent (float): The percentile, from 0 to 100.
+
+    Returns:
+        float: The percentile, or None if there are no values.
+    """
+    if not values:
+        return None
+    rank = (len(values) - 1) * percent / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+
+def peak_rss_kb():
+    """
+    Return the peak resident memory of this process in kilobytes.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def summarize(measurement):
+    """
+    Summarise the measurement of one endpoint.
+
+    Args:
+        measurement (dict): The result of 'drivers.run_scenario'.
+
+    Returns:
+        dict: The request counts, latency percentiles in milliseconds,
+        throughput and peak resident memory.
+    """
+    latencies = sorted(seconds * 1000
+                       for seconds in measurement["latencies"])
+    completed = len(latencies) + measurement["errors"]
+    seconds = measurement["seconds"]
+
+    def rounded(value):
+        return None if value is None else round(value, 3)
+
+    return {
+        "requests": len(latencies),
+        "errors": measurement["errors"],
+        "skipped": measurement["skipped"],
+        "seconds": round(seconds, 3),
+        "throughput_rps": round(completed / seconds, 2) if seconds else None,
+        "mean_ms": rounded(sum(latencies) / len(latencies)
+                           if latencies else None),
+        "p50_ms": rounded(percentile(latencies, 50)),
+        "p95_ms": rounded(percentile(latencies, 95)),
+        "p99_ms": rounded(percentile(latencies, 99)),
+        "max_ms": rounded(latencies[-1] if latencies else None),
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def current_commit():
+    """
+    Return the short hash of the checked out git commit, if there is one.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_results(options, database, modes):
+    """
+    Wrap the endpoint summaries of a run with a description of the run.
+
+    Args:
+        options (dict): The options the benchmark was run with.
+        database (str): The name of the database dialect used.
+        modes (dict): Endpoint summaries for each driver mode.
+
+    Returns:
+        dict: The complete results, ready to be saved.
+    """
+    return {
+        "commit": current_commit(),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": database,
+        "options": options,
+        "results": modes,
+    }
+
+
+def save(results, path):
+    with open(path, "w") as output:
+        json.dump(results, output, indent=2)
+        output.write("\n")
+
+
+def load(path):
+    with open(path) as source:
+        return json.load(source)
+
+
+def _change(old, new):
+    """
+    Return the percentage change from 'old' to 'new', or None.
+    """
+    if not old or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def compare(baseline, candidate, threshold):
+    """
+    Compare two benchmark results endpoint by endpoint.
+
+    Args:
+        baseline (dict): The results being compared against.
+        candidate (dict): The new results.
+        threshold (float): The percentage by which p95 latency may grow,
+        or throughput may shrink, before it counts as a regression.
+
+    Returns:
+        list: A row for every endpoint measured in both results, holding
+        the mode, endpoint, p95 and throughput changes in percent and
+        whether it regressed.
+    """
+    rows = []
+    for mode, endpoints in candidate["results"].items():
+        for endpoint, new in endpoints.items():
+            old = baseline["results"].get(mode, {}).get(endpoint)
+            if old is None:
+                continue
+            p95 = _change(old["p95_ms"], new["p95_ms"])
+            throughput = _change(old["throughput_rps"],
+                                 new["throughput_rps"])
+            regressed = ((p95 is not None and p95 > threshold) or
+                         (throughput is not None and
+                          throughput < -threshold))
+            rows.append((mode, endpoint, p95, throughput, regressed))
+    return rows
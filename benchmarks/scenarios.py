@@ -0,0 +1,117 @@
+"""
+QuickNote Benchmark Scenarios Module
+
+Description:
+    This module defines one benchmark scenario per QuickNote endpoint.
+    A scenario sends a single timed request on behalf of a worker and
+    returns the response status and the time it took. Any setup a request
+    needs, such as logging in before an account is deleted, is done before
+    the clock starts.
+    Scenarios only use the 'request' method of a session, so the same
+    scenarios run through the Flask test client and over HTTP.
+    Scenarios that delete notes or users use up the worker's seeded data;
+    once it is gone they return None and the request is counted as
+    skipped.
+
+    Dependencies:
+    - time: Measures how long each request takes.
+    - benchmarks.seed: Provides the seeded password and fresh emails.
+"""
+import time
+from benchmarks.seed import PASSWORD, new_email
+
+
+class Worker:
+    """
+    The state of one simulated user while a benchmark runs.
+
+    Attributes:
+        session: A session logged in as 'account'.
+        account (Account): The seeded account the worker uses.
+        victims (list): Seeded accounts the worker may delete.
+        new_session (callable): Creates a new, logged out session.
+    """
+
+    def __init__(self, new_session, account, victims):
+        self.new_session = new_session
+        self.account = account
+        self.victims = victims
+        self.session = new_session()
+        login(self.session, account.email)
+
+
+def login(session, email):
+    """
+    Log a session in as a seeded user, without timing it.
+    """
+    session.request("POST", "/login",
+                    {"email": email, "password": PASSWORD})
+
+
+def _timed(session, method, path, data=None):
+    """
+    Send one request and return its status and duration in seconds.
+    """
+    start = time.perf_counter()
+    status = session.request(method, path, data)
+    return status, time.perf_counter() - start
+
+
+def signup(worker, number):
+    return _timed(worker.new_session(), "POST", "/", {
+        "email": new_email(), "first_name": "Bench", "last_name": "User",
+        "password1": PASSWORD, "password2": PASSWORD})
+
+
+def login_user(worker, number):
+    return _timed(worker.new_session(), "POST", "/login", {
+        "email": worker.account.email, "password": PASSWORD})
+
+
+def notes(worker, number):
+    return _timed(worker.session, "GET", "/notes")
+
+
+def add_note(worker, number):
+    return _timed(worker.session, "POST", "/add_note", {
+        "note_title": f"Added {number}",
+        "note_content": f"Note {number} added by the benchmark"})
+
+
+def edit_note(worker, number):
+    note_ids = worker.account.note_ids
+    if not note_ids:
+        return None
+    note_id = note_ids[number % len(note_ids)]
+    return _timed(worker.session, "POST", f"/edit_note/{note_id}", {
+        "note_title": f"Edited {number}",
+        "note_content": f"Note {note_id} edited by the benchmark"})
+
+
+def delete_note(worker, number):
+    if not worker.account.note_ids:
+        return None
+    note_id = worker.account.note_ids.pop()
+    return _timed(worker.session, "GET", f"/delete_note/{note_id}")
+
+
+def delete_user(worker, number):
+    if not worker.victims:
+        return None
+    victim = worker.victims.pop()
+    session = worker.new_session()
+    login(session, victim.email)
+    return _timed(session, "GET", f"/delete_user/{victim.id}")
+
+
+# The scenarios in the order they run, with the status each should return.
+# Later scenarios use up the notes and users earlier ones work on.
+SCENARIOS = {
+    "signup": (signup, 302),
+    "login": (login_user, 302),
+    "notes": (notes, 200),
+    "add_note": (add_note, 302),
+    "edit_note": (edit_note, 302),
+    "delete_note": (delete_note, 302),
+    "delete_user": (delete_user, 302),
+}
@@ -0,0 +1,119 @@
+"""
+QuickNote Benchmark Seeding Module
+
+Description:
+    This module fills the database with the users and notes the benchmarks
+    work on.
+    Rows are inserted with set-based statements in batches, so large
+    databases can be seeded quickly, and the inserted notes are then added
+    to the search index with 'index_notes' and numbered with
+    'reserve_seqs', as every bulk write path in QuickNote must do.
+    Every seeded user shares one password, hashed once, and has an email
+    address containing a random run token, so a database can be seeded
+    several times without conflicts.
+
+    Dependencies:
+    - uuid: Generates the run token used in seeded email addresses.
+    - datetime: Spreads the seeded note dates over the past.
+    - quicknote.passwords: Hashes the shared benchmark password.
+    - quicknote.db: The database instance the rows are written to.
+    - quicknote.models: Contains the User and Note models being seeded.
+    - quicknote.search: Adds the seeded notes to the search index.
+    - quicknote.sync: Numbers the seeded notes in the change feed.
+"""
+import uuid
+from datetime import datetime, timedelta
+from quicknote import db
+from quicknote.models import User, Note
+from quicknote.passwords import hash_password
+from quicknote.search import index_notes
+from quicknote.sync import reserve_seqs
+
+
+# Password of every seeded account
+PASSWORD = "benchmark-password"
+
+# Notes inserted per statement
+BATCH_SIZE = 1000
+
+
+class Account:
+    """
+    A seeded user account.
+
+    Attributes:
+        id (int): The unique identifier of the user.
+        email (str): The email address the user logs in with.
+        note_ids (list): The ids of the user's notes, newest first.
+    """
+
+    def __init__(self, id, email, note_ids):
+        self.id = id
+        self.email = email
+        self.note_ids = note_ids
+
+
+def new_email(token=None):
+    """
+    Return an email address that no other benchmark user has.
+    """
+    return f"bench-{token or uuid.uuid4().hex}@example.com"
+
+
+def seed(users, notes_per_user, content=None):
+    """
+    Create benchmark users, each with the same number of notes.
+
+    Args:
+        users (int): The number of users to create.
+        notes_per_user (int): The number of notes each user gets.
+        content (callable, optional): Returns the content of a note from
+        its index and the user's number. Notes get a short sentence by
+        default.
+
+    Description:
+        Must be called inside an application context. Each user is
+        committed with their notes, so a failed run leaves only complete
+        accounts behind.
+
+    Returns:
+        list: An 'Account' for every user created.
+    """
+    password = hash_password(PASSWORD)
+    token = uuid.uuid4().hex[:8]
+    now = datetime.now()
+
+    accounts = []
+    for number in range(users):
+        email = new_email(f"{token}-{number}")
+        user_id = db.session.execute(User.__table__.insert().values(
+            email=email, first_name="Bench", last_name="User",
+            password=password)).inserted_primary_key[0]
+
+        # One note a minute going back in time, so the newest notes come
+        # first as they would for a real user
+        first_seq = reserve_seqs(db.session.connection(), user_id,
+                                 notes_per_user) if notes_per_user else 0
+        for start in range(0, notes_per_user, BATCH_SIZE):
+            stop = min(start + BATCH_SIZE, notes_per_user)
+            db.session.execute(Note.__table__.insert(), [
+                {"user_id": user_id,
+                 "note_title": f"Note {index}",
+                 "note_content": (
+                     content(index, number) if content else
+                     f"Benchmark note {index} of user {number}"),
+                 "note_date": now - timedelta(minutes=index),
+                 "change_seq": first_seq + index}
+                for index in range(start, stop)])
+
+        rows = db.session.execute(
+            db.select(Note.id, Note.note_title, Note.note_content)
+            .where(Note.user_id == user_id)
+            .order_by(Note.note_date.desc(), Note.id)).all()
+        index_notes(db.session.connection(), [dict(row._mapping)
+                                              for row in rows])
+        db.session.commit()
+
+        accounts.append(Account(user_id, email, [row.id for row in rows]))
+
+    return accounts
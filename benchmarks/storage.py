@@ -0,0 +1,274 @@
+"""
+QuickNote Storage Benchmark Module
+
+Description:
+    This module measures how much compressing long note contents saves
+    (see 'quicknote.compressed').
+    It seeds users whose notes have long, prose-like contents, stored
+    uncompressed as they were before compression was turned on, and
+    measures the note table. It then runs the compression backfill,
+    reclaims the freed space and measures the table again.
+    Each measurement reports the size of the note table and how many
+    database pages reading every seeded content touches:
+    - on PostgreSQL, the heap and TOAST sizes, and the blocks found in and
+      read into shared buffers while reading, from 'pg_statio_user_tables'.
+      The space is reclaimed with VACUUM FULL, which locks the table, so
+      only run it against a scratch database.
+    - on SQLite, the pages of the note table, from the 'dbstat' table when
+      SQLite was built with it, and the share of the page cache they fill.
+    The time taken to read every content is reported too, as compressed
+    contents are decompressed when they are read.
+
+    Dependencies:
+    - random: Generates the note contents.
+    - time: Times the reads.
+    - sqlalchemy: Provides the statements.
+    - quicknote.compressed: Compresses the contents and measures them.
+    - quicknote.db: The database the notes are written to.
+    - quicknote.models: Contains the Note model.
+    - benchmarks.seed: Creates the benchmark users and notes.
+"""
+import random
+import time
+from sqlalchemy import text
+from sqlalchemy.orm import undefer
+from quicknote import db
+from quicknote.compressed import backfill, stats
+from quicknote.models import Note
+from benchmarks.seed import seed
+
+
+# Words note contents are made of, so they compress like prose would
+WORDS = (
+    "the of and to a in is it you that he was for on are with as I his "
+    "they be at one have this from or had by hot word but what some we "
+    "can out other were all there when up use your how said an each she "
+    "which do their time if will way about many then them write would "
+    "like so these her long make thing see him two has look more day "
+    "could go come did number sound no most people my over know water "
+    "than call first who may down side been now find meeting project "
+    "shopping list remember tomorrow deadline review notes idea budget"
+).split()
+
+# Longest content the note forms accept
+MAX_CONTENT = 5000
+
+
+def long_content(size, rng):
+    """
+    Return prose-like text of about 'size' characters.
+    """
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:min(size, MAX_CONTENT)]
+
+
+def _table_size(connection):
+    """
+    Measure the note table.
+
+    Returns:
+        dict: The table's size in bytes and its pages, split between the
+        heap and TOAST on PostgreSQL.
+    """
+    if connection.dialect.name == "postgresql":
+        row = connection.execute(text(
+            "SELECT pg_relation_size('note') AS heap, "
+            "COALESCE(pg_relation_size(reltoastrelid), 0) AS toast, "
+            "current_setting('block_size')::int AS page_size "
+            "FROM pg_class WHERE oid = 'note'::regclass")).one()
+        return {"bytes": row.heap + row.toast,
+                "heap_bytes": row.heap, "toast_bytes": row.toast,
+                "pages": (row.heap + row.toast) // row.page_size}
+
+    page_size = connection.execute(text("PRAGMA page_size")).scalar()
+    try:
+        pages = connection.execute(text(
+            "SELECT count(*) FROM dbstat WHERE name = 'note'")).scalar()
+    except Exception:  # noqa: B902
+        # Without 'dbstat', fall back to the whole database file
+        pages = connection.execute(text("PRAGMA page_count")).scalar()
+    return {"bytes": pages * page_size, "pages": pages}
+
+
+def _cache_pages(connection):
+    """
+    Return the pages SQLite's page cache holds, or None elsewhere.
+    """
+    if connection.dialect.name != "sqlite":
+        return None
+    cache_size = connection.execute(text("PRAGMA cache_size")).scalar()
+    if cache_size >= 0:
+        return cache_size
+    # A negative cache size is a limit in kibibytes
+    page_size = connection.execute(text("PRAGMA page_size")).scalar()
+    return -cache_size * 1024 // page_size
+
+
+def _block_counts(connection):
+    """
+    Read the note table's buffer statistics on PostgreSQL.
+
+    Returns:
+        dict: Cumulative heap and TOAST blocks found in shared buffers
+        ('hit') and read from disk ('read'), or None on other databases.
+    """
+    if connection.dialect.name != "postgresql":
+        return None
+    # Statistics are only sent to the collector between transactions
+    connection.execute(text("SELECT pg_stat_clear_snapshot()"))
+    row = connection.execute(text(
+        "SELECT heap_blks_hit, heap_blks_read, "
+        "COALESCE(toast_blks_hit, 0) AS toast_blks_hit, "
+        "COALESCE(toast_blks_read, 0) AS toast_blks_read "
+        "FROM pg_statio_user_tables WHERE relname = 'note'")).one()
+    return {"hit": row.heap_blks_hit + row.toast_blks_hit,
+            "read": row.heap_blks_read + row.toast_blks_read}
+
+
+def _read_contents(note_ids, passes):
+    """
+    Read and decode every seeded content, 'passes' times.
+
+    Returns:
+        float: The average time of a pass, in milliseconds.
+    """
+    started = time.perf_counter()
+    for _ in range(passes):
+        for start in range(0, len(note_ids), 500):
+            Note.query.options(undefer(Note.note_content)).filter(
+                Note.id.in_(note_ids[start:start + 500])).all()
+            db.session.expire_all()
+        db.session.commit()
+    return (time.perf_counter() - started) * 1000 / passes
+
+
+def _measure(note_ids, passes):
+    """
+    Measure the note table and reading the seeded contents.
+    """
+    with db.engine.connect() as connection:
+        result = _table_size(connection)
+        result.update(stats(connection, Note.__table__, "note_content"))
+        before = _block_counts(connection)
+
+    result["read_ms"] = _read_contents(note_ids, passes)
+
+    if before is not None:
+        # Give the statistics collector a moment to catch up
+        time.sleep(1)
+        with db.engine.connect() as connection:
+            after = _block_counts(connection)
+        hit = after["hit"] - before["hit"]
+        read = after["read"] - before["read"]
+        result["blocks_touched"] = hit + read
+        result["blocks_read"] = read
+        result["hit_ratio"] = hit / (hit + read) if hit + read else None
+    return result
+
+
+def _reclaim():
+    """
+    Give the space freed by the backfill back to the database.
+    """
+    with db.engine.connect() as connection:
+        connection = connection.execution_options(
+            isolation_level="AUTOCOMMIT")
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("VACUUM FULL ANALYZE note"))
+        else:
+            connection.execute(text("VACUUM"))
+
+
+def run_storage(app, users, notes, size, passes):
+    """
+    Measure the note table before and after compressing its contents.
+
+    Args:
+        app (Flask): The application whose database is measured.
+        users (int): The number of users to seed.
+        notes (int): The number of notes per user.
+        size (int): The length of each note's content.
+        passes (int): How many times every content is read.
+
+    Description:
+        The whole note table is measured, so the figures are clearest on
+        a database holding only benchmark notes, such as the temporary
+        one used when no database is configured.
+
+    Returns:
+        dict: The 'before' and 'after' measurements and the rows
+        'rewritten' by the backfill.
+    """
+    rng = random.Random(0)
+    with app.app_context():
+        # Store the contents as they were before compression existed
+        enabled = app.config["CONTENT_COMPRESSION"]
+        app.config["CONTENT_COMPRESSION"] = False
+        try:
+            accounts = seed(users, notes,
+                            lambda index, number: long_content(size, rng))
+        finally:
+            app.config["CONTENT_COMPRESSION"] = enabled
+        note_ids = [note_id for account in accounts
+                    for note_id in account.note_ids]
+
+        _reclaim()
+        before = _measure(note_ids, passes)
+
+        app.config["CONTENT_COMPRESSION"] = True
+        try:
+            with db.engine.connect() as connection:
+                rewritten = backfill(connection, Note.__table__,
+                                     "note_content")
+        finally:
+            app.config["CONTENT_COMPRESSION"] = enabled
+
+        _reclaim()
+        after = _measure(note_ids, passes)
+        with db.engine.connect() as connection:
+            cache_pages = _cache_pages(connection)
+
+    return {"before": before, "after": after, "rewritten": rewritten,
+            "cache_pages": cache_pages}
+
+
+def print_storage(result):
+    """
+    Print the measurements of 'run_storage' side by side.
+    """
+    before, after = result["before"], result["after"]
+
+    def change(name):
+        if not before.get(name):
+            return ""
+        return f"{(after[name] - before[name]) * 100 / before[name]:+.1f}%"
+
+    print(f"Backfill rewrote {result['rewritten']} notes "
+          f"({after['compressed']} of {after['rows']} now compressed)")
+    print(f"  {'':<16} {'before':>12} {'after':>12} {'change':>8}")
+    rows = [("table bytes", "bytes"), ("heap bytes", "heap_bytes"),
+            ("toast bytes", "toast_bytes"), ("pages", "pages"),
+            ("stored bytes", "stored_bytes"),
+            ("blocks touched", "blocks_touched"),
+            ("blocks read", "blocks_read"), ("read ms/pass", "read_ms")]
+    for label, name in rows:
+        if name in before:
+            print(f"  {label:<16} {before[name]:>12.0f} "
+                  f"{after[name]:>12.0f} {change(name):>8}")
+
+    if "hit_ratio" in before:
+        def show(ratio):
+            return "-" if ratio is None else f"{ratio * 100:.1f}%"
+        print(f"  {'cache hit ratio':<16} {show(before['hit_ratio']):>12} "
+              f"{show(after['hit_ratio']):>12}")
+    if result["cache_pages"]:
+        def fit(measurement):
+            share = measurement["pages"] * 100 / result["cache_pages"]
+            return f"{share:.0f}%"
+        print(f"  {'cache needed':<16} {fit(before):>12} {fit(after):>12}"
+              f"   of {result['cache_pages']} cached pages")
@@ -0,0 +1,64 @@
+"""
+QuickNote Production Server Configuration
+
+Description:
+    This module configures Gunicorn, the WSGI server that runs the QuickNote
+    application in production ('gunicorn --config gunicorn.conf.py run:app').
+    Every setting can be tuned through environment variables, so the same
+    file works on a small dyno and on a large host.
+    The application is loaded once in the master process before the workers
+    are forked, so its code and templates are shared copy-on-write between
+    workers. The application does not connect to the database while it is
+    loaded, and each worker opens its own database connections on first use.
+
+    Reloading:
+    - 'kill -HUP <master pid>' gracefully restarts the workers and re-reads
+      this file. Because the app is preloaded, new code is only picked up
+      when the master itself is replaced.
+    - To deploy new code without downtime, send 'USR2' to start a new master
+      alongside the old one, then 'TERM' to the old master once the new
+      workers are serving.
+
+    Environment Variables:
+    - IP, PORT: The address to listen on (defaults to 0.0.0.0:8000).
+    - WEB_CONCURRENCY: The number of worker processes (set by Heroku).
+    - GUNICORN_THREADS: The number of request threads in each worker.
+    - GUNICORN_WORKER_CLASS: The worker class (defaults to "gthread").
+      The ASGI application ('quicknote.asgi') is served with
+      "uvicorn.workers.UvicornWorker", which ignores 'threads'.
+    - GUNICORN_KEEPALIVE: Seconds to keep idle client connections open.
+    - GUNICORN_TIMEOUT: Seconds before a silent worker is restarted.
+    - GUNICORN_GRACEFUL_TIMEOUT: Seconds workers get to finish requests
+      when restarting.
+    - GUNICORN_MAX_REQUESTS: Requests served before a worker is recycled
+      (0 disables recycling).
+    - GUNICORN_PRELOAD: Set to "False" to load the app in each worker.
+
+    Dependencies:
+    - os: Provides access to the operating system environment.
+"""
+import os
+
+
+bind = f"{os.environ.get('IP', '0.0.0.0')}:{os.environ.get('PORT', '8000')}"
+
+# Threaded workers keep a small number of processes busy while requests
+# wait on the database
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+# Recycle workers now and then to bound memory growth; the jitter stops
+# every worker restarting at the same moment
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = max_requests // 10
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "True") == "True"
+
+accesslog = "-"
+errorlog = "-"
+
@@ -0,0 +1,63 @@
+"""
+QuickNote Migration Environment
+
+Description:
+    This module is loaded by Alembic whenever a migration command is run.
+    It reuses the QuickNote application configuration, so migrations run
+    against the same database as the application ('DATABASE_URL', or
+    'DB_URL' in development mode) and compare against the models defined
+    in 'quicknote.models'.
+
+    Dependencies:
+    - alembic.context: Provides the migration context and configuration.
+    - quicknote: The application factory and database instance being
+      migrated.
+"""
+from alembic import context
+from quicknote import create_app, db
+import quicknote.models  # noqa
+
+
+app = create_app()
+
+
+target_metadata = db.metadata
+
+
+def run_migrations_offline():
+    """
+    Emit the migration SQL as a script without connecting to the database.
+    """
+    context.configure(
+        url=app.config["SQLALCHEMY_DATABASE_URI"],
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """
+    Run the migrations against the application's database engine.
+    """
+    with app.app_context():
+        connectable = db.engine
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,46 @@
+"""
+Initial schema
+
+Creates the 'user' and 'note' tables as they were originally created with
+'db.create_all()'. Databases created that way should be marked as being at
+this revision with 'alembic stamp 0001' instead of running it.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "user",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("first_name", sa.String(30)),
+        sa.Column("last_name", sa.String(30)),
+        sa.Column("email", sa.String(150), nullable=False, unique=True),
+        sa.Column("password", sa.String(150)),
+    )
+    op.create_table(
+        "note",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("note_title", sa.String(30)),
+        sa.Column("note_content", sa.String(5000)),
+        sa.Column("note_date", sa.DateTime(timezone=True)),
+        sa.Column("user_id", sa.Integer(),
+                  sa.ForeignKey("user.id", ondelete="CASCADE"),
+                  nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("note")
+    op.drop_table("user")
@@ -0,0 +1,41 @@
+"""
+Index notes by owner and date
+
+Adds the composite (user_id, note_date DESC, id) index used by the notes
+list and by per-user note lookups. On PostgreSQL the index is built with
+CREATE INDEX CONCURRENTLY outside of a transaction, so it can be applied
+to a live table without blocking writes.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_note_user_id_note_date_id",
+            "note",
+            ["user_id", sa.text("note_date DESC"), "id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_note_user_id_note_date_id",
+            table_name="note",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,86 @@
+"""
+Full-text search index for notes
+
+On PostgreSQL, adds the 'search_vector' tsvector column, fills it in
+batches so the table is never locked for long, and builds a GIN index on
+(user_id, search_vector) concurrently. The btree_gin extension provides
+the GIN operator class for 'user_id'.
+On SQLite, creates and fills the 'note_fts' FTS5 table.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:00:00
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# Number of notes filled per statement during the backfill
+BATCH_SIZE = 10000
+
+UPDATE_VECTOR = (
+    "UPDATE note SET search_vector = "
+    "setweight(to_tsvector('english', coalesce(note_title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(note_content, '')), 'B') "
+    "{where}")
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS note_fts "
+            "USING fts5(note_title, note_content, "
+            "tokenize='porter unicode61')")
+        op.execute(
+            "INSERT INTO note_fts (rowid, note_title, note_content) "
+            "SELECT id, note_title, note_content FROM note")
+
+    elif bind.dialect.name == "postgresql":
+        op.execute(
+            "ALTER TABLE note ADD COLUMN IF NOT EXISTS "
+            "search_vector tsvector")
+
+        with op.get_context().autocommit_block():
+            if context.is_offline_mode():
+                # No row count is available when writing a SQL script
+                op.execute(sa.text(UPDATE_VECTOR.format(where="")))
+            else:
+                max_id = bind.execute(sa.text(
+                    "SELECT coalesce(max(id), 0) FROM note")).scalar()
+                for start in range(0, max_id, BATCH_SIZE):
+                    bind.execute(sa.text(UPDATE_VECTOR.format(
+                        where="WHERE id > :start AND id <= :end")),
+                        {"start": start, "end": start + BATCH_SIZE})
+
+            op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+            op.create_index(
+                "ix_note_user_id_search_vector",
+                "note",
+                ["user_id", "search_vector"],
+                postgresql_using="gin",
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == "sqlite":
+        op.execute("DROP TABLE IF EXISTS note_fts")
+
+    elif bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                "ix_note_user_id_search_vector",
+                table_name="note",
+                postgresql_concurrently=True,
+            )
+        op.drop_column("note", "search_vector")
@@ -0,0 +1,101 @@
+"""
+Change feed for syncing notes
+
+Adds the per-user change sequence ('user.note_seq' and
+'user.notes_changed_at'), the 'note.change_seq' column with its
+(user_id, change_seq) index, and the 'note_tombstone' table recording
+deleted notes.
+Existing notes are numbered with their own ids, which are unique and
+increase with creation order, and each user's sequence starts after the
+highest number given to their notes. The backfill runs in batches so the
+table is never locked for long, and on PostgreSQL the index is built
+concurrently.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 11:00:00
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# Number of notes numbered per statement during the backfill
+BATCH_SIZE = 10000
+
+UPDATE_SEQ = "UPDATE note SET change_seq = id WHERE change_seq IS NULL {where}"
+
+UPDATE_USER_SEQ = (
+    'UPDATE "user" SET note_seq = coalesce('
+    "(SELECT max(change_seq) FROM note WHERE note.user_id = \"user\".id), 0)")
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.add_column(sa.Column(
+            "note_seq", sa.Integer(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column(
+            "notes_changed_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("note", sa.Column("change_seq", sa.Integer(),
+                                    nullable=True))
+
+    op.create_table(
+        "note_tombstone",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("note_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("change_seq", sa.Integer(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"],
+                                ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_note_tombstone_user_id_change_seq",
+                    "note_tombstone", ["user_id", "change_seq"])
+
+    # The backfill commits batch by batch, outside of one long transaction
+    with op.get_context().autocommit_block():
+        if context.is_offline_mode():
+            # No row count is available when writing a SQL script
+            op.execute(sa.text(UPDATE_SEQ.format(where="")))
+        else:
+            max_id = bind.execute(sa.text(
+                "SELECT coalesce(max(id), 0) FROM note")).scalar()
+            for start in range(0, max_id, BATCH_SIZE):
+                bind.execute(sa.text(UPDATE_SEQ.format(
+                    where="AND id > :start AND id <= :end")),
+                    {"start": start, "end": start + BATCH_SIZE})
+        op.execute(sa.text(UPDATE_USER_SEQ))
+
+        # CONCURRENTLY cannot run inside a transaction block
+        op.create_index(
+            "ix_note_user_id_change_seq",
+            "note",
+            ["user_id", "change_seq"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_note_user_id_change_seq",
+            table_name="note",
+            postgresql_concurrently=True,
+        )
+
+    op.drop_index("ix_note_tombstone_user_id_change_seq",
+                  table_name="note_tombstone")
+    op.drop_table("note_tombstone")
+    with op.batch_alter_table("note") as batch_op:
+        batch_op.drop_column("change_seq")
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.drop_column("notes_changed_at")
+        batch_op.drop_column("note_seq")
@@ -0,0 +1,33 @@
+"""
+Longer password hashes
+
+Widens 'user.password' to 255 characters for scrypt hashes, which are
+longer than the 150 characters allowed so far. On PostgreSQL, widening a
+varchar only changes the catalog, so the table is not rewritten.
+The downgrade fails if a stored hash no longer fits.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 12:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.alter_column("password", existing_type=sa.String(150),
+                              type_=sa.String(255))
+
+
+def downgrade():
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.alter_column("password", existing_type=sa.String(255),
+                              type_=sa.String(150))
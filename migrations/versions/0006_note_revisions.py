@@ -0,0 +1,46 @@
+"""
+Note revision history
+
+Adds the 'note_revision' table, holding compressed snapshots and deltas
+of edited notes, with its unique (note_id, revision) index. Existing
+notes start without history; their first edit saves the version it
+replaces.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 13:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "note_revision",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("note_id", sa.Integer(), nullable=False),
+        sa.Column("revision", sa.Integer(), nullable=False),
+        sa.Column("note_title", sa.String(length=30), nullable=True),
+        sa.Column("is_snapshot", sa.Boolean(), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["note_id"], ["note.id"],
+                                ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_note_revision_note_id_revision", "note_revision",
+                    ["note_id", "revision"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ix_note_revision_note_id_revision",
+                  table_name="note_revision")
+    op.drop_table("note_revision")
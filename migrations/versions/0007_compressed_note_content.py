@@ -0,0 +1,97 @@
+"""
+Compressed note contents
+
+Turns 'note.note_content' into a binary column holding the encoding of
+'quicknote.compressed.CompressedText': a marker byte followed by the
+UTF-8 text (0x00) or the text compressed with zlib (0x01).
+Existing contents are converted with the 0x00 marker, which only copies
+them; 'python -m quicknote.compressed backfill' compresses them
+afterwards in small batches while the application is running.
+On PostgreSQL the conversion is one ALTER TABLE, which rewrites the
+table under an exclusive lock. On SQLite the contents are converted in
+batches and the table is then copied by a batch operation.
+The downgrade decompresses every content first, so it takes longer.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 14:00:00
+"""
+import zlib
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+# Notes converted per statement on SQLite and during the downgrade
+BATCH_SIZE = 1000
+
+RAW = b"\x00"
+ZLIB = b"\x01"
+
+
+def _convert(bind, where, convert):
+    """
+    Rewrite the contents matching 'where', a batch of notes at a time.
+    """
+    last_id = 0
+    while True:
+        rows = bind.execute(sa.text(
+            f"SELECT id, note_content FROM note WHERE id > :last_id "
+            f"AND note_content IS NOT NULL AND {where} "
+            f"ORDER BY id LIMIT {BATCH_SIZE}"), {"last_id": last_id}).all()
+        if not rows:
+            return
+        bind.execute(
+            sa.text("UPDATE note SET note_content = :value WHERE id = :id"),
+            [{"id": row.id, "value": convert(row.note_content)}
+             for row in rows])
+        last_id = rows[-1].id
+
+
+def _to_text(value):
+    value = bytes(value)
+    data = zlib.decompress(value[1:]) if value[:1] == ZLIB else value[1:]
+    return data.decode("utf-8")
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == "postgresql":
+        op.execute(
+            "ALTER TABLE note ALTER COLUMN note_content TYPE bytea USING "
+            "'\\x00'::bytea || convert_to(note_content, 'UTF8')")
+        return
+
+    if not context.is_offline_mode():
+        # The values are converted first, as the batch operation casts
+        # them while copying the table; SQLite keeps blobs in text columns
+        _convert(bind, "typeof(note_content) = 'text'",
+                 lambda text: RAW + text.encode("utf-8"))
+    with op.batch_alter_table("note") as batch_op:
+        batch_op.alter_column("note_content", existing_type=sa.String(5000),
+                              type_=sa.LargeBinary())
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == "postgresql":
+        if not context.is_offline_mode():
+            _convert(bind, "get_byte(note_content, 0) = 1",
+                     lambda value: RAW + _to_text(value).encode("utf-8"))
+        op.execute(
+            "ALTER TABLE note ALTER COLUMN note_content TYPE varchar(5000) "
+            "USING convert_from(substring(note_content from 2), 'UTF8')")
+        return
+
+    if not context.is_offline_mode():
+        _convert(bind, "typeof(note_content) = 'blob'", _to_text)
+    with op.batch_alter_table("note") as batch_op:
+        batch_op.alter_column("note_content", existing_type=sa.LargeBinary(),
+                              type_=sa.String(5000))
@@ -0,0 +1,95 @@
+"""
+Folders and tags
+
+Adds the 'folder' and 'tag' tables, each with a unique (user_id, name)
+index and a 'note_count' kept up to date by the application, the
+'note.folder_id' column with its (user_id, folder_id, note_date, id)
+index, and the 'note_tag' table linking notes to tags, with the
+(user_id, tag_id, note_date, note_id) index the tag lists are read from.
+Existing notes start in no folder and without tags, so nothing needs to
+be backfilled. On PostgreSQL the note index is built concurrently.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 16:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for name in ("folder", "tag"):
+        op.create_table(
+            name,
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=30), nullable=False),
+            sa.Column("note_count", sa.Integer(), nullable=False,
+                      server_default="0"),
+            sa.ForeignKeyConstraint(["user_id"], ["user.id"],
+                                    ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(f"ix_{name}_user_id_name", name,
+                        ["user_id", "name"], unique=True)
+
+    op.create_table(
+        "note_tag",
+        sa.Column("note_id", sa.Integer(), nullable=False),
+        sa.Column("tag_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("note_date", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["note_id"], ["note.id"],
+                                ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["tag_id"], ["tag.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"],
+                                ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("note_id", "tag_id"),
+    )
+    op.create_index(
+        "ix_note_tag_user_id_tag_id_note_date_note_id", "note_tag",
+        ["user_id", "tag_id", sa.text("note_date DESC"), "note_id"])
+
+    with op.batch_alter_table("note") as batch_op:
+        batch_op.add_column(sa.Column("folder_id", sa.Integer(),
+                                      nullable=True))
+        batch_op.create_foreign_key("fk_note_folder_id_folder", "folder",
+                                    ["folder_id"], ["id"],
+                                    ondelete="SET NULL")
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_note_user_id_folder_id_note_date_id",
+            "note",
+            ["user_id", "folder_id", sa.text("note_date DESC"), "id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_note_user_id_folder_id_note_date_id",
+            table_name="note",
+            postgresql_concurrently=True,
+        )
+
+    with op.batch_alter_table("note") as batch_op:
+        batch_op.drop_constraint("fk_note_folder_id_folder",
+                                 type_="foreignkey")
+        batch_op.drop_column("folder_id")
+
+    op.drop_index("ix_note_tag_user_id_tag_id_note_date_note_id",
+                  table_name="note_tag")
+    op.drop_table("note_tag")
+    for name in ("tag", "folder"):
+        op.drop_index(f"ix_{name}_user_id_name", table_name=name)
+        op.drop_table(name)
@@ -4,44 +4,124 @@ QuickNote Application Initialization Module
 Description:
     This module serves as the initialization and configuration file for the
     QuickNote application.
-    It sets up the Flask application, configures the database using SQLAlchemy,
-    and integrates user authentication using Flask-Login.
-    The module also defines the user loading function required by Flask-Login.
+    It provides the 'create_app' application factory, which sets up a Flask
+    application, configures the database using SQLAlchemy, integrates user
+    authentication using Flask-Login and registers the auth, notes and
+    account blueprints.
+    Nothing is connected at import time: each application creates its
+    database engine on first use, and engines inherited by a forked worker
+    process are discarded so the worker opens its own connections.
+    Several isolated applications can therefore be created in one process.
+    The module also defines the user loading function required by Flask-Login,
+    which reads users through a cache instead of the database.
 
 Dependencies:
+    - logging: Reports slow application startup.
     - os: Provides access to the operating system environment.
+    - time: Measures how long the application takes to start.
+    - weakref: Tracks the applications created in this process.
     - Flask: A web framework for building the application.
     - Flask-SQLAlchemy: An extension for integrating SQLAlchemy with Flask.
+    - quicknote.replicas: Routes read-only views to database replicas.
     - Flask-Login: A Flask extension for user authentication.
     - env: Environment variables (if defined in an 'env.py' file).
 """
+import logging
 import os
+import time
+import weakref
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy import get_state
 from flask_login import LoginManager
+from quicknote.replicas import RoutingSQLAlchemy
 if os.path.exists("env.py"):
     import env  # noqa
 
 
-app = Flask(__name__)
-app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY")
+logger = logging.getLogger(__name__)
 
-if os.environ.get("DEVELOPMENT") == "True":
-    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DB_URL")
-else:
-    uri = os.environ.get("DATABASE_URL")
-    if uri.startswith("postgres://"):
-        uri = uri.replace("postgres://", "postgresql://", 1)
-    app.config["SQLALCHEMY_DATABASE_URI"] = uri
+# Reads of read-only views may be routed to replicas; see quicknote.replicas
+db = RoutingSQLAlchemy()
 
-db = SQLAlchemy(app)
+login_manager = LoginManager()
+login_manager.login_view = "auth.login"
 
-from quicknote import routes  # noqa
-from .models import User, Note  # noqa
+# Applications created in this process, whose engines are reset after fork
+_apps = weakref.WeakSet()
 
-login_manager = LoginManager()
-login_manager.login_view = "login"
-login_manager.init_app(app)
+
+def create_app(config=None):
+    """
+    Create and configure a QuickNote application.
+
+    Args:
+        config (dict, optional): Settings that override the ones read from
+        the environment.
+
+    Description:
+        The settings are read from the environment by 'quicknote.config',
+        then updated with 'config'. Connection pool options are derived
+        from the final database URL unless they are given explicitly.
+        The time taken is stored in the 'STARTUP_TIME_MS' setting, and a
+        warning is logged when it exceeds 'STARTUP_BUDGET_MS'.
+
+    Returns:
+        Flask: The configured application.
+    """
+    started = time.perf_counter()
+
+    from quicknote import config as settings, replicas
+    from quicknote.pool import engine_options
+
+    app = Flask(__name__)
+    app.config.from_mapping(settings.from_env())
+    if config:
+        app.config.from_mapping(config)
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(
+        app.config.get("SQLALCHEMY_DATABASE_URI"), os.environ))
+
+    replicas.init_app(app)
+    db.init_app(app)
+    login_manager.init_app(app)
+
+    from quicknote import (assets, compression, fragments, instrumentation,
+                           passwords, user_cache)
+    from quicknote.routes import register_blueprints
+
+    assets.init_app(app)
+    user_cache.init_app(app)
+    passwords.init_app(app)
+    fragments.init_app(app)
+    compression.init_app(app)
+    instrumentation.init_app(app)
+    register_blueprints(app)
+    _apps.add(app)
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    app.config["STARTUP_TIME_MS"] = elapsed_ms
+    if elapsed_ms > app.config["STARTUP_BUDGET_MS"]:
+        logger.warning("QuickNote started in %.0f ms, over the %.0f ms "
+                       "budget", elapsed_ms, app.config["STARTUP_BUDGET_MS"])
+
+    return app
+
+
+def _reset_engines_after_fork():
+    """
+    Discard database connections inherited from the parent process.
+
+    Description:
+        This runs in every child process created with 'os.fork', such as
+        Gunicorn workers forked from a preloaded master. Only engines that
+        were already created are disposed, and their connections are left
+        open for the parent; the child opens its own on first use.
+    """
+    for app in list(_apps):
+        for connector in list(get_state(app).connectors.values()):
+            connector.get_engine().dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_reset_engines_after_fork)
 
 
 @login_manager.user_loader
@@ -57,11 +137,14 @@ def load_user(id):
         It loads a user from the database based on their unique identifier.
         The 'id' argument is typically provided by the Flask-Login extension
         during user session management.
-        The function queries the 'User' model and returns the user associated
-        with the provided 'id', if found.
+        The user is served from the user cache when possible, so most
+        authenticated requests do not query the 'User' model. On a cache
+        miss the user is read from the database and cached.
 
     Returns:
         User: The user object associated with the provided unique identifier,
         or None if no user is found.
     """
-    return User.query.get(int(id))
+    from quicknote import user_cache
+
+    return user_cache.load_user(int(id))
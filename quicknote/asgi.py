@@ -0,0 +1,312 @@
+"""
+QuickNote ASGI Module
+
+Description:
+    This module serves QuickNote as an ASGI application, so a worker can
+    keep many requests waiting on the database at once without a thread
+    for each of them.
+    'create_asgi_app' builds the usual Flask application and wraps it in
+    'QuickNoteASGI'. Requests for the endpoints registered in
+    'quicknote.routes.async_views' (the notes pages and the signup, login
+    and logout views) are handled by coroutines that query the database
+    through SQLAlchemy's asyncio extension, using asyncpg for PostgreSQL
+    and aiosqlite for SQLite, with the same models as the WSGI views.
+    Every other request, such as the JSON API, the account pages and the
+    static files, is passed to the Flask application through asgiref's
+    WSGI adapter, which runs it on a thread.
+    Async requests go through the same request context, before and after
+    request functions, error handlers and session cookie as WSGI ones. The
+    user of an async request is read with the async session and put in the
+    user cache before the view runs, so Flask-Login then finds it without
+    a blocking query.
+    Async views always use the primary database; read replicas are only
+    used by WSGI views.
+
+    Serve it with Uvicorn workers:
+    'gunicorn --config gunicorn.conf.py -k uvicorn.workers.UvicornWorker
+    "quicknote.asgi:create_asgi_app()"'.
+
+    Dependencies:
+    - io, sys: Build the WSGI environ of async requests.
+    - os: Reads the connection pool settings.
+    - asgiref: Runs the WSGI application for the other endpoints.
+    - Flask: Provides the request handling steps and signals.
+    - Flask-Login: Reads the user id from the remember cookie.
+    - sqlalchemy: Provides the async engine and sessions.
+    - werkzeug.exceptions: Reports routing errors to the WSGI application.
+    - quicknote: Creates the Flask application.
+    - quicknote.models: Contains the User model.
+    - quicknote.pool: Builds the async engine options.
+    - quicknote.routes.async_views: Contains the async views.
+    - quicknote.user_cache: Caches the user of each request.
+"""
+import io
+import os
+import sys
+from asgiref.wsgi import WsgiToAsgi
+from flask import current_app, g, request, request_started, session
+from flask_login.config import COOKIE_NAME
+from flask_login.utils import decode_cookie
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from werkzeug.exceptions import HTTPException
+from quicknote import create_app
+from quicknote.models import User
+from quicknote.pool import async_engine_options
+from quicknote.user_cache import CACHED_COLUMNS, cache_user, is_cached
+
+
+def create_asgi_app(config=None):
+    """
+    Create a QuickNote application served over ASGI.
+
+    Args:
+        config (dict, optional): Settings that override the ones read from
+        the environment, as for 'create_app'.
+
+    Description:
+        The async engine options are derived from the database URL and
+        the pool environment variables unless the 'ASYNC_DATABASE_URI'
+        and 'ASYNC_ENGINE_OPTIONS' settings are given.
+
+    Returns:
+        QuickNoteASGI: The ASGI application.
+    """
+    app = create_app(config)
+    url, options = async_engine_options(
+        app.config.get("SQLALCHEMY_DATABASE_URI"), os.environ)
+    app.config.setdefault("ASYNC_DATABASE_URI", url)
+    app.config.setdefault("ASYNC_ENGINE_OPTIONS", options)
+    return QuickNoteASGI(app)
+
+
+def async_session():
+    """
+    Open a session on the async engine of the running application.
+
+    Description:
+        The engine is created on first use, in the worker process, since
+        asyncpg connections cannot be shared with a forked child. Objects
+        stay usable after commit, as views render them afterwards.
+
+    Returns:
+        AsyncSession: A new session, to be used with 'async with'.
+    """
+    extensions = current_app.extensions
+    if "async_sessions" not in extensions:
+        extensions["async_engine"] = create_async_engine(
+            current_app.config["ASYNC_DATABASE_URI"],
+            **current_app.config["ASYNC_ENGINE_OPTIONS"])
+        extensions["async_sessions"] = sessionmaker(
+            extensions["async_engine"], class_=AsyncSession,
+            expire_on_commit=False)
+    return extensions["async_sessions"]()
+
+
+def _environ(scope, body):
+    """
+    Build the WSGI environ of an ASGI HTTP request.
+
+    Args:
+        scope (dict): The ASGI connection scope.
+        body (bytes): The request body.
+    """
+    root_path = scope.get("root_path", "")
+    path = scope["path"]
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server = scope.get("server") or ("localhost", 80)
+
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": root_path.encode("utf-8").decode("latin-1"),
+        "PATH_INFO": path.encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("ascii"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+        environ["REMOTE_PORT"] = str(scope["client"][1])
+
+    for name, value in scope.get("headers", ()):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        if name not in ("CONTENT_LENGTH", "CONTENT_TYPE"):
+            name = f"HTTP_{name}"
+        value = value.decode("latin-1")
+        # Repeated headers are joined, as a WSGI server would
+        if name in environ:
+            value = f"{environ[name]},{value}"
+        environ[name] = value
+    return environ
+
+
+async def _read_body(receive):
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    return bytes(body)
+
+
+async def _load_user():
+    """
+    Cache the user of the current request, read with the async session.
+
+    Description:
+        The user id comes from the session, or from the remember cookie
+        when the session has expired. A user who no longer exists is
+        treated as anonymous without asking the database again.
+    """
+    user_id = session.get("_user_id")
+    if user_id is None:
+        cookie = request.cookies.get(
+            current_app.config.get("REMEMBER_COOKIE_NAME", COOKIE_NAME))
+        user_id = decode_cookie(cookie) if cookie else None
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return
+    if is_cached(user_id):
+        return
+
+    async with async_session() as db_session:
+        row = (await db_session.execute(
+            select(*(getattr(User, column) for column in CACHED_COLUMNS))
+            .where(User.id == user_id))).first()
+    if row is None:
+        g._login_user = current_app.login_manager.anonymous_user()
+    else:
+        cache_user(row)
+
+
+class QuickNoteASGI:
+    """
+    ASGI application serving QuickNote's async views.
+
+    Attributes:
+        app (Flask): The QuickNote application.
+        wsgi (WsgiToAsgi): The application adapted for the other
+        endpoints.
+        views (dict): The async views, by endpoint.
+    """
+
+    def __init__(self, app):
+        # The views open sessions with 'async_session', defined above
+        from quicknote.routes.async_views import ASYNC_VIEWS
+
+        self.app = app
+        self.wsgi = WsgiToAsgi(app)
+        self.views = ASYNC_VIEWS
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise ValueError(f"Unsupported ASGI scope: {scope['type']}")
+
+        # Routing only needs the headers, so the body is left unread for
+        # the WSGI adapter when the endpoint has no async view
+        environ = _environ(scope, b"")
+        view = self._match(environ)
+        if view is None:
+            await self.wsgi(scope, receive, send)
+            return
+
+        environ["wsgi.input"] = io.BytesIO(await _read_body(receive))
+        status, headers, body = await self._handle(environ, view)
+
+        await send({"type": "http.response.start", "status": status,
+                    "headers": headers})
+        for chunk in body:
+            await send({"type": "http.response.body", "body": chunk,
+                        "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    def _match(self, environ):
+        """
+        Return the async view of the requested endpoint, or None.
+        """
+        try:
+            endpoint, _ = self.app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            # Redirects and errors are left to the WSGI application
+            return None
+        return self.views.get(endpoint)
+
+    async def _handle(self, environ, view):
+        """
+        Run an async view with Flask's request handling around it.
+
+        Description:
+            This follows 'Flask.full_dispatch_request', awaiting the view
+            instead of calling it. The body is read before the request
+            context is popped, since templates and sessions need it.
+
+        Returns:
+            tuple: The status code, the headers as ASGI expects them and
+            the body chunks.
+        """
+        app = self.app
+        with app.request_context(environ):
+            try:
+                try:
+                    app.try_trigger_before_first_request_functions()
+                    request_started.send(app)
+                    rv = app.preprocess_request()
+                    if rv is None:
+                        if request.routing_exception is not None:
+                            raise request.routing_exception
+                        await _load_user()
+                        rv = await view(**request.view_args)
+                except Exception as error:  # noqa: B902
+                    rv = app.handle_user_exception(error)
+                response = app.finalize_request(rv)
+            except Exception as error:  # noqa: B902
+                response = app.handle_exception(error)
+
+            body, status, headers = response.get_wsgi_response(environ)
+            try:
+                chunks = [bytes(chunk) for chunk in body]
+            finally:
+                if hasattr(body, "close"):
+                    body.close()
+
+        return (int(status.split(" ", 1)[0]),
+                [(name.lower().encode("latin-1"), value.encode("latin-1"))
+                 for name, value in headers],
+                chunks)
+
+    async def _lifespan(self, receive, send):
+        """
+        Answer the server's startup and shutdown events.
+
+        Description:
+            The async engine is disposed of on shutdown, closing its
+            connections cleanly.
+        """
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                engine = self.app.extensions.pop("async_engine", None)
+                self.app.extensions.pop("async_sessions", None)
+                if engine is not None:
+                    await engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
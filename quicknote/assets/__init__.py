@@ -0,0 +1,156 @@
+"""
+QuickNote Static Assets Package
+
+Description:
+    This package serves QuickNote's stylesheets, scripts and fonts from the
+    application itself, bundled, minified and fingerprinted, instead of
+    loading them from third-party CDNs on every first visit.
+    'python -m quicknote.assets build' (see 'quicknote.assets.build')
+    downloads the third-party assets listed in 'VENDOR' into
+    'static/vendor', joins the files of each bundle in 'BUNDLES', minifies
+    them and writes every static file to 'static/dist' under a name that
+    contains a hash of its content, along with gzip and brotli compressed
+    copies and a 'manifest.json' that maps each original name to its
+    fingerprinted one.
+    When the manifest exists:
+    - 'url_for("static", filename=...)' returns the fingerprinted name,
+    - fingerprinted files are served with a one year, immutable
+      'Cache-Control' header, since a changed file gets a new name,
+    - the precompressed copy matching the request's 'Accept-Encoding' is
+      sent, so nothing is compressed per request.
+    Without a build, such as in development, the 'asset_urls' template
+    function lists a bundle's separate source files instead, and falls
+    back to the CDN for third-party files that have not been downloaded.
+
+    Dependencies:
+    - json: Reads the manifest.
+    - mimetypes: Finds the content type of precompressed files.
+    - os: Locates the static files.
+    - Flask: Provides the static file view and URL building.
+"""
+import json
+import mimetypes
+import os
+from flask import current_app, request, send_from_directory, url_for
+
+
+# Third-party assets downloaded into 'static/vendor', with their CDN URLs
+VENDOR = {
+    "vendor/materialize.min.css": "https://cdnjs.cloudflare.com/ajax/libs/"
+                                  "materialize/1.0.0/css/materialize.min.css",
+    "vendor/materialize.min.js": "https://cdnjs.cloudflare.com/ajax/libs/"
+                                 "materialize/1.0.0/js/materialize.min.js",
+    "vendor/material-icons.css": "https://fonts.googleapis.com/icon?"
+                                 "family=Material+Icons",
+}
+
+# Bundles built from several static files, in the order they are joined
+BUNDLES = {
+    "css/app.css": ["vendor/materialize.min.css",
+                    "vendor/material-icons.css", "css/style.css"],
+    "js/app.js": ["vendor/materialize.min.js", "js/script.js"],
+}
+
+# Directory under the static folder holding the built files
+DIST_DIR = "dist"
+
+# Precompressed copies, in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# Fingerprinted files never change, so they may be cached for a year
+MAX_AGE = 365 * 24 * 60 * 60
+
+
+def init_app(app):
+    """
+    Serve the built static files of an application, if they exist.
+
+    Args:
+        app (Flask): The application being configured.
+
+    Description:
+        The manifest is read once, when the application starts, so
+        rebuilding the assets needs a restart. The 'static' endpoint is
+        replaced by 'serve_static', and 'asset_urls' is made available to
+        templates.
+    """
+    path = os.path.join(app.static_folder, DIST_DIR, "manifest.json")
+    manifest = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+    app.extensions["asset_manifest"] = manifest
+
+    app.url_defaults(_fingerprint)
+    app.view_functions["static"] = serve_static
+    app.add_template_global(asset_urls)
+
+
+def _fingerprint(endpoint, values):
+    """
+    Point static URLs at the fingerprinted copy of the file.
+    """
+    if endpoint != "static":
+        return
+    hashed = current_app.extensions["asset_manifest"].get(
+        values.get("filename"))
+    if hashed:
+        values["filename"] = f"{DIST_DIR}/{hashed}"
+
+
+def asset_urls(bundle):
+    """
+    Return the URLs to load for a bundle, in order.
+
+    Args:
+        bundle (str): A key of 'BUNDLES', such as 'css/app.css'.
+
+    Returns:
+        list: The URL of the built bundle, or, before the assets are
+        built, the URLs of its source files.
+    """
+    if bundle in current_app.extensions["asset_manifest"]:
+        return [url_for("static", filename=bundle)]
+
+    urls = []
+    for source in BUNDLES[bundle]:
+        if (source in VENDOR and not os.path.exists(
+                os.path.join(current_app.static_folder, source))):
+            urls.append(VENDOR[source])
+        else:
+            urls.append(url_for("static", filename=source))
+    return urls
+
+
+def serve_static(filename):
+    """
+    Send a static file, precompressed and cached for built files.
+
+    Args:
+        filename (str): The path of the file under the static folder.
+
+    Returns:
+        Response: The file.
+    """
+    if not filename.startswith(DIST_DIR + "/"):
+        return current_app.send_static_file(filename)
+
+    folder = current_app.static_folder
+    accepted = request.accept_encodings
+    response = None
+    for encoding, extension in ENCODINGS:
+        if (accepted[encoding] > 0
+                and os.path.exists(os.path.join(folder,
+                                                filename + extension))):
+            # The type is that of the original file, not of the archive
+            response = send_from_directory(
+                folder, filename + extension, max_age=MAX_AGE,
+                mimetype=mimetypes.guess_type(filename)[0])
+            response.headers["Content-Encoding"] = encoding
+            break
+    if response is None:
+        response = send_from_directory(folder, filename, max_age=MAX_AGE)
+
+    response.vary.add("Accept-Encoding")
+    response.cache_control.immutable = True
+    return response
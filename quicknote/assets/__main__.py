@@ -0,0 +1,46 @@
+"""
+QuickNote Static Assets Command Line
+
+Description:
+    This module is the entry point of 'python -m quicknote.assets'.
+
+    'python -m quicknote.assets vendor' downloads the third-party assets
+    into 'quicknote/static/vendor', skipping files already there unless
+    '--refresh' is given.
+
+    'python -m quicknote.assets build' downloads any missing vendor files,
+    then writes the bundled, minified and fingerprinted static files and
+    their manifest to 'quicknote/static/dist'. It runs on every Heroku
+    deploy from 'bin/post_compile'.
+
+    Dependencies:
+    - argparse: Parses the command line.
+    - quicknote.assets.build: Downloads and builds the assets.
+"""
+import argparse
+from quicknote.assets import build
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quicknote.assets")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    vendor_parser = commands.add_parser(
+        "vendor", help="download the third-party assets")
+    vendor_parser.add_argument(
+        "--refresh", action="store_true",
+        help="download files that were already downloaded again")
+    commands.add_parser("build", help="build the fingerprinted assets")
+
+    args = parser.parse_args(argv)
+    if args.command == "vendor":
+        for path in build.vendor(refresh=args.refresh):
+            print(f"Downloaded {path}")
+    else:
+        manifest = build.build()
+        for path, hashed in sorted(manifest.items()):
+            print(f"{path} -> {hashed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+QuickNote Static Assets Build Module
+
+Description:
+    This module builds the static files served by 'quicknote.assets'.
+    'vendor' downloads the third-party files in 'VENDOR' into
+    'static/vendor'. Stylesheets are scanned for the fonts and images they
+    load from other hosts, which are downloaded next to them, and their
+    references are rewritten to the local copies. The vendor directory is
+    not committed, so every build downloads it from cdnjs and Google
+    Fonts, and a deploy fails while either of them is unreachable.
+    'build' downloads any missing vendor files, then writes the contents of
+    'static/dist':
+    - every static file, and every bundle joined from the files listed in
+      'BUNDLES', copied under a name with the first characters of its
+      SHA-256 hash, such as 'css/app.1a2b3c4d5e.css',
+    - stylesheets and scripts minified, with the 'url(...)' references in
+      stylesheets pointing at the fingerprinted files,
+    - '.gz' and '.br' copies of text files, compressed at the highest
+      levels since this happens once per deploy,
+    - 'manifest.json', mapping each original path to its fingerprinted one.
+    Files are fingerprinted in dependency order, fonts and images before
+    the stylesheets that refer to them, so a changed font also changes the
+    name of every stylesheet that loads it.
+
+    Dependencies:
+    - gzip, hashlib, json, os, posixpath, re, shutil, urllib: Build and
+      write the files.
+    - brotli (optional): Writes the '.br' copies.
+    - rcssmin, rjsmin: Minify stylesheets and scripts.
+    - quicknote.assets: Lists the vendor files and bundles.
+"""
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import urllib.parse
+import urllib.request
+import rcssmin
+import rjsmin
+from quicknote.assets import BUNDLES, DIST_DIR, VENDOR
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                          "static")
+
+# Characters of the content hash kept in file names
+HASH_LENGTH = 10
+
+# Files worth storing precompressed
+TEXT_EXTENSIONS = {".css", ".js", ".json", ".svg", ".txt", ".map"}
+
+# Google Fonts chooses the font format from the browser; this asks for
+# woff2, which every browser QuickNote supports can load
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/120.0 Safari/537.36")
+
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+def _download(url):
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+def _localize_css(css, directory):
+    """
+    Download the files a stylesheet loads from other hosts.
+
+    Args:
+        css (str): The stylesheet.
+        directory (str): Where the stylesheet and its files are saved.
+
+    Returns:
+        str: The stylesheet, referring to the downloaded files.
+    """
+    def replace(match):
+        url = match.group(2)
+        if not url.startswith(("http://", "https://")):
+            return match.group(0)
+        name = posixpath.basename(urllib.parse.urlparse(url).path)
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            with open(path, "wb") as asset_file:
+                asset_file.write(_download(url))
+        return f'url("{name}")'
+
+    return CSS_URL.sub(replace, css)
+
+
+def vendor(refresh=False):
+    """
+    Download the third-party assets into the static folder.
+
+    Args:
+        refresh (bool): Download files again even if they exist.
+
+    Returns:
+        list: The paths downloaded, relative to the static folder.
+    """
+    downloaded = []
+    for path, url in VENDOR.items():
+        target = os.path.join(STATIC_DIR, path)
+        if os.path.exists(target) and not refresh:
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        data = _download(url)
+        if path.endswith(".css"):
+            data = _localize_css(data.decode("utf-8"),
+                                 os.path.dirname(target)).encode("utf-8")
+        with open(target, "wb") as vendor_file:
+            vendor_file.write(data)
+        downloaded.append(path)
+    return downloaded
+
+
+def _sources():
+    """
+    List the static files to fingerprint, relative to the static folder.
+    """
+    sources = []
+    for root, dirs, files in os.walk(STATIC_DIR):
+        relative = os.path.relpath(root, STATIC_DIR).replace(os.sep, "/")
+        if relative == DIST_DIR:
+            dirs[:] = []
+            continue
+        for name in files:
+            sources.append(posixpath.normpath(posixpath.join(relative, name)))
+    return sorted(sources)
+
+
+def _read(path):
+    with open(os.path.join(STATIC_DIR, path), "rb") as source_file:
+        return source_file.read()
+
+
+def _rewrite_urls(css, source, output, manifest):
+    """
+    Point a stylesheet's relative references at fingerprinted files.
+
+    Args:
+        css (str): The stylesheet.
+        source (str): Where the stylesheet's references are relative to.
+        output (str): Where the rewritten stylesheet will be.
+        manifest (dict): The fingerprinted files found so far.
+    """
+    def replace(match):
+        url = match.group(2)
+        if url.startswith(("data:", "http://", "https://", "/", "#")):
+            return match.group(0)
+        path, _, suffix = url.partition("?")
+        target = posixpath.normpath(
+            posixpath.join(posixpath.dirname(source), path))
+        if target not in manifest:
+            return match.group(0)
+        relative = posixpath.relpath(manifest[target],
+                                     posixpath.dirname(output))
+        return f'url("{relative}")'
+
+    return CSS_URL.sub(replace, css)
+
+
+def _minify(path, data):
+    if path.endswith(".css"):
+        return rcssmin.cssmin(data.decode("utf-8")).encode("utf-8")
+    if path.endswith(".js"):
+        return rjsmin.jsmin(data.decode("utf-8")).encode("utf-8")
+    return data
+
+
+def _write(path, data, manifest):
+    """
+    Write a file under its fingerprinted name, with compressed copies.
+    """
+    stem, extension = posixpath.splitext(path)
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    hashed = f"{stem}.{digest}{extension}"
+    target = os.path.join(STATIC_DIR, DIST_DIR, hashed)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+
+    with open(target, "wb") as output_file:
+        output_file.write(data)
+    if extension in TEXT_EXTENSIONS:
+        compressed = gzip.compress(data, 9, mtime=0)
+        if len(compressed) < len(data):
+            with open(target + ".gz", "wb") as output_file:
+                output_file.write(compressed)
+        if brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+            if len(compressed) < len(data):
+                with open(target + ".br", "wb") as output_file:
+                    output_file.write(compressed)
+
+    manifest[path] = hashed
+
+
+def build():
+    """
+    Build the fingerprinted static files and their manifest.
+
+    Description:
+        The previous build is removed first. Stylesheets are written last,
+        and bundles after the single files, so the files they refer to
+        already have their fingerprinted names.
+
+    Returns:
+        dict: The manifest.
+    """
+    vendor()
+    dist = os.path.join(STATIC_DIR, DIST_DIR)
+    shutil.rmtree(dist, ignore_errors=True)
+
+    manifest = {}
+    sources = _sources()
+    for path in sorted(sources, key=lambda path: path.endswith(".css")):
+        data = _read(path)
+        if path.endswith(".css"):
+            data = _rewrite_urls(data.decode("utf-8"), path, path,
+                                 manifest).encode("utf-8")
+        _write(path, _minify(path, data), manifest)
+
+    for bundle, parts in BUNDLES.items():
+        pieces = []
+        for part in parts:
+            text = _read(part).decode("utf-8")
+            if bundle.endswith(".css"):
+                text = _rewrite_urls(text, part, bundle, manifest)
+            pieces.append(text)
+        # Scripts are joined with ';' in case one lacks a final semicolon
+        separator = "\n" if bundle.endswith(".css") else ";\n"
+        _write(bundle, _minify(bundle, separator.join(pieces).encode(
+            "utf-8")), manifest)
+
+    with open(os.path.join(dist, "manifest.json"), "w",
+              encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+    return manifest
@@ -0,0 +1,183 @@
+"""
+QuickNote Cache Module
+
+Description:
+    This module provides the caching building blocks used by the QuickNote
+    application.
+    'TTLCache' is a thread-safe, process-local LRU cache whose entries
+    expire after a time-to-live. 'TieredCache' puts a 'TTLCache' in front
+    of an optional shared backend, so several worker processes can share
+    cached values while still answering most lookups from local memory.
+    Shared backends are plain objects with 'get', 'set' and 'delete'
+    methods that store strings; 'MemoryBackend' is a local stand-in with
+    that interface, and other backends (for example one wrapping Redis)
+    are selected with the 'CACHE_BACKEND' setting.
+
+    Dependencies:
+    - json: Serializes values stored in shared backends.
+    - threading: Guards the cache state shared between request threads.
+    - time: Provides the monotonic clock used for expiry.
+    - collections.OrderedDict: Keeps entries in least recently used order.
+    - werkzeug.utils.import_string: Loads the configured backend class.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from werkzeug.utils import import_string
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded LRU cache with per-entry expiry.
+
+    Attributes:
+        maxsize (int): The maximum number of entries kept.
+        ttl (float): The default number of seconds an entry stays valid.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Return the cached value for 'key', or 'default' if it is missing
+        or has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Store 'value' under 'key', evicting the least recently used entry
+        when the cache is full.
+        """
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """
+        Remove 'key' from the cache if it is present.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Remove every entry from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class MemoryBackend:
+    """
+    In-process stand-in for a shared cache backend.
+
+    Description:
+        This backend keeps string values in a 'TTLCache' and offers the
+        same 'get', 'set' and 'delete' interface as a networked backend.
+        It is used in development and tests, where a single process can
+        stand in for the shared store.
+    """
+
+    def __init__(self, maxsize=100000):
+        self._store = TTLCache(maxsize=maxsize)
+
+    def get(self, key):
+        return self._store.get(key)
+
+    def set(self, key, value, ttl):
+        self._store.set(key, value, ttl)
+
+    def delete(self, key):
+        self._store.delete(key)
+
+
+def load_backend(path):
+    """
+    Create the shared backend named by an import path.
+
+    Args:
+        path (str): An import path such as 'quicknote.cache:MemoryBackend',
+        or an empty value for no shared backend.
+
+    Returns:
+        The backend instance, or None.
+    """
+    if not path:
+        return None
+    return import_string(path.replace(":", "."))()
+
+
+class TieredCache:
+    """
+    Process-local cache backed by an optional shared backend.
+
+    Attributes:
+        local (TTLCache): The in-process tier, checked first.
+        backend: The shared tier, or None.
+        ttl (float): The number of seconds values live in the shared tier.
+        prefix (str): Namespaces keys in the shared tier.
+
+    Description:
+        Reads check the local tier first and fall back to the shared
+        backend, copying hits into the local tier. Writes and deletes go
+        to both tiers. Local entries should use a short time-to-live,
+        since deletes in one process cannot reach the local tier of
+        another.
+    """
+
+    def __init__(self, prefix, maxsize=1024, ttl=300, local_ttl=30,
+                 backend=None):
+        self.local = TTLCache(maxsize=maxsize, ttl=min(ttl, local_ttl))
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        """
+        Return the cached value for 'key', or None on a miss.
+        """
+        value = self.local.get(key)
+        if value is None and self.backend is not None:
+            raw = self.backend.get(self.prefix + str(key))
+            if raw is not None:
+                value = json.loads(raw)
+                self.local.set(key, value)
+        return value
+
+    def set(self, key, value):
+        """
+        Store a JSON serializable value in both tiers.
+        """
+        self.local.set(key, value)
+        if self.backend is not None:
+            self.backend.set(self.prefix + str(key), json.dumps(value),
+                             self.ttl)
+
+    def delete(self, key):
+        """
+        Remove 'key' from both tiers.
+        """
+        self.local.delete(key)
+        if self.backend is not None:
+            self.backend.delete(self.prefix + str(key))
@@ -0,0 +1,213 @@
+"""
+QuickNote Compressed Text Module
+
+Description:
+    This module stores long note contents compressed, so they take less
+    space in the note table and in the database's buffer cache.
+    'CompressedText' is a column type holding text in a binary column.
+    Every stored value starts with a marker byte saying how the rest is
+    encoded:
+    - 0x00: the UTF-8 text itself, used for short values and for text
+      that does not get smaller when compressed,
+    - 0x01: the UTF-8 text compressed with zlib.
+    Values of at least 'CONTENT_COMPRESS_MIN_SIZE' bytes are compressed at
+    level 'CONTENT_COMPRESS_LEVEL' when 'CONTENT_COMPRESSION' is on. The
+    marker makes every value readable whatever the settings were when it
+    was written.
+    'Note.note_content' is deferred, so a note's content is only fetched
+    and decompressed when it is used; list pages never load it.
+    Contents stored before compression was turned on, including every
+    content converted by the migration that made the column binary, are
+    compressed in batches with 'python -m quicknote.compressed backfill',
+    and 'python -m quicknote.compressed stats' reports the space saved.
+
+    Dependencies:
+    - argparse: Parses the command line.
+    - zlib: Compresses the text.
+    - Flask: Provides the application settings.
+    - sqlalchemy: Provides the column type and statements.
+"""
+import argparse
+import zlib
+from flask import current_app, has_app_context
+from sqlalchemy import LargeBinary, func, select, type_coerce, update
+from sqlalchemy.types import TypeDecorator
+
+
+# Marker bytes at the start of every stored value
+RAW = b"\x00"
+ZLIB = b"\x01"
+
+# Settings used outside an application context
+DEFAULT_MIN_SIZE = 256
+DEFAULT_LEVEL = 6
+
+
+def _settings():
+    """
+    Return whether to compress, the size threshold and the level.
+    """
+    if not has_app_context():
+        return True, DEFAULT_MIN_SIZE, DEFAULT_LEVEL
+    config = current_app.config
+    return (config["CONTENT_COMPRESSION"],
+            config["CONTENT_COMPRESS_MIN_SIZE"],
+            config["CONTENT_COMPRESS_LEVEL"])
+
+
+def encode(text):
+    """
+    Encode text for storage, compressing it when that saves space.
+
+    Args:
+        text (str): The text to store.
+
+    Returns:
+        bytes: The marker byte followed by the encoded text.
+    """
+    data = text.encode("utf-8")
+    enabled, min_size, level = _settings()
+    if enabled and len(data) >= min_size:
+        compressed = zlib.compress(data, level)
+        if len(compressed) < len(data):
+            return ZLIB + compressed
+    return RAW + data
+
+
+def decode(value):
+    """
+    Decode a stored value back to text.
+
+    Args:
+        value (bytes): The stored value.
+
+    Returns:
+        str: The text.
+    """
+    marker, data = value[:1], value[1:]
+    if marker == ZLIB:
+        data = zlib.decompress(data)
+    elif marker != RAW:
+        raise ValueError(f"Unknown compressed text marker {marker!r}")
+    return data.decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text column stored as binary, compressed above a size threshold.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else encode(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else decode(value)
+
+
+def _stored(column):
+    """
+    Select a column's stored bytes, without decoding them.
+    """
+    return type_coerce(column, LargeBinary)
+
+
+def backfill(connection, table, column_name, batch_size=1000):
+    """
+    Store every value of a column as the current settings would.
+
+    Args:
+        connection: The database connection to use, outside of a
+        transaction. Each batch is committed on its own.
+        table (Table): The table holding the column.
+        column_name (str): The 'CompressedText' column.
+        batch_size (int): The rows read per batch.
+
+    Description:
+        Rows are walked in primary key order, so each batch reads one
+        range of the table and a backfill can be stopped and run again.
+        Values written before compression was turned on, or with other
+        settings, are rewritten with plain UPDATE statements, as their
+        text does not change; no change feed entries or revisions are
+        made.
+
+    Returns:
+        int: The number of rows rewritten.
+    """
+    column = table.c[column_name]
+    key = table.c.id
+    last_id = 0
+    rewritten = 0
+    while True:
+        with connection.begin():
+            rows = connection.execute(
+                select(key, _stored(column)).where(
+                    key > last_id, column.isnot(None)
+                ).order_by(key).limit(batch_size)).all()
+            for row_id, stored in rows:
+                text = decode(stored)
+                if encode(text) != stored:
+                    connection.execute(
+                        update(table).where(key == row_id).values(
+                            {column_name: text}))
+                    rewritten += 1
+        if not rows:
+            return rewritten
+        last_id = rows[-1][0]
+
+
+def stats(connection, table, column_name):
+    """
+    Measure how much space a 'CompressedText' column saves.
+
+    Returns:
+        dict: The number of 'rows' and of 'compressed' rows, and the
+        'text_bytes' the values would take uncompressed against the
+        'stored_bytes' they take.
+    """
+    column = table.c[column_name]
+    stored = _stored(column)
+    rows, compressed, stored_bytes = connection.execute(select(
+        func.count(column),
+        func.count(column).filter(func.substr(stored, 1, 1) == ZLIB),
+        func.coalesce(func.sum(func.length(stored)), 0))).one()
+
+    text_bytes = 0
+    for value, in connection.execute(
+            select(stored).where(column.isnot(None))):
+        text_bytes += len(decode(value).encode("utf-8")) + 1
+    return {"rows": rows, "compressed": compressed,
+            "text_bytes": text_bytes, "stored_bytes": stored_bytes}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quicknote.compressed")
+    commands = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = commands.add_parser(
+        "backfill", help="compress note contents stored uncompressed")
+    backfill_parser.add_argument("--batch-size", type=int, default=1000,
+                                 help="rows per transaction (default 1000)")
+    commands.add_parser("stats", help="report the space saved")
+    args = parser.parse_args(argv)
+
+    from quicknote import create_app, db
+    from quicknote.models import Note
+
+    app = create_app()
+    with app.app_context(), db.engine.connect() as connection:
+        if args.command == "backfill":
+            count = backfill(connection, Note.__table__, "note_content",
+                             args.batch_size)
+            print(f"Rewrote {count} notes")
+        else:
+            result = stats(connection, Note.__table__, "note_content")
+            saved = result["text_bytes"] - result["stored_bytes"]
+            print(f"{result['compressed']} of {result['rows']} notes "
+                  f"compressed, {result['stored_bytes']} bytes stored for "
+                  f"{result['text_bytes']} bytes of text "
+                  f"({saved} bytes saved)")
+
+
+if __name__ == "__main__":
+    main()
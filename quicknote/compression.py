@@ -0,0 +1,169 @@
+"""
+QuickNote Compression Module
+
+Description:
+    This module compresses responses for clients that accept it, which
+    shrinks HTML pages, JSON and text exports several times over.
+    The encoding is negotiated from the request's 'Accept-Encoding'
+    header: brotli is preferred when the optional 'brotli' package is
+    installed, then gzip. Only text-like content types are compressed;
+    images, zip archives and other already compressed formats are sent
+    as they are.
+    Buffered responses are compressed in one go when they are at least
+    'COMPRESS_MIN_SIZE' bytes long, since compressing small bodies costs
+    more time than it saves. Streamed responses, whose size is not known
+    in advance, are compressed chunk by chunk, and each chunk is flushed
+    so the client receives it straight away.
+    Responses that already have a 'Content-Encoding', and file responses
+    sent with 'direct_passthrough', are left alone.
+
+    Dependencies:
+    - gzip, zlib: Compress responses with gzip.
+    - brotli (optional): Compresses responses with brotli.
+    - Flask: Provides the current request and settings.
+"""
+import gzip
+import zlib
+from flask import current_app, request
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Content types worth compressing, besides every 'text/*' type
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+    "application/xml",
+    "image/svg+xml",
+}
+
+# Response statuses that never have a body
+NO_BODY_STATUSES = {204, 304}
+
+
+def init_app(app):
+    """
+    Compress the application's responses if 'COMPRESSION' is enabled.
+
+    Args:
+        app (Flask): The application being configured.
+    """
+    if app.config.get("COMPRESSION", True):
+        app.after_request(compress_response)
+
+
+def _encoding():
+    """
+    Choose the encoding for the current request, or None.
+    """
+    accepted = request.accept_encodings
+    choices = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best = max(choices, key=lambda encoding: accepted[encoding])
+    return best if accepted[best] > 0 else None
+
+
+def _compressible(response):
+    mimetype = response.mimetype or ""
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES
+
+
+def _level(encoding):
+    """
+    Return the configured compression level for an encoding.
+    """
+    if encoding == "br":
+        return current_app.config["BROTLI_QUALITY"]
+    return current_app.config["COMPRESS_LEVEL"]
+
+
+def _compress(data, encoding, level):
+    """
+    Compress a whole response body.
+    """
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, level)
+
+
+def _compress_stream(chunks, encoding, level, close):
+    """
+    Compress a streamed response body one chunk at a time.
+
+    Args:
+        chunks: The encoded chunks of the response.
+        encoding (str): 'br' or 'gzip'.
+        level (int): The brotli quality or gzip compression level.
+        close (callable): Closes the original response body, such as a
+        database cursor held by an export, even if the client disconnects.
+
+    Description:
+        The body is sent after the request has been handled, so nothing
+        here may rely on the application context.
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=level)
+
+        def compress(chunk):
+            return compressor.process(chunk) + compressor.flush()
+
+        finish = compressor.finish
+    else:
+        # wbits=31 writes a gzip header and trailer around the stream
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+        def compress(chunk):
+            return (compressor.compress(chunk)
+                    + compressor.flush(zlib.Z_SYNC_FLUSH))
+
+        finish = compressor.flush
+
+    try:
+        for chunk in chunks:
+            if chunk:
+                yield compress(chunk)
+        yield finish()
+    finally:
+        close()
+
+
+def compress_response(response):
+    """
+    Compress a response if the client accepts a supported encoding.
+
+    Args:
+        response (Response): The response about to be sent.
+
+    Returns:
+        Response: The same response, compressed if it was worth it.
+    """
+    if (response.status_code < 200
+            or response.status_code in NO_BODY_STATUSES
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or not _compressible(response)):
+        return response
+
+    # The response depends on 'Accept-Encoding' whether or not it is
+    # compressed this time
+    response.vary.add("Accept-Encoding")
+    encoding = _encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        body = response.response
+        response.response = _compress_stream(
+            response.iter_encoded(), encoding, _level(encoding),
+            getattr(body, "close", lambda: None))
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < current_app.config["COMPRESS_MIN_SIZE"]:
+            return response
+        response.set_data(_compress(data, encoding, _level(encoding)))
+
+    response.headers["Content-Encoding"] = encoding
+    return response
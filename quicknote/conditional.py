@@ -0,0 +1,107 @@
+"""
+QuickNote Conditional Request Module
+
+Description:
+    This module lets pages that only show the authenticated user's notes
+    answer repeat visits with '304 Not Modified', so the browser reuses
+    its copy instead of the page being queried and rendered again.
+    A page's validators are built from the user's note version (see
+    'quicknote.sync.notes_version'), which changes whenever any of their
+    notes are created, edited or deleted. Checking them costs one primary
+    key lookup on the user table.
+    The ETag also covers the user's name shown on the pages, the requested
+    URL and the 'RELEASE_VERSION' setting, so a deploy with new templates
+    does not serve stale pages. ETags are weak because the same page may
+    be sent compressed or not.
+    Pages are validated by ETag only. No 'Last-Modified' date is sent, as
+    a date could not cover a rename or a deploy, and a request with only
+    'If-Modified-Since' is always answered with the full page.
+    Pages with pending flash messages are never validated or cached, as
+    the messages are only shown once.
+
+    Dependencies:
+    - hashlib: Builds ETags from the page's validators.
+    - functools.wraps: Preserves view metadata in the decorator.
+    - Flask: Provides the request, session, responses and request
+      globals.
+    - Flask-Login: Provides the authenticated user.
+    - werkzeug.http: Evaluates the request's conditional headers.
+    - quicknote.sync: Provides the version of the user's notes.
+"""
+import hashlib
+from functools import wraps
+from flask import current_app, g, make_response, request, session
+from flask_login import current_user
+from werkzeug.http import is_resource_modified
+from quicknote.sync import notes_version
+
+
+def _etag(note_seq):
+    """
+    Build the ETag of the requested page for the current note version.
+    """
+    parts = (current_user.id, note_seq, current_user.first_name,
+             current_user.last_name, request.full_path,
+             current_app.config["RELEASE_VERSION"])
+    return hashlib.sha1(
+        "\x1f".join(str(part) for part in parts).encode()).hexdigest()[:20]
+
+
+def applies():
+    """
+    Return whether the current request may be validated.
+    """
+    return request.method in ("GET", "HEAD") and "_flashes" not in session
+
+
+def not_modified(note_seq):
+    """
+    Return an empty 304 response if the request's ETag matches the
+    current note version, or None if the page must be rendered.
+    """
+    if is_resource_modified(request.environ, etag=_etag(note_seq)):
+        return None
+    return current_app.response_class(status=304)
+
+
+def set_validators(response, note_seq):
+    """
+    Add the ETag and caching headers for a note version to a page.
+    """
+    response.set_etag(_etag(note_seq), weak=True)
+    # Browsers may keep the page but must check it is still current
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add("Cookie")
+
+
+def conditional(view):
+    """
+    Answer conditional GET requests for a page of the user's notes.
+
+    Description:
+        Must be applied below 'login_required' and 'read_only'. When the
+        request's 'If-None-Match' header matches, an empty 304 response is
+        returned without calling the view. Otherwise the view's response
+        gets 'ETag' and 'Cache-Control' headers.
+        The async views in 'quicknote.routes.async_views' read the note
+        version themselves and use 'applies', 'not_modified' and
+        'set_validators' directly.
+    """
+    @wraps(view)
+    def decorated_view(*args, **kwargs):
+        if not applies():
+            return view(*args, **kwargs)
+
+        note_seq, changed_at = notes_version(current_user.id)
+        # Kept for the fragment cache, which keys on the same version
+        g.notes_version = (note_seq, changed_at)
+
+        response = not_modified(note_seq)
+        if response is None:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        set_validators(response, note_seq)
+        return response
+    return decorated_view
@@ -0,0 +1,137 @@
+"""
+QuickNote Configuration Module
+
+Description:
+    This module reads the QuickNote settings from environment variables.
+    'from_env' returns a plain dictionary, which 'create_app' loads into the
+    application config before applying any overrides passed to it, so tests
+    and benchmarks can build apps without touching the environment.
+    A missing database URL is not an error here; it only matters once the
+    database is first used.
+
+    Dependencies:
+    - os: Provides access to the operating system environment.
+"""
+import os
+
+
+def database_url(environ):
+    """
+    Work out the database URL from the environment.
+
+    Args:
+        environ (dict): The environment variables to read.
+
+    Description:
+        In development mode ('DEVELOPMENT=True') the 'DB_URL' variable is
+        used. Otherwise 'DATABASE_URL' is used, with Heroku's 'postgres://'
+        scheme rewritten to the 'postgresql://' scheme SQLAlchemy expects.
+        Read replicas are listed separately in 'DATABASE_REPLICA_URLS'.
+
+    Returns:
+        str: The database URL, or None if it is not set.
+    """
+    if environ.get("DEVELOPMENT") == "True":
+        return environ.get("DB_URL")
+
+    return _normalize_url(environ.get("DATABASE_URL"))
+
+
+def _normalize_url(uri):
+    """
+    Rewrite Heroku's 'postgres://' scheme to the 'postgresql://' scheme
+    SQLAlchemy expects.
+    """
+    if uri and uri.startswith("postgres://"):
+        uri = uri.replace("postgres://", "postgresql://", 1)
+    return uri
+
+
+def from_env(environ=None):
+    """
+    Build the application settings from environment variables.
+
+    Args:
+        environ (dict, optional): The environment variables to read.
+        Defaults to 'os.environ'.
+
+    Returns:
+        dict: The application settings.
+    """
+    environ = os.environ if environ is None else environ
+
+    settings = {
+        "SECRET_KEY": environ.get("SECRET_KEY"),
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        "NOTES_PAGE_SIZE": int(environ.get("NOTES_PAGE_SIZE", 50)),
+        "ACCOUNT_DELETE_BACKGROUND_THRESHOLD": int(
+            environ.get("ACCOUNT_DELETE_BACKGROUND_THRESHOLD", 10000)),
+        "ACCOUNT_DELETE_CHUNK_SIZE": int(
+            environ.get("ACCOUNT_DELETE_CHUNK_SIZE", 1000)),
+        "JOB_WORKER_THREADS": int(environ.get("JOB_WORKER_THREADS", 4)),
+        "JOB_POLL_INTERVAL": float(environ.get("JOB_POLL_INTERVAL", 1)),
+        "JOB_MAX_ATTEMPTS": int(environ.get("JOB_MAX_ATTEMPTS", 5)),
+        "JOB_RETRY_BASE": float(environ.get("JOB_RETRY_BASE", 10)),
+        "JOB_RETRY_MAX": float(environ.get("JOB_RETRY_MAX", 3600)),
+        "JOB_LOCK_TIMEOUT": float(environ.get("JOB_LOCK_TIMEOUT", 300)),
+        "JOB_RETENTION_DAYS": int(environ.get("JOB_RETENTION_DAYS", 7)),
+        "API_MAX_BATCH": int(environ.get("API_MAX_BATCH", 10000)),
+        "CACHE_BACKEND": environ.get("CACHE_BACKEND"),
+        "USER_CACHE_TTL": int(environ.get("USER_CACHE_TTL", 300)),
+        "USER_CACHE_LOCAL_TTL": int(environ.get("USER_CACHE_LOCAL_TTL", 30)),
+        "FRAGMENT_CACHE": environ.get("FRAGMENT_CACHE", "True") == "True",
+        "FRAGMENT_CACHE_SIZE": int(environ.get("FRAGMENT_CACHE_SIZE", 10000)),
+        "FRAGMENT_CACHE_TTL": int(environ.get("FRAGMENT_CACHE_TTL", 3600)),
+        "FRAGMENT_CACHE_LOCAL_TTL": int(
+            environ.get("FRAGMENT_CACHE_LOCAL_TTL", 300)),
+        "METRICS_TOKEN": environ.get("METRICS_TOKEN"),
+        "DATABASE_REPLICA_URLS": [
+            _normalize_url(url.strip()) for url in
+            environ.get("DATABASE_REPLICA_URLS", "").split(",")
+            if url.strip()],
+        "REPLICA_STICKY_SECONDS": float(
+            environ.get("REPLICA_STICKY_SECONDS", 5)),
+        "INSTRUMENTATION": environ.get("INSTRUMENTATION") == "True",
+        "N_PLUS_ONE_THRESHOLD": int(environ.get("N_PLUS_ONE_THRESHOLD", 10)),
+        "PROFILE_SAMPLE_RATE": float(environ.get("PROFILE_SAMPLE_RATE", 0)),
+        "PROFILE_DIR": environ.get("PROFILE_DIR", "profiles"),
+        "PROFILER": environ.get("PROFILER", "cprofile"),
+        "EXPORT_BATCH_SIZE": int(environ.get("EXPORT_BATCH_SIZE", 1000)),
+        "IMPORT_BATCH_SIZE": int(environ.get("IMPORT_BATCH_SIZE", 1000)),
+        "SYNC_BATCH_SIZE": int(environ.get("SYNC_BATCH_SIZE", 500)),
+        "CONTENT_COMPRESSION": environ.get(
+            "CONTENT_COMPRESSION", "True") == "True",
+        "CONTENT_COMPRESS_MIN_SIZE": int(
+            environ.get("CONTENT_COMPRESS_MIN_SIZE", 256)),
+        "CONTENT_COMPRESS_LEVEL": int(
+            environ.get("CONTENT_COMPRESS_LEVEL", 6)),
+        "REVISION_SNAPSHOT_INTERVAL": int(
+            environ.get("REVISION_SNAPSHOT_INTERVAL", 10)),
+        "RELEASE_VERSION": environ.get(
+            "RELEASE_VERSION", environ.get("HEROKU_SLUG_COMMIT", "")),
+        "PASSWORD_HASH_METHOD": environ.get(
+            "PASSWORD_HASH_METHOD", "scrypt"),
+        "PASSWORD_SCRYPT_N": int(environ.get("PASSWORD_SCRYPT_N", 32768)),
+        "PASSWORD_SCRYPT_R": int(environ.get("PASSWORD_SCRYPT_R", 8)),
+        "PASSWORD_SCRYPT_P": int(environ.get("PASSWORD_SCRYPT_P", 1)),
+        "PASSWORD_PBKDF2_ITERATIONS": int(
+            environ.get("PASSWORD_PBKDF2_ITERATIONS", 600000)),
+        "PASSWORD_HASH_WORKERS": int(
+            environ.get("PASSWORD_HASH_WORKERS", 2)),
+        "PASSWORD_HASH_CONCURRENCY": int(
+            environ.get("PASSWORD_HASH_CONCURRENCY", 3)),
+        "PASSWORD_HASH_TIMEOUT": float(
+            environ.get("PASSWORD_HASH_TIMEOUT", 0.5)),
+        "COMPRESSION": environ.get("COMPRESSION", "True") == "True",
+        "COMPRESS_MIN_SIZE": int(environ.get("COMPRESS_MIN_SIZE", 500)),
+        "COMPRESS_LEVEL": int(environ.get("COMPRESS_LEVEL", 6)),
+        "BROTLI_QUALITY": int(environ.get("BROTLI_QUALITY", 4)),
+        "STREAM_CHUNK_SIZE": int(environ.get("STREAM_CHUNK_SIZE", 1024)),
+        "STARTUP_BUDGET_MS": float(environ.get("STARTUP_BUDGET_MS", 500)),
+    }
+
+    uri = database_url(environ)
+    if uri:
+        settings["SQLALCHEMY_DATABASE_URI"] = uri
+
+    return settings
@@ -0,0 +1,254 @@
+"""
+QuickNote Fragment Cache Module
+
+Description:
+    This module caches rendered HTML for the notes list, so the Jinja
+    templates for a page of notes are only rendered again once the user's
+    notes change.
+    Two kinds of fragment are cached:
+    - A page of the notes list, keyed by the user, their change sequence
+      ('User.note_seq'), the folder or tag the list is limited to, if
+      any, and the page cursor. It holds the rendered list
+      items and the cursor of the following page, so a hit skips both the
+      notes query and the rendering.
+    - The list item of a single note, keyed by the note and its
+      'Note.change_seq'. These are shared by every list the note appears
+      in, such as search results, and are reused when a page is rendered
+      again after one of its notes changed.
+    Because every write to a user's notes moves their change sequence and
+    the changed notes' 'change_seq' forward, a key never refers to stale
+    HTML, whichever process wrote it. Views that change notes also call
+    'invalidate_notes' after committing, which drops the user's list pages
+    straight away instead of leaving them to expire.
+    Fragments live in a 'TieredCache', with the shared backend named by
+    'CACHE_BACKEND' behind an in-process LRU tier.
+
+    Dependencies:
+    - Flask: Provides the cache belonging to the running app, the request
+      globals and template rendering.
+    - markupsafe: Marks cached HTML as safe to insert into templates.
+    - quicknote.cache: Provides the tiered cache and shared backends.
+    - quicknote.metrics: Counts cache hits and misses and fragment sizes.
+    - quicknote.sync: Reads the version of a user's notes.
+"""
+from flask import current_app, g, render_template
+from markupsafe import Markup
+from quicknote.cache import TieredCache, load_backend
+from quicknote.metrics import registry
+from quicknote.sync import notes_version
+
+
+# Size buckets, in bytes, of the fragment size histogram
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# List pages remembered per user for 'invalidate_notes'
+MAX_INDEXED_PAGES = 50
+
+registry.describe("quicknote_fragment_cache_total",
+                  "Fragment cache lookups by kind and result.")
+registry.describe("quicknote_fragment_cache_bytes",
+                  "Size of the fragments stored in the fragment cache.")
+
+
+def init_app(app):
+    """
+    Create the fragment cache for an application.
+
+    Args:
+        app (Flask): The application being configured.
+
+    Description:
+        The cache size and lifetimes come from the 'FRAGMENT_CACHE_SIZE',
+        'FRAGMENT_CACHE_TTL' and 'FRAGMENT_CACHE_LOCAL_TTL' settings, and
+        'FRAGMENT_CACHE' turns the cache off when false. The shared
+        backend is the one created for the user cache, or a new one if
+        there is none yet.
+        The 'note_fragment' template function renders one note's list
+        item through the cache.
+    """
+    if "cache_backend" not in app.extensions:
+        app.extensions["cache_backend"] = load_backend(
+            app.config.get("CACHE_BACKEND"))
+
+    app.extensions["fragment_cache"] = TieredCache(
+        "fragment:",
+        maxsize=app.config.get("FRAGMENT_CACHE_SIZE", 10000),
+        ttl=app.config.get("FRAGMENT_CACHE_TTL", 3600),
+        local_ttl=app.config.get("FRAGMENT_CACHE_LOCAL_TTL", 300),
+        backend=app.extensions["cache_backend"])
+
+    app.add_template_global(note_fragment)
+
+
+def _enabled():
+    return current_app.config.get("FRAGMENT_CACHE", True)
+
+
+def _store(cache, key, kind, value, html):
+    """
+    Save a fragment and record its size.
+    """
+    cache.set(key, value)
+    registry.observe("quicknote_fragment_cache_bytes",
+                     len(html.encode("utf-8")), buckets=SIZE_BUCKETS,
+                     kind=kind)
+
+
+def _note_seq(user_id):
+    """
+    Return the user's change sequence, read at most once per request.
+
+    Description:
+        The 'conditional' decorator already reads the version of the
+        user's notes for its validators and leaves it in 'g', so pages
+        behind it do not look it up a second time.
+    """
+    if "notes_version" not in g:
+        g.notes_version = notes_version(user_id)
+    return g.notes_version[0]
+
+
+def note_fragment(note):
+    """
+    Render the list item of one note, using the cache when possible.
+
+    Args:
+        note (Note): The note, with at least its id, title, date and
+        'change_seq' loaded.
+
+    Returns:
+        Markup: The rendered 'note_item.html' fragment.
+    """
+    if not _enabled() or note.change_seq is None:
+        return Markup(render_template("note_item.html", note=note))
+
+    cache = current_app.extensions["fragment_cache"]
+    key = f"note:{note.id}:{note.change_seq}"
+
+    html = cache.get(key)
+    if html is not None:
+        registry.inc("quicknote_fragment_cache_total", kind="note",
+                     result="hit")
+        return Markup(html)
+
+    registry.inc("quicknote_fragment_cache_total", kind="note",
+                 result="miss")
+    html = render_template("note_item.html", note=note)
+    _store(cache, key, "note", html, html)
+    return Markup(html)
+
+
+def _page_key(user_id, cursor, scope=""):
+    if scope:
+        return (f"list:{user_id}:{_note_seq(user_id)}:{scope}:"
+                f"{cursor or ''}")
+    return f"list:{user_id}:{_note_seq(user_id)}:{cursor or ''}"
+
+
+def cached_page(user_id, cursor, scope=""):
+    """
+    Return a cached page of a user's notes list, or None on a miss.
+
+    Args:
+        user_id (int): The owner of the notes.
+        cursor (str): The cursor of the previous page, or None.
+        scope (str): Names the folder or tag a filtered list is limited
+        to, see 'quicknote.tags.ListFilter'.
+
+    Returns:
+        tuple: The rendered list items as Markup, and the cursor of the
+        next page.
+    """
+    if not _enabled():
+        return None
+
+    page = current_app.extensions["fragment_cache"].get(
+        _page_key(user_id, cursor, scope))
+    if page is None:
+        registry.inc("quicknote_fragment_cache_total", kind="list",
+                     result="miss")
+        return None
+
+    registry.inc("quicknote_fragment_cache_total", kind="list",
+                 result="hit")
+    return Markup(page["html"]), page["next_cursor"]
+
+
+def store_page(user_id, cursor, notes, next_cursor, scope=""):
+    """
+    Render a page of a user's notes list and cache it.
+
+    Description:
+        The page is rendered from 'note_items.html', whose items come from
+        the per-note cache, and its key is added to the user's page index
+        so 'invalidate_notes' can find it.
+
+    Returns:
+        tuple: The rendered list items as Markup, and 'next_cursor'.
+    """
+    html = render_template("note_items.html", notes=notes)
+    if not _enabled():
+        return Markup(html), next_cursor
+
+    cache = current_app.extensions["fragment_cache"]
+    key = _page_key(user_id, cursor, scope)
+    _store(cache, key, "list", {"html": html, "next_cursor": next_cursor},
+           html)
+
+    # Concurrent misses may lose each other's index entries; the pages
+    # are still versioned, so they only linger until they expire
+    index_key = f"pages:{user_id}"
+    keys = [k for k in (cache.get(index_key) or []) if k != key]
+    cache.set(index_key, (keys + [key])[-MAX_INDEXED_PAGES:])
+
+    return Markup(html), next_cursor
+
+
+def notes_list(user_id, cursor, load_page, scope=""):
+    """
+    Render one page of a user's notes list, using the cache when possible.
+
+    Args:
+        user_id (int): The owner of the notes.
+        cursor (str): The cursor of the previous page, or None for the
+        first page.
+        load_page (callable): Called with 'cursor' on a miss; returns the
+        notes on the page and the cursor of the next page.
+        scope (str): Names the folder or tag a filtered list is limited
+        to, so its pages are cached apart from the full list.
+
+    Description:
+        Async views cannot pass a loader, so they call 'cached_page' and
+        'store_page' themselves, after reading the note version into
+        'g.notes_version'.
+
+    Returns:
+        tuple: The rendered list items as Markup, and the cursor of the
+        next page, which is None on the last page.
+    """
+    page = cached_page(user_id, cursor, scope)
+    if page is None:
+        page = store_page(user_id, cursor, *load_page(cursor), scope=scope)
+    return page
+
+
+def invalidate_notes(user_id):
+    """
+    Drop the cached list pages of a user after their notes changed.
+
+    Args:
+        user_id (int): The owner of the changed notes.
+
+    Description:
+        Must be called after committing. Single note fragments are keyed
+        by 'change_seq', so the old versions of changed notes are never
+        read again and are left to expire.
+    """
+    if not _enabled():
+        return
+
+    cache = current_app.extensions["fragment_cache"]
+    index_key = f"pages:{user_id}"
+    for key in cache.get(index_key) or []:
+        cache.delete(key)
+    cache.delete(index_key)
@@ -0,0 +1,267 @@
+"""
+QuickNote Instrumentation Module
+
+Description:
+    This module measures where the time goes in each request when the
+    'INSTRUMENTATION' setting is enabled.
+    It hooks SQLAlchemy's cursor events to count and time every query,
+    Flask's template signals to time Jinja rendering, and offers the
+    'timed' context manager for other work such as password hashing.
+    At the end of each request it:
+    - adds a 'Server-Timing' header that browser developer tools display,
+    - records per-endpoint timings and query counts in the metrics
+      registry served by '/metrics',
+    - logs a warning when one statement runs many times in a request,
+      which usually means a query is being issued in a loop (N+1),
+    - writes a profile of sampled requests to 'PROFILE_DIR' when
+      'PROFILE_SAMPLE_RATE' is above zero, using pyinstrument if it is
+      installed and 'PROFILER' is 'pyinstrument', or cProfile otherwise.
+    Streamed pages, such as the notes list, render after their headers
+    are sent, so only the work done before streaming starts is measured.
+    With instrumentation disabled none of the hooks are installed.
+
+    Dependencies:
+    - cProfile: Profiles sampled requests.
+    - logging: Reports suspected N+1 query patterns.
+    - os: Builds the paths of profile output files.
+    - random: Selects the requests that are profiled.
+    - time: Measures elapsed time.
+    - collections.Counter: Counts repeated statements.
+    - contextlib.contextmanager: Builds the 'timed' context manager.
+    - Flask: Provides the request globals and template signals.
+    - sqlalchemy: Provides the engine events used to time queries.
+    - quicknote.metrics: The registry the timings are recorded in.
+"""
+import cProfile
+import logging
+import os
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import (before_render_template, current_app, g,
+                   has_request_context, request, template_rendered)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from quicknote.metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+# Buckets for the per-request query count histogram
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+registry.describe("quicknote_request_seconds",
+                  "Time taken to handle requests, by endpoint.")
+registry.describe("quicknote_request_queries",
+                  "Database queries run per request, by endpoint.")
+registry.describe("quicknote_request_query_seconds",
+                  "Time spent in database queries per request, by endpoint.")
+registry.describe("quicknote_request_template_seconds",
+                  "Time spent rendering templates per request, by endpoint.")
+registry.describe("quicknote_n_plus_one_total",
+                  "Requests in which one statement ran repeatedly.")
+
+
+class RequestTimings:
+    """
+    Timings collected while handling one request.
+
+    Attributes:
+        started (float): When the request started.
+        segments (dict): Total seconds spent in each named kind of work.
+        queries (int): The number of queries run.
+        statements (Counter): How often each SQL statement ran.
+        profiler: The profiler of a sampled request, or None.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.segments = {}
+        self.queries = 0
+        self.statements = Counter()
+        self.profiler = None
+
+    def add(self, name, seconds):
+        self.segments[name] = self.segments.get(name, 0.0) + seconds
+
+
+def _current():
+    """
+    Return the timings of the current request, or None.
+    """
+    if has_request_context():
+        return g.get("perf")
+    return None
+
+
+@contextmanager
+def timed(name):
+    """
+    Time a block of work and add it to the current request's timings.
+
+    Args:
+        name (str): The Server-Timing metric name, such as 'hash'.
+
+    Description:
+        When instrumentation is disabled, or outside a request, the block
+        simply runs.
+    """
+    timings = _current()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    if _current() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    timings = _current()
+    if timings is not None and conn.info.get("query_start"):
+        started = conn.info["query_start"].pop()
+        timings.add("db", time.perf_counter() - started)
+        timings.queries += 1
+        timings.statements[statement] += 1
+
+
+def _before_render(sender, template, context, **extra):
+    if _current() is not None:
+        g.setdefault("perf_template_start", []).append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    timings = _current()
+    starts = g.get("perf_template_start")
+    if timings is not None and starts:
+        started = starts.pop()
+        # Templates rendered inside another, such as each note's list item,
+        # are already part of the outer template's time
+        if not starts:
+            timings.add("tpl", time.perf_counter() - started)
+
+
+def _start_request():
+    """
+    Start collecting timings, and profiling for sampled requests.
+    """
+    g.perf = timings = RequestTimings()
+    if random.random() < current_app.config["PROFILE_SAMPLE_RATE"]:
+        timings.profiler = _start_profiler(current_app.config["PROFILER"])
+
+
+def _start_profiler(kind):
+    """
+    Start a pyinstrument or cProfile profiler for the current request.
+    """
+    if kind == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.warning("pyinstrument is not installed, using cProfile")
+        else:
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def _save_profile(profiler, directory, endpoint):
+    """
+    Stop a request's profiler and write its output to 'directory'.
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = f"{endpoint or 'unknown'}-{time.time():.6f}"
+
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        profiler.dump_stats(os.path.join(directory, name + ".prof"))
+    else:
+        profiler.stop()
+        with open(os.path.join(directory, name + ".html"), "w") as output:
+            output.write(profiler.output_html())
+
+
+def _finish_request(response):
+    """
+    Report the request's timings in headers, metrics and logs.
+    """
+    timings = g.get("perf")
+    if timings is None:
+        return response
+
+    total = time.perf_counter() - timings.started
+    endpoint = request.endpoint or "unknown"
+
+    if timings.profiler is not None:
+        _save_profile(timings.profiler, current_app.config["PROFILE_DIR"],
+                      endpoint)
+
+    # Server-Timing durations are in milliseconds
+    parts = [f'db;dur={timings.segments.get("db", 0.0) * 1000:.2f};'
+             f'desc="{timings.queries} queries"']
+    parts += [f"{name};dur={seconds * 1000:.2f}"
+              for name, seconds in sorted(timings.segments.items())
+              if name != "db"]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    response.headers.add("Server-Timing", ", ".join(parts))
+
+    registry.observe("quicknote_request_seconds", total, endpoint=endpoint)
+    registry.observe("quicknote_request_queries", timings.queries,
+                     buckets=QUERY_COUNT_BUCKETS, endpoint=endpoint)
+    registry.observe("quicknote_request_query_seconds",
+                     timings.segments.get("db", 0.0), endpoint=endpoint)
+    registry.observe("quicknote_request_template_seconds",
+                     timings.segments.get("tpl", 0.0), endpoint=endpoint)
+
+    threshold = current_app.config["N_PLUS_ONE_THRESHOLD"]
+    repeated = [(statement, count)
+                for statement, count in timings.statements.items()
+                if count >= threshold]
+    for statement, count in repeated:
+        logger.warning("Possible N+1 query in %s: ran %d times: %s",
+                       endpoint, count, " ".join(statement.split()))
+    if repeated:
+        registry.inc("quicknote_n_plus_one_total", endpoint=endpoint)
+
+    return response
+
+
+def _install_engine_hooks():
+    """
+    Listen to the cursor events of every engine, once per process.
+    """
+    if not event.contains(Engine, "before_cursor_execute",
+                          _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def init_app(app):
+    """
+    Install the instrumentation hooks if 'INSTRUMENTATION' is enabled.
+
+    Args:
+        app (Flask): The application being configured.
+    """
+    if not app.config.get("INSTRUMENTATION"):
+        return
+
+    _install_engine_hooks()
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
@@ -0,0 +1,397 @@
+"""
+QuickNote Jobs Module
+
+Description:
+    This module runs slow maintenance work, such as purging large
+    accounts, outside the request in a background job queue. The queue is
+    the 'job' table of the application's own database, so it needs no
+    broker and jobs survive restarts.
+    Job functions are registered under a kind with the 'job' decorator
+    and queued with 'enqueue', which adds the job to the current
+    transaction: a job only becomes visible to workers when the request
+    that queued it commits.
+    Workers are started with 'python worker.py', next to 'run.py'. Each
+    worker runs up to 'JOB_WORKER_THREADS' jobs at once on a thread pool,
+    and never runs more jobs of one kind at once than the kind's
+    'concurrency'; the limit is checked against the jobs running on every
+    worker, but two workers claiming at the same moment can go over it
+    briefly. Jobs are claimed with a conditional UPDATE, so a job is only
+    ever started by one worker.
+    A job that raises is retried after an exponential backoff of
+    'JOB_RETRY_BASE' seconds doubled on every attempt, up to
+    'JOB_RETRY_MAX', with random jitter, until it has been started
+    'JOB_MAX_ATTEMPTS' times (or its kind's 'max_attempts'); it is then
+    marked as failed. Jobs must therefore be safe to run again after a
+    partial run.
+    Workers regularly mark their jobs as still running. A job whose worker
+    has not done so for 'JOB_LOCK_TIMEOUT' seconds, because the worker was
+    killed, is retried in the same way. Finished jobs are deleted after
+    'JOB_RETENTION_DAYS' days.
+    The status of a job can be polled with 'job_status', which the API
+    serves at '/api/v1/jobs/<id>'.
+
+    Dependencies:
+    - importlib: Imports the modules defining jobs in workers.
+    - json: Encodes job arguments and results.
+    - logging: Reports failed jobs.
+    - os, socket: Name the worker.
+    - random: Adds jitter to retry delays.
+    - threading, time: Run the worker loop.
+    - concurrent.futures: Provides the worker's thread pool.
+    - datetime: Schedules jobs.
+    - Flask: Provides the application settings.
+    - sqlalchemy: Builds the queue statements.
+    - quicknote.db: The database holding the queue.
+    - quicknote.models: Contains the Job model.
+"""
+import importlib
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, func, select, update
+from quicknote import db
+from quicknote.models import Job
+
+
+logger = logging.getLogger(__name__)
+
+# Modules defining jobs, imported by workers so every kind is registered
+JOB_MODULES = ("quicknote.purge",)
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Registered job kinds, by name
+JOBS = {}
+
+
+class JobKind:
+    """
+    A kind of job that workers can run.
+
+    Attributes:
+        function (callable): Runs a job, given its arguments.
+        concurrency (int): The most jobs of this kind running at once.
+        max_attempts (int): How many times a job may be started, or None
+        for the 'JOB_MAX_ATTEMPTS' setting.
+    """
+
+    def __init__(self, function, concurrency, max_attempts):
+        self.function = function
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+
+
+def job(kind, concurrency=1, max_attempts=None):
+    """
+    Register a function as a kind of job.
+
+    Args:
+        kind (str): The name jobs of this kind are queued under.
+        concurrency (int): The most jobs of this kind running at once.
+        max_attempts (int, optional): How many times a job may be
+        started, instead of the 'JOB_MAX_ATTEMPTS' setting.
+
+    Description:
+        The function is called with the job's arguments inside an
+        application context, and may return a JSON serializable result.
+    """
+    def register(function):
+        JOBS[kind] = JobKind(function, concurrency, max_attempts)
+        return function
+    return register
+
+
+def enqueue(kind, owner_id=None, delay=0, **arguments):
+    """
+    Queue a job in the current transaction.
+
+    Args:
+        kind (str): The kind of job.
+        owner_id (int, optional): The user allowed to poll the job.
+        delay (float): Seconds to wait before the job may start.
+        **arguments: The JSON serializable arguments of the job.
+
+    Description:
+        The job is flushed so it has an id, but workers only see it once
+        the caller commits.
+
+    Returns:
+        Job: The queued job.
+    """
+    if kind not in JOBS:
+        raise ValueError(f"Unknown job kind {kind!r}")
+    new_job = Job(
+        kind=kind,
+        payload=json.dumps(arguments),
+        status=QUEUED,
+        attempts=0,
+        max_attempts=(JOBS[kind].max_attempts
+                      or current_app.config["JOB_MAX_ATTEMPTS"]),
+        run_at=datetime.now() + timedelta(seconds=delay),
+        user_id=owner_id)
+    db.session.add(new_job)
+    db.session.flush()
+    return new_job
+
+
+def job_status(queued_job):
+    """
+    Describe a job for status polling.
+
+    Returns:
+        dict: The job's id, kind, status, attempts, dates, latest error
+        and result.
+    """
+    def date(value):
+        return value.isoformat() if value else None
+
+    return {
+        "id": queued_job.id,
+        "kind": queued_job.kind,
+        "status": queued_job.status,
+        "attempts": queued_job.attempts,
+        "max_attempts": queued_job.max_attempts,
+        "run_at": date(queued_job.run_at),
+        "created_at": date(queued_job.created_at),
+        "finished_at": date(queued_job.finished_at),
+        "error": queued_job.last_error,
+        "result": (json.loads(queued_job.result)
+                   if queued_job.result is not None else None),
+    }
+
+
+def retry_delay(attempts):
+    """
+    Return the seconds to wait before starting a job again.
+
+    Args:
+        attempts (int): How many times the job has been started.
+
+    Description:
+        The delay doubles with every attempt, up to 'JOB_RETRY_MAX', and
+        is then shortened by up to half at random, so jobs that failed
+        together are not all retried together.
+    """
+    config = current_app.config
+    delay = min(config["JOB_RETRY_MAX"],
+                config["JOB_RETRY_BASE"] * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1)
+
+
+def _retry_or_fail(job_id, locked_by, error):
+    """
+    Queue a job that did not succeed again, or mark it as failed.
+
+    Description:
+        Nothing is changed if the job is no longer held by 'locked_by',
+        for example because it was already recovered from a stalled
+        worker.
+    """
+    row = db.session.execute(select(Job.attempts, Job.max_attempts).where(
+        Job.id == job_id)).first()
+    if row is None:
+        return
+    now = datetime.now()
+    if row.attempts < row.max_attempts:
+        values = {"status": QUEUED,
+                  "run_at": now + timedelta(
+                      seconds=retry_delay(row.attempts))}
+    else:
+        values = {"status": FAILED, "finished_at": now}
+    db.session.execute(update(Job).where(
+        Job.id == job_id, Job.status == RUNNING, Job.locked_by == locked_by
+    ).values(locked_by=None, locked_at=None, last_error=error, **values))
+    db.session.commit()
+
+
+class Worker:
+    """
+    Runs queued jobs on a pool of threads.
+
+    Attributes:
+        app (Flask): The application the jobs run in.
+        threads (int): The most jobs this worker runs at once.
+        worker_id (str): The name the worker locks jobs with.
+    """
+
+    def __init__(self, app, threads=None, worker_id=None):
+        self.app = app
+        self.threads = threads or app.config["JOB_WORKER_THREADS"]
+        self.worker_id = (worker_id
+                          or f"{socket.gethostname()}:{os.getpid()}")
+        self._running = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._wake = threading.Event()
+        self._last_upkeep = None
+
+    def stop(self):
+        """
+        Stop claiming jobs; the running ones are left to finish.
+        """
+        self._stopping.set()
+        self._wake.set()
+
+    def run(self, until_empty=False):
+        """
+        Claim and run jobs until stopped.
+
+        Args:
+            until_empty (bool): Return once no job is due or running,
+            instead of waiting for more.
+        """
+        for module in JOB_MODULES:
+            importlib.import_module(module)
+
+        poll_interval = self.app.config["JOB_POLL_INTERVAL"]
+        logger.info("Job worker %s started with %s threads", self.worker_id,
+                    self.threads)
+        with ThreadPoolExecutor(self.threads,
+                                thread_name_prefix="job") as executor:
+            with self.app.app_context():
+                while not self._stopping.is_set():
+                    self._wake.clear()
+                    self._upkeep()
+                    started = self._start_due(executor)
+                    with self._lock:
+                        idle = not started and not self._running
+                    if until_empty and idle:
+                        break
+                    if not started:
+                        # Woken early when a job finishes or on stop
+                        self._wake.wait(poll_interval)
+        logger.info("Job worker %s stopped", self.worker_id)
+
+    def _start_due(self, executor):
+        """
+        Start due jobs while this worker has free threads.
+
+        Returns:
+            int: The number of jobs started.
+        """
+        started = 0
+        while True:
+            with self._lock:
+                if self._running >= self.threads:
+                    break
+            claimed = self._claim()
+            if claimed is None:
+                break
+            with self._lock:
+                self._running += 1
+            executor.submit(self._execute, claimed.id, claimed.kind,
+                            claimed.payload)
+            started += 1
+        return started
+
+    def _claim(self):
+        """
+        Lock the next due job of a kind below its concurrency limit.
+
+        Returns:
+            Row: The job's id, kind and payload, or None.
+        """
+        running = dict(db.session.execute(
+            select(Job.kind, func.count()).where(Job.status == RUNNING)
+            .group_by(Job.kind)).all())
+        kinds = [kind for kind, spec in JOBS.items()
+                 if running.get(kind, 0) < spec.concurrency]
+        if not kinds:
+            db.session.commit()
+            return None
+
+        now = datetime.now()
+        # Another worker may claim the chosen job first
+        for _ in range(3):
+            row = db.session.execute(
+                select(Job.id, Job.kind, Job.payload).where(
+                    Job.status == QUEUED, Job.run_at <= now,
+                    Job.kind.in_(kinds)
+                ).order_by(Job.run_at, Job.id).limit(1)).first()
+            if row is None:
+                break
+            claimed = db.session.execute(update(Job).where(
+                Job.id == row.id, Job.status == QUEUED
+            ).values(status=RUNNING, locked_by=self.worker_id,
+                     locked_at=now, attempts=Job.attempts + 1)).rowcount
+            db.session.commit()
+            if claimed:
+                return row
+        db.session.commit()
+        return None
+
+    def _execute(self, job_id, kind, payload):
+        """
+        Thread target that runs one claimed job and records the outcome.
+        """
+        try:
+            with self.app.app_context():
+                try:
+                    result = JOBS[kind].function(**json.loads(payload))
+                except Exception as error:  # noqa: B902
+                    logger.exception("Job %s (%s) failed", job_id, kind)
+                    db.session.rollback()
+                    _retry_or_fail(job_id, self.worker_id,
+                                   f"{type(error).__name__}: {error}")
+                else:
+                    db.session.execute(update(Job).where(
+                        Job.id == job_id, Job.status == RUNNING,
+                        Job.locked_by == self.worker_id
+                    ).values(status=SUCCEEDED, locked_at=None,
+                             finished_at=datetime.now(),
+                             result=json.dumps(result)))
+                    db.session.commit()
+        except Exception:  # noqa: B902
+            # The job stays locked and is recovered after the timeout
+            logger.exception("Recording the outcome of job %s failed",
+                             job_id)
+        finally:
+            with self._lock:
+                self._running -= 1
+            self._wake.set()
+
+    def _upkeep(self):
+        """
+        Keep this worker's locks fresh and tidy up the queue.
+
+        Description:
+            Runs every third of 'JOB_LOCK_TIMEOUT'. Jobs whose worker
+            stopped refreshing their locks are retried or failed, and
+            jobs that finished more than 'JOB_RETENTION_DAYS' days ago
+            are deleted.
+        """
+        config = self.app.config
+        lock_timeout = config["JOB_LOCK_TIMEOUT"]
+        if (self._last_upkeep is not None
+                and time.monotonic() - self._last_upkeep < lock_timeout / 3):
+            return
+        self._last_upkeep = time.monotonic()
+
+        now = datetime.now()
+        db.session.execute(update(Job).where(
+            Job.status == RUNNING, Job.locked_by == self.worker_id
+        ).values(locked_at=now))
+        db.session.execute(delete(Job).where(
+            Job.status.in_((SUCCEEDED, FAILED)),
+            Job.finished_at < now - timedelta(
+                days=config["JOB_RETENTION_DAYS"])))
+        db.session.commit()
+
+        stalled = db.session.execute(select(Job.id, Job.locked_by).where(
+            Job.status == RUNNING,
+            Job.locked_at < now - timedelta(seconds=lock_timeout))).all()
+        for job_id, locked_by in stalled:
+            logger.warning("Job %s stalled on worker %s", job_id, locked_by)
+            _retry_or_fail(job_id, locked_by,
+                           f"Worker {locked_by} stopped responding")
@@ -0,0 +1,128 @@
+"""
+QuickNote Metrics Module
+
+Description:
+    This module keeps in-process counters and histograms describing how the
+    QuickNote application performs, and renders them in the Prometheus text
+    exposition format served by the '/metrics' view.
+    Metrics are kept per process; with several Gunicorn workers each worker
+    reports its own values.
+
+    Dependencies:
+    - threading: Guards the metric values shared between request threads.
+    - collections.defaultdict: Stores values per label combination.
+"""
+import threading
+from collections import defaultdict
+
+
+# Histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0)
+
+
+def _label_text(labels):
+    """
+    Render a sorted tuple of label pairs as a Prometheus label set.
+    """
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\")
+                         .replace('"', '\\"'))
+        for name, value in labels)
+    return "{" + pairs + "}"
+
+
+class Registry:
+    """
+    Thread-safe collection of counters and histograms.
+
+    Description:
+        Counters and histograms are created on first use and are
+        identified by name plus keyword labels.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = defaultdict(float)
+        self._histograms = {}
+
+    def describe(self, name, text):
+        """
+        Set the help text shown for a metric.
+        """
+        self._help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        """
+        Increase a counter.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        """
+        Record one observation in a histogram.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {
+                    "buckets": buckets, "counts": [0] * len(buckets),
+                    "count": 0, "sum": 0.0}
+            for index, bound in enumerate(histogram["buckets"]):
+                if value <= bound:
+                    histogram["counts"][index] += 1
+            histogram["count"] += 1
+            histogram["sum"] += value
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics, one sample per line.
+        """
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(),
+                                key=lambda item: item[0])
+
+        written = set()
+
+        def header(name, kind):
+            if name not in written:
+                written.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{name}{_label_text(labels)} {value}")
+
+        for (name, labels), histogram in histograms:
+            header(name, "histogram")
+            for bound, count in zip(histogram["buckets"],
+                                    histogram["counts"]):
+                bucket_labels = labels + (("le", bound),)
+                lines.append(
+                    f"{name}_bucket{_label_text(bucket_labels)} {count}")
+            inf_labels = labels + (("le", "+Inf"),)
+            lines.append(f"{name}_bucket{_label_text(inf_labels)} "
+                         f"{histogram['count']}")
+            lines.append(f"{name}_count{_label_text(labels)} "
+                         f"{histogram['count']}")
+            lines.append(f"{name}_sum{_label_text(labels)} "
+                         f"{histogram['sum']}")
+
+        return "\n".join(lines) + "\n"
+
+
+# The registry shared by the whole process
+registry = Registry()
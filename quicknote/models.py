@@ -6,20 +6,24 @@ Description:
     It includes the UserMixin class, which provides user management
     functionality and interfaces required for user sessions and authentication.
     The module also defines a set of data models for the application,
-    such as the 'User' and 'Note' models.
+    such as the 'User', 'Note' and 'NoteRevision' models, the 'Folder',
+    'Tag' and 'NoteTag' models organising notes, and the 'Job' model
+    holding the background job queue.
 
     Dependencies:
     - flask_login.UserMixin: Provides user management functionality for the
       application.
-    - sqlalchemy.sql.func: Provides SQL functions for database operations.
+    - datetime: Provides the default creation date for notes.
+    - quicknote.compressed: Stores long note contents compressed.
     - quicknote.db: The database instance used to interact with the database.
 
     Use this module to define and manage the data models used by the QuickNote
     application.
 """
+from datetime import datetime
 from flask_login import UserMixin
-from sqlalchemy.sql import func
 from quicknote import db
+from quicknote.compressed import CompressedText
 
 
 # schema for Users model
@@ -34,7 +38,12 @@ class User(db.Model, UserMixin):
         email (str): The user's email address, which is unique and
         not nullable.
         password (str): The hashed password for the user.
-        notes (relationship): A relationship to the user's notes.
+        notes (relationship): A relationship to the user's notes. Notes are
+        removed by the database cascade when a user is deleted, rather
+        than being loaded and deleted one at a time.
+        note_seq (int): The user's change sequence, increased every time
+        one of their notes is created, edited or deleted.
+        notes_changed_at (datetime): When the user's notes last changed.
 
     Description:
         This class represents the User model for the QuickNote application.
@@ -47,9 +56,13 @@ class User(db.Model, UserMixin):
     first_name = db.Column(db.String(30))
     last_name = db.Column(db.String(30))
     email = db.Column(db.String(150), unique=True, nullable=False)
-    password = db.Column(db.String(150))
+    password = db.Column(db.String(255))
     notes = db.relationship(
-        "Note", backref="user", cascade="all, delete", lazy=True)
+        "Note", backref="user", cascade="all, delete", lazy=True,
+        passive_deletes=True)
+    note_seq = db.Column(db.Integer, nullable=False, default=0,
+                         server_default="0")
+    notes_changed_at = db.Column(db.DateTime(timezone=True))
 
     def __repr__(self):
         return (f"#{self.id} - FirstName: {self.first_name} | "
@@ -69,6 +82,10 @@ class Note(db.Model):
         note_content (str): The content of the note.
         note_date (datetime): The date and time when the note was created.
         user_id (int): The foreign key linking the note to a user.
+        change_seq (int): The owner's change sequence number at the note's
+        last change, used to find the notes changed since a sync.
+        folder_id (int): The foreign key linking the note to its folder,
+        if it is in one.
 
     Description:
         This class represents the Note model for the QuickNote application.
@@ -77,16 +94,238 @@ class Note(db.Model):
         The 'id' attribute serves as the primary key for identifying individual
         notes, and 'user_id' establishes a relationship to the user who created
         the note.
+        The composite (user_id, note_date DESC, id) index serves both the
+        paginated notes list and lookups of all notes owned by a user.
+        The (user_id, change_seq) index serves the sync change feed.
     """
     id = db.Column(db.Integer, primary_key=True)
     note_title = db.Column(db.String(30))
-    note_content = db.Column(db.String(5000))
-    note_date = db.Column(db.DateTime(timezone=True), default=func.now())
+    note_content = db.deferred(db.Column(CompressedText))
+    note_date = db.Column(db.DateTime(timezone=True), default=datetime.now)
     user_id = db.Column(db.Integer, db.ForeignKey(
         "user.id", ondelete="CASCADE"), nullable=False)
+    change_seq = db.Column(db.Integer)
+    folder_id = db.Column(db.Integer, db.ForeignKey(
+        "folder.id", ondelete="SET NULL"))
+
+    __table_args__ = (
+        db.Index("ix_note_user_id_note_date_id",
+                 user_id, note_date.desc(), id),
+        db.Index("ix_note_user_id_change_seq", user_id, change_seq),
+        db.Index("ix_note_user_id_folder_id_note_date_id",
+                 user_id, folder_id, note_date.desc(), id),
+    )
 
     def __repr__(self):
         return (f"#{self.id} - Title: {self.title} | "
                 f"Content: {self.content} | "
                 f"Date: {self.date} | "
                 f"UserID: {self.user_id}")
+
+
+# schema for NoteTombstone model
+class NoteTombstone(db.Model):
+    """
+    NoteTombstone Model for QuickNote Application
+
+    Attributes:
+        id (int): The unique identifier for the tombstone.
+        note_id (int): The identifier of the deleted note.
+        user_id (int): The foreign key linking the tombstone to the user
+        who owned the note.
+        change_seq (int): The owner's change sequence number at the
+        deletion.
+        deleted_at (datetime): When the note was deleted.
+
+    Description:
+        This class records the deletion of a note, so that clients syncing
+        changes learn which of their copies to remove. Tombstones are
+        removed together with their user.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    note_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey(
+        "user.id", ondelete="CASCADE"), nullable=False)
+    change_seq = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime(timezone=True), default=datetime.now)
+
+    __table_args__ = (
+        db.Index("ix_note_tombstone_user_id_change_seq",
+                 user_id, change_seq),
+    )
+
+
+# schema for NoteRevision model
+class NoteRevision(db.Model):
+    """
+    NoteRevision Model for QuickNote Application
+
+    Attributes:
+        id (int): The unique identifier for the revision.
+        note_id (int): The foreign key linking the revision to its note.
+        revision (int): The revision's number, counting from 1 for each
+        note.
+        note_title (str): The note's title at this revision.
+        is_snapshot (bool): Whether 'data' holds the whole content rather
+        than the changes from the previous revision.
+        data (bytes): The compressed content or changes.
+        size (int): The length of the note's content at this revision.
+        created_at (datetime): When the revision was saved.
+
+    Description:
+        This class stores one version of an edited note. See
+        'quicknote.revisions' for how versions are stored and rebuilt.
+        Revisions are removed together with their note.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    note_id = db.Column(db.Integer, db.ForeignKey(
+        "note.id", ondelete="CASCADE"), nullable=False)
+    revision = db.Column(db.Integer, nullable=False)
+    note_title = db.Column(db.String(30))
+    is_snapshot = db.Column(db.Boolean, nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), default=datetime.now)
+
+    __table_args__ = (
+        db.Index("ix_note_revision_note_id_revision",
+                 note_id, revision, unique=True),
+    )
+
+
+# schema for Folder model
+class Folder(db.Model):
+    """
+    Folder Model for QuickNote Application
+
+    Attributes:
+        id (int): The unique identifier for the folder.
+        user_id (int): The foreign key linking the folder to its user.
+        name (str): The folder's name, unique for each user.
+        note_count (int): The number of notes in the folder.
+
+    Description:
+        This class represents a folder holding some of a user's notes;
+        each note is in at most one folder. 'note_count' is kept up to
+        date as notes move, so listing folders never counts notes. See
+        'quicknote.tags'.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey(
+        "user.id", ondelete="CASCADE"), nullable=False)
+    name = db.Column(db.String(30), nullable=False)
+    note_count = db.Column(db.Integer, nullable=False, default=0,
+                           server_default="0")
+
+    __table_args__ = (
+        db.Index("ix_folder_user_id_name", user_id, name, unique=True),
+    )
+
+
+# schema for Tag model
+class Tag(db.Model):
+    """
+    Tag Model for QuickNote Application
+
+    Attributes:
+        id (int): The unique identifier for the tag.
+        user_id (int): The foreign key linking the tag to its user.
+        name (str): The tag, unique for each user.
+        note_count (int): The number of notes with the tag.
+
+    Description:
+        This class represents a tag a user has given to some of their
+        notes. 'note_count' is kept up to date as notes are tagged and
+        untagged, so listing tags never counts notes. See
+        'quicknote.tags'.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey(
+        "user.id", ondelete="CASCADE"), nullable=False)
+    name = db.Column(db.String(30), nullable=False)
+    note_count = db.Column(db.Integer, nullable=False, default=0,
+                           server_default="0")
+
+    __table_args__ = (
+        db.Index("ix_tag_user_id_name", user_id, name, unique=True),
+    )
+
+
+# schema for NoteTag model
+class NoteTag(db.Model):
+    """
+    NoteTag Model for QuickNote Application
+
+    Attributes:
+        note_id (int): The foreign key linking to the tagged note.
+        tag_id (int): The foreign key linking to the tag.
+        user_id (int): The owner of the note and the tag.
+        note_date (datetime): A copy of the note's date.
+
+    Description:
+        This class links a note to one of its tags. The owner and the
+        note's date are copied onto the link, so a page of the notes with
+        a tag, newest first, is read from the (user_id, tag_id,
+        note_date, note_id) index alone.
+    """
+    note_id = db.Column(db.Integer, db.ForeignKey(
+        "note.id", ondelete="CASCADE"), primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey(
+        "tag.id", ondelete="CASCADE"), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey(
+        "user.id", ondelete="CASCADE"), nullable=False)
+    note_date = db.Column(db.DateTime(timezone=True))
+
+    __table_args__ = (
+        db.Index("ix_note_tag_user_id_tag_id_note_date_note_id",
+                 user_id, tag_id, note_date.desc(), note_id),
+    )
+
+
+# schema for Job model
+class Job(db.Model):
+    """
+    Job Model for QuickNote Application
+
+    Attributes:
+        id (int): The unique identifier for the job.
+        kind (str): The name the job's function is registered under.
+        payload (str): The job's keyword arguments, as JSON.
+        status (str): 'queued', 'running', 'succeeded' or 'failed'.
+        attempts (int): How many times the job has been started.
+        max_attempts (int): How many times the job may be started.
+        run_at (datetime): When the job may next be started.
+        locked_by (str): The worker running the job.
+        locked_at (datetime): When that worker last reported the job as
+        running.
+        last_error (str): The error of the latest failed attempt.
+        result (str): The job's result, as JSON.
+        user_id (int): The user allowed to look at the job, if any.
+        created_at (datetime): When the job was queued.
+        finished_at (datetime): When the job succeeded or finally failed.
+
+    Description:
+        This class stores one job of the background job queue. See
+        'quicknote.jobs' for how jobs are queued and run. The user id is
+        not a foreign key, so jobs such as account purges outlive their
+        user.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default="queued")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False)
+    run_at = db.Column(db.DateTime(timezone=True), nullable=False,
+                       default=datetime.now)
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime(timezone=True))
+    last_error = db.Column(db.Text)
+    result = db.Column(db.Text)
+    user_id = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime(timezone=True), default=datetime.now)
+    finished_at = db.Column(db.DateTime(timezone=True))
+
+    __table_args__ = (
+        db.Index("ix_job_status_run_at", status, run_at),
+    )
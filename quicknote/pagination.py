@@ -0,0 +1,118 @@
+"""
+QuickNote Pagination Module
+
+Description:
+    This module provides keyset (cursor based) pagination for the notes list.
+    Instead of counting rows with OFFSET, each page continues from the
+    (note_date, id) pair of the last note on the previous page, so fetching
+    any page costs the same no matter how deep the user has scrolled.
+    Cursors are opaque, URL safe strings that encode that pair.
+
+    Dependencies:
+    - base64: Encodes and decodes the opaque cursor strings.
+    - datetime: Parses the note date stored inside a cursor.
+    - sqlalchemy: Builds the keyset filter and ordering clauses.
+    - quicknote.models: Contains the Note model being paginated.
+"""
+import base64
+import binascii
+from datetime import datetime
+from sqlalchemy import and_, or_
+from quicknote.models import Note
+
+
+# Default number of notes rendered per page of the notes list
+DEFAULT_PAGE_SIZE = 50
+
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a cursor supplied by the client cannot be decoded.
+    """
+
+
+def encode_cursor(note):
+    """
+    Build the cursor that continues the list after the given note.
+
+    Args:
+        note (Note): The last note shown on the current page.
+
+    Returns:
+        str: An opaque, URL safe cursor string.
+    """
+    raw = f"{note.note_date.isoformat()}|{note.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor created by 'encode_cursor'.
+
+    Args:
+        cursor (str): The cursor string received from the client.
+
+    Returns:
+        tuple: The (note_date, note_id) pair the next page starts after.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        note_date, note_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(note_date), int(note_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as error:
+        raise InvalidCursor(cursor) from error
+
+
+def apply_keyset(query, cursor=None, limit=DEFAULT_PAGE_SIZE,
+                 date_column=Note.note_date, id_column=Note.id):
+    """
+    Restrict a notes query to one page, newest notes first.
+
+    Args:
+        query: A Note query (or select statement) already filtered to
+        one user.
+        cursor (str, optional): The cursor returned with the previous page.
+        limit (int): The number of notes on the page.
+        date_column, id_column: The columns holding the note date and id,
+        for queries over another table that copies them, such as
+        'NoteTag'.
+
+    Description:
+        The query is ordered by (note_date, id) descending so that notes
+        sharing the same date still have a stable order.
+        When a cursor is given, only notes that sort after it are kept.
+        One extra row is requested so the caller can tell whether another
+        page exists without running a separate COUNT query.
+
+    Returns:
+        The query limited to 'limit + 1' rows.
+    """
+    if cursor:
+        note_date, note_id = decode_cursor(cursor)
+        query = query.where(or_(
+            date_column < note_date,
+            and_(date_column == note_date, id_column < note_id)))
+
+    return query.order_by(
+        date_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def split_page(rows, limit=DEFAULT_PAGE_SIZE):
+    """
+    Split the rows fetched by 'apply_keyset' into a page and a next cursor.
+
+    Args:
+        rows (list): The notes returned by the paginated query.
+        limit (int): The number of notes on the page.
+
+    Returns:
+        tuple: The notes on this page and the cursor for the next page,
+        or None if this is the last page.
+    """
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(rows) > limit else None
+    return page, next_cursor
@@ -0,0 +1,267 @@
+"""
+QuickNote Passwords Module
+
+Description:
+    This module hashes and checks passwords with a slow key derivation
+    function, without letting the work crowd out other requests.
+    Passwords are hashed with scrypt or PBKDF2-SHA256, chosen with the
+    'PASSWORD_HASH_METHOD' setting, at the cost set by
+    'PASSWORD_SCRYPT_N', 'PASSWORD_SCRYPT_R', 'PASSWORD_SCRYPT_P' and
+    'PASSWORD_PBKDF2_ITERATIONS'. Hashes use Werkzeug's format
+    ('method$salt$hash'), so they stay readable by 'check_password_hash'
+    after a Werkzeug upgrade.
+    Hashing runs on a pool of 'PASSWORD_HASH_WORKERS' threads in each
+    worker process; hashlib releases the GIL while it hashes, so the pool
+    bounds the CPU used by hashing while request threads serving notes
+    keep running. At most 'PASSWORD_HASH_CONCURRENCY' requests may be
+    hashing or waiting to hash at once. Others wait up to
+    'PASSWORD_HASH_TIMEOUT' seconds for a place and are then turned away
+    with '503 Service Unavailable', so a burst of logins cannot tie up
+    every request thread.
+    Hashes made with an older method or cost, including the single round
+    'sha256' hashes created before this module existed, are replaced by
+    'check_password' the next time their user logs in.
+    The async views use 'hash_password_async' and 'check_password_async',
+    which share the same pool and limit but wait without blocking the
+    event loop.
+
+    Dependencies:
+    - asyncio: Waits for the pool from async views.
+    - hashlib, hmac, secrets: Hash and compare passwords.
+    - os: Detects forked worker processes.
+    - threading: Limits the hashing requests in flight.
+    - concurrent.futures: Provides the hashing thread pool.
+    - Flask: Provides the application settings.
+    - werkzeug: Hashes and checks PBKDF2 and legacy hashes, and provides
+      the 503 error.
+    - quicknote.instrumentation: Times password hashing.
+    - quicknote.metrics: Counts rejected hashing requests.
+"""
+import asyncio
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import check_password_hash, generate_password_hash
+from quicknote.instrumentation import timed
+from quicknote.metrics import registry
+
+
+# Length of the random salt stored in each hash
+SALT_LENGTH = 16
+
+# Seconds clients are asked to wait before retrying a rejected login
+RETRY_AFTER = 1
+
+registry.describe("quicknote_password_hash_rejected_total",
+                  "Requests turned away because password hashing was busy.")
+
+
+class HashingBusy(ServiceUnavailable):
+    """
+    Raised when too many requests are already hashing passwords.
+    """
+    description = ("Too many people are signing in right now. Please try "
+                   "again in a moment.")
+
+
+class PasswordHasher:
+    """
+    Thread pool and admission limit for password hashing in one process.
+
+    Attributes:
+        workers (int): The number of hashing threads.
+        slots (threading.BoundedSemaphore): Admits the requests allowed
+        to hash or wait for the pool at once.
+        timeout (float): Seconds a request waits for a slot.
+
+    Description:
+        The pool is created on first use in each process, so worker
+        processes forked from a preloaded master do not share the master's
+        threads, which do not survive a fork.
+    """
+
+    def __init__(self, workers, concurrency, timeout):
+        self.workers = workers
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.timeout = timeout
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="password-hash")
+                self._pid = os.getpid()
+            return self._pool
+
+    def run(self, function, *args):
+        """
+        Run a hashing function on the pool and wait for its result.
+
+        Raises:
+            HashingBusy: If no slot was free within the timeout.
+        """
+        if not self.slots.acquire(timeout=self.timeout):
+            registry.inc("quicknote_password_hash_rejected_total")
+            raise HashingBusy(retry_after=RETRY_AFTER)
+        try:
+            with timed("hash"):
+                return self._executor().submit(function, *args).result()
+        finally:
+            self.slots.release()
+
+    async def run_async(self, function, *args):
+        """
+        Run a hashing function on the pool without blocking the event loop.
+
+        Raises:
+            HashingBusy: If no slot was free within the timeout.
+        """
+        # Waiting for a slot blocks, so it happens on the loop's executor
+        if not await asyncio.to_thread(self.slots.acquire,
+                                       timeout=self.timeout):
+            registry.inc("quicknote_password_hash_rejected_total")
+            raise HashingBusy(retry_after=RETRY_AFTER)
+        try:
+            with timed("hash"):
+                return await asyncio.wrap_future(
+                    self._executor().submit(function, *args))
+        finally:
+            self.slots.release()
+
+
+def init_app(app):
+    """
+    Create the password hasher for an application.
+
+    Args:
+        app (Flask): The application being configured.
+    """
+    app.extensions["password_hasher"] = PasswordHasher(
+        app.config["PASSWORD_HASH_WORKERS"],
+        app.config["PASSWORD_HASH_CONCURRENCY"],
+        app.config["PASSWORD_HASH_TIMEOUT"])
+
+
+def _method():
+    """
+    Return the hash method prefix for the configured algorithm and cost.
+    """
+    config = current_app.config
+    if config["PASSWORD_HASH_METHOD"] == "scrypt":
+        return (f"scrypt:{config['PASSWORD_SCRYPT_N']}:"
+                f"{config['PASSWORD_SCRYPT_R']}:"
+                f"{config['PASSWORD_SCRYPT_P']}")
+    return f"pbkdf2:sha256:{config['PASSWORD_PBKDF2_ITERATIONS']}"
+
+
+def _scrypt(password, salt, n, r, p):
+    # The memory limit Werkzeug uses, enough for any r and p
+    return hashlib.scrypt(password.encode(), salt=salt.encode(), n=n, r=r,
+                          p=p, maxmem=132 * n * r * p).hex()
+
+
+def _generate(password, method):
+    """
+    Hash a password with the given method. Runs on the pool.
+    """
+    if not method.startswith("scrypt:"):
+        return generate_password_hash(password, method=method,
+                                      salt_length=SALT_LENGTH)
+    n, r, p = (int(value) for value in method.split(":")[1:])
+    salt = secrets.token_urlsafe(SALT_LENGTH)[:SALT_LENGTH]
+    return f"{method}${salt}${_scrypt(password, salt, n, r, p)}"
+
+
+def _check(pwhash, password):
+    """
+    Check a password against a hash of any supported method. Runs on the
+    pool.
+    """
+    if not pwhash.startswith("scrypt:"):
+        return check_password_hash(pwhash, password)
+    try:
+        method, salt, expected = pwhash.split("$", 2)
+        n, r, p = (int(value) for value in method.split(":")[1:])
+    except ValueError:
+        return False
+    return hmac.compare_digest(_scrypt(password, salt, n, r, p), expected)
+
+
+def hash_password(password):
+    """
+    Hash a new password with the configured method and cost.
+
+    Args:
+        password (str): The password to hash.
+
+    Returns:
+        str: The hash to store. Raises 'HashingBusy' when hashing is
+        saturated.
+    """
+    hasher = current_app.extensions["password_hasher"]
+    return hasher.run(_generate, password, _method())
+
+
+async def hash_password_async(password):
+    """
+    Hash a new password like 'hash_password', from an async view.
+    """
+    hasher = current_app.extensions["password_hasher"]
+    return await hasher.run_async(_generate, password, _method())
+
+
+def _check_and_upgrade(pwhash, password, method):
+    """
+    Check a password and make a current hash if needed. Runs on the pool.
+    """
+    if not _check(pwhash, password):
+        return False, None
+    if pwhash.split("$", 1)[0] == method:
+        return True, None
+    return True, _generate(password, method)
+
+
+def check_password(pwhash, password):
+    """
+    Check a password, and rehash it if its hash is out of date.
+
+    Args:
+        pwhash (str): The stored hash.
+        password (str): The password entered by the user.
+
+    Description:
+        A hash is out of date when it was made with a different method or
+        cost than the current settings. The new hash is made straight after
+        the check, holding the same slot, so the caller only has to store
+        it.
+
+    Returns:
+        tuple: Whether the password matches, and the new hash to store,
+        which is None if the stored one is current or the password is
+        wrong. Raises 'HashingBusy' when hashing is saturated.
+    """
+    if not pwhash or not password:
+        return False, None
+
+    return current_app.extensions["password_hasher"].run(
+        _check_and_upgrade, pwhash, password, _method())
+
+
+async def check_password_async(pwhash, password):
+    """
+    Check a password like 'check_password', from an async view.
+    """
+    if not pwhash or not password:
+        return False, None
+
+    return await current_app.extensions["password_hasher"].run_async(
+        _check_and_upgrade, pwhash, password, _method())
@@ -0,0 +1,166 @@
+"""
+QuickNote Connection Pool Module
+
+Description:
+    This module builds the SQLAlchemy engine options for the QuickNote
+    database from environment variables, and provides pool classes that
+    record how long each connection checkout takes.
+    By default connections are kept in a queue pool sized per worker,
+    checked with a lightweight ping before use and recycled periodically,
+    so bursts of traffic and database restarts are handled gracefully.
+    When an external pooler such as PgBouncer runs in transaction pooling
+    mode ('DB_POOLER_MODE=transaction'), the application keeps no
+    connections of its own and leaves pooling to the external pooler.
+    The async engine used in ASGI mode (see 'quicknote.asgi') takes the
+    same settings, with the URL rewritten for the asyncpg or aiosqlite
+    driver by 'async_engine_options'.
+
+    Environment Variables:
+    - DB_POOL_SIZE: Connections kept open per process (default 5).
+    - DB_MAX_OVERFLOW: Extra connections allowed during bursts (default 10).
+    - DB_POOL_TIMEOUT: Seconds to wait for a free connection (default 30).
+    - DB_POOL_RECYCLE: Seconds before a connection is replaced
+      (default 1800).
+    - DB_POOL_PRE_PING: Set to "False" to skip the ping before checkout.
+    - DB_POOLER_MODE: Set to "transaction" when connecting through an
+      external transaction pooler.
+
+    Dependencies:
+    - time: Measures how long checkouts take.
+    - sqlalchemy.engine.make_url: Parses database URLs.
+    - sqlalchemy.pool: Provides the pool classes being extended.
+    - quicknote.metrics: Records the checkout wait time histogram.
+"""
+import time
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from quicknote.metrics import registry
+
+
+CHECKOUT_METRIC = "quicknote_db_pool_checkout_seconds"
+registry.describe(
+    CHECKOUT_METRIC, "Time spent waiting for a database connection.")
+
+
+class _TimedCheckout:
+    """
+    Pool mixin that records the time taken by every checkout.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            registry.observe(CHECKOUT_METRIC, time.perf_counter() - start,
+                             pool=type(self).__name__)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    """
+    Queue pool that records checkout wait time.
+    """
+
+
+class TimedNullPool(_TimedCheckout, NullPool):
+    """
+    Non-pooling pool that records the time taken to connect.
+    """
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    """
+    Queue pool for the async engine that records checkout wait times.
+    """
+
+
+class TimedAsyncNullPool(_TimedCheckout, NullPool):
+    """
+    Non-pooling pool for the async engine that records the time taken to
+    connect.
+    """
+
+
+def _flag(environ, name, default):
+    """
+    Read a "True"/"False" environment variable.
+    """
+    return environ.get(name, str(default)) == "True"
+
+
+def engine_options(uri, environ):
+    """
+    Build the SQLAlchemy engine options for a database URL.
+
+    Args:
+        uri (str): The database URL the engine will connect to.
+        environ (dict): The environment variables to read settings from.
+
+    Description:
+        SQLite uses SQLAlchemy's default single-file pool, so no pool
+        options are returned for it.
+
+    Returns:
+        dict: Keyword arguments for 'create_engine'.
+    """
+    if not uri or uri.startswith("sqlite"):
+        return {}
+
+    if environ.get("DB_POOLER_MODE") == "transaction":
+        # The external pooler owns the connections; opening a fresh one per
+        # checkout keeps no session state across transactions
+        return {"poolclass": TimedNullPool}
+
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": int(environ.get("DB_POOL_SIZE", 5)),
+        "max_overflow": int(environ.get("DB_MAX_OVERFLOW", 10)),
+        "pool_timeout": float(environ.get("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(environ.get("DB_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": _flag(environ, "DB_POOL_PRE_PING", True),
+    }
+
+
+def async_engine_options(uri, environ):
+    """
+    Build the URL and options of the async engine for a database URL.
+
+    Args:
+        uri (str): The database URL used by the WSGI application.
+        environ (dict): The environment variables to read settings from.
+
+    Description:
+        PostgreSQL URLs are switched to the asyncpg driver, which takes
+        'sslmode' as its 'ssl' argument, and SQLite URLs to aiosqlite.
+        Behind a transaction pooler asyncpg must not cache prepared
+        statements, since consecutive transactions may run on different
+        server connections.
+
+    Returns:
+        tuple: The async database URL and the keyword arguments for
+        'create_async_engine'.
+    """
+    url = make_url(uri)
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite"), {}
+
+    query = dict(url.query)
+    connect_args = {}
+    if "sslmode" in query:
+        connect_args["ssl"] = query.pop("sslmode")
+    url = url.set(drivername="postgresql+asyncpg", query=query)
+
+    if environ.get("DB_POOLER_MODE") == "transaction":
+        connect_args["statement_cache_size"] = 0
+        return url, {"poolclass": TimedAsyncNullPool,
+                     "connect_args": connect_args}
+
+    return url, {
+        "poolclass": TimedAsyncQueuePool,
+        "pool_size": int(environ.get("DB_POOL_SIZE", 5)),
+        "max_overflow": int(environ.get("DB_MAX_OVERFLOW", 10)),
+        "pool_timeout": float(environ.get("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(environ.get("DB_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": _flag(environ, "DB_POOL_PRE_PING", True),
+        "connect_args": connect_args,
+    }
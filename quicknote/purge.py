@@ -0,0 +1,165 @@
+"""
+QuickNote Account Purge Module
+
+Description:
+    This module deletes user accounts together with all of their notes
+    using set-based statements, instead of loading every note and
+    deleting it one at a time.
+    Small accounts are removed in the request with one bulk DELETE for the
+    notes and one for the user.
+    Accounts with more notes than the 'ACCOUNT_DELETE_BACKGROUND_THRESHOLD'
+    setting are locked straight away and then purged by a
+    'purge_account' background job in chunks of
+    'ACCOUNT_DELETE_CHUNK_SIZE' notes, each in its own short transaction,
+    so neither the request nor the database is held up by one long
+    delete. A purge that fails part way is retried by the job queue and
+    carries on where it stopped.
+
+    Dependencies:
+    - flask.current_app: Provides the chunk size setting.
+    - quicknote.db: The database instance used to delete the rows.
+    - quicknote.jobs: Queues and runs the background purge.
+    - quicknote.models: Contains the User, Note, NoteTombstone, Folder
+      and Tag models being deleted.
+    - quicknote.revisions: Removes the revisions of deleted notes.
+    - quicknote.search: Removes deleted notes from the search index.
+    - quicknote.tags: Removes the tags of deleted notes.
+    - quicknote.user_cache: Drops deleted users from the user cache.
+"""
+from flask import current_app
+from quicknote import db
+from quicknote.jobs import enqueue, job
+from quicknote.models import User, Note, NoteTombstone, Folder, Tag
+from quicknote.revisions import delete_revisions
+from quicknote.search import unindex_notes
+from quicknote.tags import untag_notes
+from quicknote.user_cache import invalidate_user
+
+# Password hash that never matches, used to lock accounts being purged
+LOCKED_PASSWORD = "!"
+
+
+def delete_account(user_id):
+    """
+    Delete a user and all of their notes in one transaction.
+
+    Args:
+        user_id (int): The unique identifier of the user to delete.
+
+    Description:
+        The notes are removed with a single DELETE that uses the
+        (user_id, note_date, id) index, followed by the user row. The
+        notes are deleted explicitly rather than through the foreign key
+        cascade because SQLite does not enforce foreign keys by default.
+    """
+    unindex_notes(db.session.connection(), user_id=user_id)
+    delete_revisions(db.session.connection(), user_id=user_id)
+    untag_notes(db.session.connection(), user_id=user_id)
+    Note.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    _delete_user_row(user_id)
+    db.session.commit()
+    invalidate_user(user_id)
+
+
+def _delete_user_row(user_id):
+    """
+    Delete a user with their sync tombstones, folders and tags, once
+    their notes are gone.
+
+    Description:
+        No tombstones are written for the notes of a deleted account; the
+        account itself disappearing tells its clients to discard them.
+    """
+    NoteTombstone.query.filter_by(user_id=user_id).delete(
+        synchronize_session=False)
+    Folder.query.filter_by(user_id=user_id).delete(
+        synchronize_session=False)
+    Tag.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    User.query.filter_by(id=user_id).delete(synchronize_session=False)
+
+
+def is_large_account(user_id):
+    """
+    Check whether an account should be purged in the background.
+
+    Args:
+        user_id (int): The unique identifier of the user.
+
+    Description:
+        Rather than counting every note, this looks for a note past the
+        threshold, which reads at most that many index entries.
+        A threshold of 0 disables background purging.
+
+    Returns:
+        bool: True if the user owns more notes than the threshold.
+    """
+    threshold = current_app.config["ACCOUNT_DELETE_BACKGROUND_THRESHOLD"]
+    if not threshold:
+        return False
+    return db.session.query(Note.id).filter_by(
+        user_id=user_id).offset(threshold).first() is not None
+
+
+def purge_in_chunks(user_id, chunk_size):
+    """
+    Delete a user's notes in chunks, then delete the user.
+
+    Args:
+        user_id (int): The unique identifier of the user to delete.
+        chunk_size (int): The number of notes deleted per transaction.
+
+    Description:
+        Each chunk selects a batch of note ids through the index and
+        deletes them in its own transaction, keeping locks and undo data
+        small. Must be called within an application context.
+    """
+    while True:
+        note_ids = [note_id for note_id, in db.session.query(Note.id)
+                    .filter_by(user_id=user_id).limit(chunk_size)]
+        if not note_ids:
+            break
+
+        unindex_notes(db.session.connection(), note_ids=note_ids)
+        delete_revisions(db.session.connection(), note_ids=note_ids)
+        untag_notes(db.session.connection(), note_ids=note_ids)
+        Note.query.filter(Note.id.in_(note_ids)).delete(
+            synchronize_session=False)
+        db.session.commit()
+
+    _delete_user_row(user_id)
+    db.session.commit()
+    invalidate_user(user_id)
+
+
+@job("purge_account", concurrency=2)
+def purge_account(user_id):
+    """
+    Background job that purges a locked account in chunks.
+
+    Args:
+        user_id (int): The unique identifier of the user to delete.
+    """
+    purge_in_chunks(user_id, current_app.config["ACCOUNT_DELETE_CHUNK_SIZE"])
+
+
+def start_background_purge(user_id):
+    """
+    Lock an account and queue a job to purge it.
+
+    Args:
+        user_id (int): The unique identifier of the user to delete.
+
+    Description:
+        The account's password is replaced with a value no password can
+        match in the same transaction that queues the job, so the user
+        cannot sign back in while their notes are being removed.
+
+    Returns:
+        Job: The queued purge job.
+    """
+    User.query.filter_by(id=user_id).update(
+        {"password": LOCKED_PASSWORD}, synchronize_session=False)
+    purge_job = enqueue("purge_account", user_id=user_id)
+    db.session.commit()
+    invalidate_user(user_id)
+    return purge_job
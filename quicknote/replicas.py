@@ -0,0 +1,141 @@
+"""
+QuickNote Read Replica Module
+
+Description:
+    This module routes the queries of read-only views to database read
+    replicas, while every other query and every write goes to the primary
+    database.
+    Replicas are listed in the 'DATABASE_REPLICA_URLS' setting and are
+    registered as Flask-SQLAlchemy binds named 'replica_0', 'replica_1' and
+    so on, so they share the primary's engine options and are created
+    lazily like any other engine.
+    Views opt in with the 'read_only' decorator. Each request picks one
+    replica and uses it for all of its reads.
+    Replicas lag slightly behind the primary, so after a user writes
+    anything their reads stay on the primary for
+    'REPLICA_STICKY_SECONDS'. The time of the last write is kept in the
+    user's session cookie, which makes the stickiness work across worker
+    processes.
+    Without any replicas configured, every query goes to the primary.
+
+    Dependencies:
+    - functools.wraps: Preserves view metadata in the decorator.
+    - random: Spreads requests across replicas.
+    - time: Timestamps writes for read-your-writes stickiness.
+    - Flask: Provides the request globals and session used for routing.
+    - Flask-SQLAlchemy: Provides the session and extension being extended.
+    - sqlalchemy: Provides the session events used to detect writes.
+"""
+import random
+import time
+from functools import wraps
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy import SQLAlchemy, SignallingSession, get_state
+from sqlalchemy import event, orm
+
+
+# Session cookie key holding the time of the user's last write
+LAST_WRITE_KEY = "_db_write_at"
+
+
+def replica_binds(app):
+    """
+    Return the names of the replica binds configured for an application.
+    """
+    return [bind for bind in (app.config.get("SQLALCHEMY_BINDS") or {})
+            if bind.startswith("replica_")]
+
+
+def init_app(app):
+    """
+    Register the configured replicas as database binds.
+
+    Args:
+        app (Flask): The application being configured.
+    """
+    binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+    replica_urls = app.config.get("DATABASE_REPLICA_URLS", ())
+    for index, url in enumerate(replica_urls):
+        binds[f"replica_{index}"] = url
+    app.config["SQLALCHEMY_BINDS"] = binds or None
+
+    app.after_request(_remember_write)
+
+
+def read_only(view):
+    """
+    Mark a view as safe to serve from a read replica.
+
+    Description:
+        Only GET and HEAD requests are routed to replicas, so a view that
+        also handles form posts still writes to the primary.
+    """
+    @wraps(view)
+    def decorated_view(*args, **kwargs):
+        if request.method in ("GET", "HEAD"):
+            g.db_read_only = True
+        return view(*args, **kwargs)
+    return decorated_view
+
+
+def _use_replica():
+    """
+    Decide whether the current query may be sent to a replica.
+    """
+    if not has_request_context() or not g.get("db_read_only"):
+        return False
+    sticky = current_app.config["REPLICA_STICKY_SECONDS"]
+    return time.time() - session.get(LAST_WRITE_KEY, 0) >= sticky
+
+
+class RoutingSession(SignallingSession):
+    """
+    Session that sends the reads of read-only views to a replica.
+    """
+
+    def get_bind(self, mapper=None, clause=None):
+        if not self._flushing and _use_replica():
+            binds = replica_binds(self.app)
+            if binds:
+                if "db_replica" not in g:
+                    g.db_replica = random.choice(binds)
+                return get_state(self.app).db.get_engine(
+                    self.app, bind=g.db_replica)
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """
+    Flask-SQLAlchemy extension whose sessions route reads to replicas.
+    """
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+def _mark_write():
+    """
+    Note that the current request has written to the database.
+    """
+    if has_request_context():
+        g.db_wrote = True
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _record_flush(db_session, flush_context):
+    _mark_write()
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _record_bulk_write(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_write()
+
+
+def _remember_write(response):
+    """
+    Store the time of the request's writes in the user's session.
+    """
+    if g.get("db_wrote"):
+        session[LAST_WRITE_KEY] = time.time()
+    return response
@@ -0,0 +1,302 @@
+"""
+QuickNote Revisions Module
+
+Description:
+    This module keeps the revision history of edited notes, so an earlier
+    version of a note can be looked at or restored.
+    A note's history starts with its first edit: the version being
+    replaced is stored as revision 1, and every edit after that adds the
+    next revision. Notes that are never edited store no history at all.
+    Most revisions only store the difference from the revision before
+    them, as a list of operations found by comparing the words of the two
+    versions with 'difflib': a number copies that many characters of the
+    previous content, a negative number skips them and a string is
+    inserted. The list is compressed with zlib, so a revision costs
+    roughly the size of the edit rather than of the note.
+    Every 'REVISION_SNAPSHOT_INTERVAL' revisions, and whenever the delta
+    would be larger or the edit rewrote most of the note, the whole
+    content is stored instead, so rebuilding a revision reads at most
+    that many rows. Titles are short and are stored in full with every
+    revision.
+    Edits made through the ORM are recorded automatically by a session
+    event, including restores, which become new revisions. Code that
+    deletes notes with bulk DELETE statements must call
+    'delete_revisions' itself.
+
+    Dependencies:
+    - difflib: Finds the differences between revisions.
+    - json, re, zlib: Split, encode and compress revisions.
+    - datetime: Timestamps revisions.
+    - Flask: Provides the application settings.
+    - sqlalchemy: Provides the statements and session events.
+    - quicknote.models: Contains the Note and NoteRevision models.
+"""
+import difflib
+import json
+import re
+import zlib
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import case, delete, event, func, inspect, select, text
+from sqlalchemy.orm import Session
+from quicknote.models import Note, NoteRevision
+
+
+# Revisions between full copies when the setting is not available
+DEFAULT_SNAPSHOT_INTERVAL = 10
+
+# Words and the spaces between them, the units compared by 'make_delta'
+WORDS = re.compile(r"\s+|\S+")
+
+# Largest product of the changed words of two versions worth comparing;
+# bigger rewrites are saved as snapshots, as comparing them is slow
+MAX_DELTA_WORK = 40000
+
+
+def _snapshot_interval():
+    if has_app_context():
+        return current_app.config["REVISION_SNAPSHOT_INTERVAL"]
+    return DEFAULT_SNAPSHOT_INTERVAL
+
+
+def _pack(value):
+    return zlib.compress(
+        json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+
+def _unpack(data):
+    return json.loads(zlib.decompress(data).decode("utf-8"))
+
+
+def _common_prefix(old, new):
+    size = min(len(old), len(new))
+    index = 0
+    while index < size and old[index] == new[index]:
+        index += 1
+    return index
+
+
+def make_delta(old, new):
+    """
+    List the operations that turn one content into another.
+
+    Args:
+        old (str): The previous content.
+        new (str): The new content.
+
+    Description:
+        The unchanged start and end are copied first, so only the edited
+        middle is compared. It is compared word by word, which is much
+        cheaper than comparing characters, and still stores little more
+        than the words that changed.
+
+    Returns:
+        list: Numbers of characters to copy (positive) or skip (negative),
+        and strings to insert, in order, or None if the changed part is
+        too large to compare quickly.
+    """
+    prefix = _common_prefix(old, new)
+    suffix = _common_prefix(old[prefix:][::-1], new[prefix:][::-1])
+    old_words = WORDS.findall(old[prefix:len(old) - suffix])
+    new_words = WORDS.findall(new[prefix:len(new) - suffix])
+    if len(old_words) * len(new_words) > MAX_DELTA_WORK:
+        return None
+
+    operations = [prefix] if prefix else []
+    matcher = difflib.SequenceMatcher(None, old_words, new_words,
+                                      autojunk=False)
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        removed = sum(len(word) for word in old_words[old_start:old_end])
+        if tag == "equal":
+            operations.append(removed)
+            continue
+        if tag in ("delete", "replace"):
+            operations.append(-removed)
+        if tag in ("insert", "replace"):
+            operations.append("".join(new_words[new_start:new_end]))
+    if suffix:
+        operations.append(suffix)
+    return operations
+
+
+def apply_delta(old, operations):
+    """
+    Rebuild a content from the previous one and a delta.
+    """
+    parts = []
+    position = 0
+    for operation in operations:
+        if isinstance(operation, str):
+            parts.append(operation)
+        elif operation > 0:
+            parts.append(old[position:position + operation])
+            position += operation
+        else:
+            position -= operation
+    return "".join(parts)
+
+
+def _revision_row(note_id, number, title, old, new, snapshot, created_at):
+    """
+    Build the revision storing 'new', as a delta from 'old' when smaller.
+    """
+    data = _pack(new or "")
+    if not snapshot:
+        operations = make_delta(old or "", new or "")
+        delta = _pack(operations) if operations is not None else data
+        if len(delta) < len(data):
+            data = delta
+        else:
+            snapshot = True
+    return NoteRevision(note_id=note_id, revision=number, note_title=title,
+                        is_snapshot=snapshot, data=data,
+                        size=len(new or ""), created_at=created_at)
+
+
+def _previous(connection, note, attribute):
+    """
+    Return the value an attribute of a dirty note had before this flush.
+    """
+    history = inspect(note).attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    # The attribute was set without being loaded first
+    column = Note.__table__.c[attribute]
+    return connection.execute(
+        select(column).where(Note.__table__.c.id == note.id)).scalar()
+
+
+def _text_changed(note):
+    state = inspect(note)
+    return (state.attrs.note_title.history.has_changes()
+            or state.attrs.note_content.history.has_changes())
+
+
+@event.listens_for(Session, "before_flush")
+def _record_revisions(session, flush_context, instances):
+    """
+    Add a revision for every note whose title or content is changing.
+
+    Description:
+        This session event runs before every flush. The latest revision
+        of an edited note always holds the content being replaced, so the
+        new revision's delta is taken from the note's own attribute
+        history without rebuilding anything. Revisions of deleted notes
+        are removed, as SQLite does not enforce the foreign key cascade.
+    """
+    edited = [note for note in session.dirty
+              if isinstance(note, Note) and note.id is not None
+              and session.is_modified(note) and _text_changed(note)]
+    deleted = [note.id for note in session.deleted
+               if isinstance(note, Note) and note.id is not None]
+    if not edited and not deleted:
+        return
+
+    connection = session.connection(mapper=Note.__mapper__)
+    if deleted:
+        delete_revisions(connection, note_ids=deleted)
+
+    table = NoteRevision.__table__
+    interval = _snapshot_interval()
+    now = datetime.now()
+    for note in edited:
+        latest, last_snapshot = connection.execute(
+            select(func.max(table.c.revision),
+                   func.max(case((table.c.is_snapshot, table.c.revision))))
+            .where(table.c.note_id == note.id)).one()
+        old_content = _previous(connection, note, "note_content")
+
+        if latest is None:
+            # The first edit keeps the version it replaces
+            session.add(_revision_row(
+                note.id, 1, _previous(connection, note, "note_title"),
+                None, old_content, True,
+                _previous(connection, note, "note_date") or now))
+            latest = last_snapshot = 1
+
+        number = latest + 1
+        session.add(_revision_row(
+            note.id, number, note.note_title, old_content,
+            note.note_content, number - last_snapshot >= interval, now))
+
+
+def delete_revisions(connection, user_id=None, note_ids=None):
+    """
+    Remove the revisions of notes deleted without the ORM.
+
+    Args:
+        connection: The database connection of the current transaction.
+        user_id (int, optional): Remove the revisions of all of this
+        user's notes. Must run before the notes themselves are deleted.
+        note_ids (list, optional): Remove the revisions of these notes.
+    """
+    table = NoteRevision.__table__
+    if user_id is not None:
+        connection.execute(text(
+            "DELETE FROM note_revision WHERE note_id IN "
+            "(SELECT id FROM note WHERE user_id = :user_id)"),
+            {"user_id": user_id})
+    elif note_ids:
+        connection.execute(delete(table).where(
+            table.c.note_id.in_(note_ids)))
+
+
+def list_revisions(note_id, before=None, limit=50):
+    """
+    List the revisions of a note, newest first, without their contents.
+
+    Args:
+        note_id (int): The note.
+        before (int, optional): Only list revisions older than this one.
+        limit (int): The most revisions to return.
+
+    Returns:
+        tuple: The revisions, with only their numbers, titles, sizes,
+        kinds and dates loaded, and whether older ones exist.
+    """
+    query = NoteRevision.query.with_entities(
+        NoteRevision.revision, NoteRevision.note_title, NoteRevision.size,
+        NoteRevision.is_snapshot, NoteRevision.created_at
+    ).filter(NoteRevision.note_id == note_id)
+    if before is not None:
+        query = query.filter(NoteRevision.revision < before)
+    rows = query.order_by(NoteRevision.revision.desc()).limit(
+        limit + 1).all()
+    return rows[:limit], len(rows) > limit
+
+
+def load_revision(note_id, number):
+    """
+    Rebuild one revision of a note.
+
+    Args:
+        note_id (int): The note.
+        number (int): The revision number.
+
+    Description:
+        The revisions from the nearest snapshot up to the requested one
+        are read with one query through the (note_id, revision) index and
+        applied in order.
+
+    Returns:
+        tuple: The revision's title and content, or None if the note has
+        no such revision.
+    """
+    snapshot = select(func.max(NoteRevision.revision)).where(
+        NoteRevision.note_id == note_id, NoteRevision.is_snapshot,
+        NoteRevision.revision <= number).scalar_subquery()
+    rows = NoteRevision.query.filter(
+        NoteRevision.note_id == note_id,
+        NoteRevision.revision >= snapshot,
+        NoteRevision.revision <= number
+    ).order_by(NoteRevision.revision).all()
+    if not rows or rows[-1].revision != number:
+        return None
+
+    content = ""
+    for row in rows:
+        value = _unpack(row.data)
+        content = value if row.is_snapshot else apply_delta(content, value)
+    return rows[-1].note_title, content
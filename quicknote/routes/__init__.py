@@ -0,0 +1,32 @@
+"""
+QuickNote Routes Package
+
+Description:
+    This package contains the blueprints that make up the QuickNote
+    application's routes:
+    - auth: User registration, login and logout.
+    - notes: Listing, searching, creating, editing and deleting notes.
+    - account: Viewing, editing and deleting the user's account.
+    - metrics: The local performance metrics endpoint.
+    - api: The versioned JSON API for notes.
+"""
+
+
+def register_blueprints(app):
+    """
+    Register every QuickNote blueprint on an application.
+
+    Args:
+        app (Flask): The application being configured.
+    """
+    from quicknote.routes.auth import auth
+    from quicknote.routes.notes import notes_bp
+    from quicknote.routes.account import account
+    from quicknote.routes.metrics import metrics_bp
+    from quicknote.routes.api import api
+
+    app.register_blueprint(auth)
+    app.register_blueprint(notes_bp)
+    app.register_blueprint(account)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(api)
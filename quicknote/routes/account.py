@@ -0,0 +1,233 @@
+"""
+QuickNote Account Routes
+
+Description:
+    This module defines the 'account' blueprint of the QuickNote application,
+    containing the routes for viewing, editing and deleting a user account,
+    and for exporting and importing the account's notes.
+
+    Dependencies:
+    - Flask: A web framework for building the application.
+    - Flask-Login: A Flask extension for managing user sessions and
+    authentication.
+    - quicknote.fragments: Drops cached notes pages after changes.
+    - quicknote.models: Contains the data model for users.
+    - quicknote.purge: Deletes accounts and their notes in bulk.
+    - quicknote.replicas: Serves read-only views from database replicas.
+    - quicknote.transfer: Exports and imports notes.
+    - quicknote.user_cache: Drops changed users from the user cache.
+"""
+from flask import (Blueprint, render_template, request, flash, redirect,
+                   url_for, abort)
+from flask_login import login_required, logout_user, current_user
+from quicknote import db
+from quicknote.fragments import invalidate_notes
+from quicknote.models import User
+from quicknote.replicas import read_only
+from quicknote.transfer import (FORMATS, InvalidUpload, export_response,
+                                format_for, import_notes)
+from quicknote.user_cache import invalidate_user
+
+
+account = Blueprint("account", __name__)
+
+
+@account.route("/user_management")
+@login_required
+@read_only
+def user_management():
+    """
+    User Management View
+
+    Description:
+        This view function displays the user management page, ensuring that the
+        user is logged in.
+        It renders the 'user_management.html' template,
+        providing options for user-related management.
+
+    Returns:
+        The 'user_management.html' template with the 'current_user'
+        context for user-specific actions.
+    """
+    # Render the user management page template with the current user's context
+    return render_template("user_management.html", user=current_user)
+
+
+@account.route("/delete_user/<int:user_id>", methods=['GET'])
+@login_required
+def delete_user(user_id):
+    """
+    Delete User Account
+
+    Args:
+        user_id (int): The unique identifier of the user account to be deleted.
+
+    Description:
+        This view function allows the deletion of a user account and associated
+        notes.
+        Notes are removed with bulk DELETE statements rather than one at a
+        time. Accounts with very many notes are locked and then purged in
+        chunks by a background job.
+        It first confirms if the uservattempting the deletion is the currently
+        logged-in user.
+        If the condition is met, it proceeds to delete thevspecified user
+        account and associated notes.
+        If not authorized, it displays an error message and redirects to the
+        home page.
+
+    Returns:
+        - A redirection to the 'home' view after successful deletion.
+        - An error message and redirection to the 'home' view in case of
+        unauthorized deletion attempts.
+    """
+    # Check if the user attempting deletion is the currently logged-in user
+    if current_user.id == user_id:
+        from quicknote.purge import (delete_account, is_large_account,
+                                     start_background_purge)
+
+        User.query.get_or_404(user_id)
+
+        # Delete the user's account and associated data (like notes) with
+        # set-based statements, handing very large accounts to a background
+        # purge job so the request is not held up
+        if is_large_account(user_id):
+            start_background_purge(user_id)
+        else:
+            delete_account(user_id)
+        invalidate_notes(user_id)
+
+        # Log out the user after deleting their account
+        logout_user()
+
+        # Flash a message to inform the user about the deletion
+        flash(
+            "Your account and associated notes have been"
+            "successfully deleted.", category="success")
+
+        return redirect(url_for("auth.home"))
+    else:
+        # Handle unauthorized deletion attempts
+        flash("You are not authorized to delete this user account.")
+        return redirect(url_for("auth.home"))
+
+
+@account.route("/edit_user/<int:user_id>", methods=["GET", "POST"])
+@login_required
+def edit_user(user_id):
+    """
+    Edit details of a specific user.
+
+    Args:
+        user_id (int): The ID of the user to be edited.
+
+    Returns:
+        If the request method is POST:
+            - If the user details are successfully updated, redirects to
+            user management page.
+            - If the first name or last name is too short, redirects to the
+            user management page with an error message.
+        If the request method is GET:
+            - Renders the edit_user.html template with the
+            current user's details.
+
+    """
+    # Fetch the user from the database with the given user_id
+    user = User.query.get_or_404(user_id)
+
+    if request.method == "POST":
+        # Update user details with the form data
+        user.first_name = request.form.get("first_name")
+        user.last_name = request.form.get("last_name")
+
+        # Validate the length of the first name and last name
+        if not user.first_name or len(user.first_name.strip()) < 2:
+            flash("First name is too short!", category="error")
+            return redirect(
+                url_for("account.user_management"))
+
+        elif not user.last_name or len(user.last_name.strip()) < 2:
+            flash("Last name is too short!", category="error")
+            return redirect(
+                url_for("account.user_management"))
+
+        elif len(user.first_name.strip()) > 30:
+            flash("First name is too long!", category="error")
+            return redirect(
+                url_for("account.user_management"))
+
+        elif len(user.last_name.strip()) > 30:
+            flash("Last name is too long!", category="error")
+            return redirect(
+                url_for("account.user_management"))
+
+        else:
+            # If the details are valid, commit changes to the database
+            db.session.commit()
+            invalidate_user(user_id)
+            flash("User names updated successfully!", category="success")
+            return redirect(url_for("account.user_management"))
+
+    # Render the edit_user.html template with the current user's details
+    # for a GET request
+    return render_template("edit_user.html", user=current_user)
+
+
+@account.route("/export/<fmt>")
+@login_required
+@read_only
+def export_notes(fmt):
+    """
+    Download all of the authenticated user's notes.
+
+    Args:
+        fmt (str): The file format: 'ndjson', 'csv' or 'markdown'.
+
+    Description:
+        The file is streamed while the notes are read, so accounts of any
+        size can be exported without holding all of their notes in memory.
+
+    Returns:
+        A streaming file download, or a 404 error for unknown formats.
+    """
+    if fmt not in FORMATS:
+        abort(404)
+    return export_response(current_user.id, fmt)
+
+
+@account.route("/import", methods=["POST"])
+@login_required
+def import_user_notes():
+    """
+    Import notes from an uploaded export file.
+
+    Description:
+        This view function adds the notes in the uploaded 'notes_file' to
+        the authenticated user's notes. The format is taken from the file
+        name. Notes that fail validation are skipped, and the user is told
+        how many notes were imported and skipped.
+
+    Returns:
+        A redirection to the user management page.
+    """
+    upload = request.files.get("notes_file")
+    fmt = format_for(upload.filename) if upload else None
+    if fmt is None:
+        flash("Please choose a .ndjson, .csv or .zip export file.",
+              category="error")
+        return redirect(url_for("account.user_management"))
+
+    try:
+        imported, errors = import_notes(current_user.id, upload.stream, fmt)
+    except InvalidUpload as error:
+        flash(str(error), category="error")
+        return redirect(url_for("account.user_management"))
+    finally:
+        # Batches saved before a failure are kept
+        invalidate_notes(current_user.id)
+
+    flash(f"Imported {imported} notes.", category="success")
+    if errors:
+        number, message = errors[0]
+        flash(f"Skipped {len(errors)} invalid notes, the first at "
+              f"note {number}: {message}", category="error")
+    return redirect(url_for("account.user_management"))
@@ -0,0 +1,596 @@
+"""
+QuickNote API Routes
+
+Description:
+    This module defines the 'api' blueprint of the QuickNote application,
+    a versioned JSON API under '/api/v1' for integrations and mobile
+    clients.
+    Notes are created, updated and deleted in batches: each request
+    carries a list of notes, every note in it is validated before anything
+    is written, and the whole batch is committed in one transaction. If
+    any note is invalid the response lists the problems and nothing is
+    saved.
+    New and updated notes go through the ORM unit of work, which sends
+    rows with the same columns in batched executemany statements and keeps
+    the search index up to date. Deletes are single set-based statements.
+    Offline clients keep up to date through '/api/v1/sync', which returns
+    only the notes changed and deleted since the client's last sync.
+    The revision history of a note is listed under
+    '/api/v1/notes/<id>/revisions', and any revision can be read or
+    restored. Background jobs queued for the user can be polled at
+    '/api/v1/jobs/<id>'.
+    Notes carry their 'folder' and 'tags', the notes list can be limited
+    to one folder or tag, and '/api/v1/folders' and '/api/v1/tags' list
+    them with their note counts.
+    Requests are authenticated with the same session cookie as the web
+    pages; unauthenticated requests get a 401 response rather than a
+    redirect to the login page. Responses are compact JSON, and errors are
+    reported as '{"error": ...}'.
+
+    Dependencies:
+    - datetime: Parses and sets note dates.
+    - io: Buffers uploaded zip archives.
+    - Flask: A web framework for building the application.
+    - Flask-Login: Provides the authenticated user.
+    - sqlalchemy.orm.undefer: Loads note contents with the notes.
+    - werkzeug.exceptions: Turns HTTP errors into JSON responses.
+    - quicknote.fragments: Drops cached notes pages after changes.
+    - quicknote.jobs: Describes background jobs for status polling.
+    - quicknote.models: Contains the data models for notes and jobs.
+    - quicknote.pagination: Splits the notes list into keyset pages.
+    - quicknote.replicas: Serves read-only views from database replicas.
+    - quicknote.revisions: Lists, rebuilds and cleans up note revisions.
+    - quicknote.search: Removes deleted notes from the search index.
+    - quicknote.sync: Records deletions and reads the change feed.
+    - quicknote.tags: Files notes in folders and tags, and lists them.
+    - quicknote.transfer: Exports and imports notes.
+    - quicknote.validation: Checks note titles and contents, folders and
+      tags.
+"""
+import io
+from datetime import datetime
+from flask import Blueprint, abort, current_app, jsonify, request
+from flask_login import current_user
+from sqlalchemy.orm import undefer
+from werkzeug.exceptions import HTTPException
+from quicknote import db
+from quicknote.fragments import invalidate_notes
+from quicknote.jobs import job_status
+from quicknote.models import Job, Note
+from quicknote.pagination import InvalidCursor, apply_keyset, split_page
+from quicknote.replicas import read_only
+from quicknote.revisions import (delete_revisions, list_revisions,
+                                 load_revision)
+from quicknote.search import unindex_notes
+from quicknote.sync import changes_since, record_deletions
+from quicknote.tags import (clean_name, clean_tags, filtered_page,
+                            find_filter, folder_for, label_counts,
+                            note_labels, set_tags, untag_notes)
+from quicknote.transfer import (FORMATS, InvalidUpload, export_response,
+                                import_notes)
+from quicknote.validation import labels_error, note_error
+
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+# Largest number of notes a list request may ask for
+MAX_PAGE_SIZE = 1000
+
+# Ids per IN (...) clause, below the bound parameter limit of older SQLite
+ID_CHUNK_SIZE = 500
+
+
+@api.before_request
+def require_login():
+    """
+    Reject API requests that are not authenticated.
+    """
+    if not current_user.is_authenticated:
+        abort(401)
+
+
+@api.errorhandler(HTTPException)
+def json_error(error):
+    """
+    Report HTTP errors raised by the API views as JSON.
+    """
+    return jsonify(error=error.description), error.code
+
+
+def _unprocessable(errors):
+    """
+    Return the response for a batch containing invalid notes.
+    """
+    return jsonify(error="Invalid notes", errors=errors), 422
+
+
+def note_json(note, labels):
+    """
+    Build the JSON representation of a note.
+
+    Args:
+        note (Note): The note.
+        labels (dict): The folders and tags of the notes being returned,
+        from 'quicknote.tags.note_labels'.
+    """
+    return {
+        "id": note.id,
+        "title": note.note_title,
+        "content": note.note_content,
+        "date": note.note_date.isoformat() if note.note_date else None,
+        "seq": note.change_seq,
+        "folder": labels[note.id]["folder"],
+        "tags": labels[note.id]["tags"],
+    }
+
+
+def notes_json(notes):
+    """
+    Build the JSON representations of several notes.
+    """
+    labels = note_labels(db.session, notes)
+    return [note_json(note, labels) for note in notes]
+
+
+def _labels(item):
+    """
+    Read the folder and tags of a note in a batch.
+
+    Returns:
+        tuple: The folder name, the list of tags and a message describing
+        the first problem found, or None.
+    """
+    folder = clean_name(item.get("folder"))
+    tags = clean_tags(item.get("tags", []))
+    return folder, tags, labels_error(folder, tags)
+
+
+def _batch(key):
+    """
+    Read the list held under 'key' in the JSON request body.
+
+    Description:
+        Aborts with a 400 error if the body is not a JSON object holding a
+        list, or if the list is longer than the 'API_MAX_BATCH' setting.
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or not isinstance(body.get(key), list):
+        abort(400, f"Expected a JSON object with a '{key}' list")
+
+    items = body[key]
+    if len(items) > current_app.config["API_MAX_BATCH"]:
+        abort(413, f"At most {current_app.config['API_MAX_BATCH']} notes "
+                   "may be sent in one request")
+    return items
+
+
+def _chunks(items, size=ID_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _item_id(item):
+    """
+    Return the integer 'id' of a note in a batch, or None if it has none.
+
+    Description:
+        JSON true and false are read as bools, which are ints in Python,
+        so the type is compared exactly.
+    """
+    if isinstance(item, dict) and type(item.get("id")) is int:
+        return item["id"]
+    return None
+
+
+def _user_notes(note_ids):
+    """
+    Load the authenticated user's notes with the given ids.
+
+    Returns:
+        dict: The notes found, keyed by id.
+    """
+    notes = {}
+    for chunk in _chunks(note_ids):
+        for note in Note.query.options(undefer(Note.note_content)).filter(
+                Note.user_id == current_user.id, Note.id.in_(chunk)):
+            notes[note.id] = note
+    return notes
+
+
+def _user_note(note_id):
+    """
+    Load one of the authenticated user's notes, or abort with a 404 error.
+    """
+    return Note.query.options(undefer(Note.note_content)).filter_by(
+        id=note_id, user_id=current_user.id).first_or_404()
+
+
+@api.route("/notes", methods=["GET"])
+@read_only
+def list_notes():
+    """
+    List the authenticated user's notes, newest first.
+
+    Description:
+        The list is paginated with the same keyset cursors as the notes
+        page. The 'limit' query argument sets the page size, up to
+        'MAX_PAGE_SIZE', and defaults to the 'NOTES_PAGE_SIZE' setting.
+        A 'folder' or 'tag' query argument limits the list to the notes in
+        that folder or with that tag.
+
+    Returns:
+        JSON with the 'notes' on the page and the 'next_cursor', which is
+        null on the last page.
+    """
+    limit = request.args.get(
+        "limit", current_app.config["NOTES_PAGE_SIZE"], type=int)
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    cursor = request.args.get("cursor")
+    list_filter = find_filter(db.session, current_user.id, request.args)
+    try:
+        if list_filter is not None:
+            notes, next_cursor = filtered_page(
+                db.session, current_user.id, list_filter, cursor, limit,
+                options=[undefer(Note.note_content)])
+        else:
+            query = apply_keyset(
+                Note.query.options(undefer(Note.note_content)).filter_by(
+                    user_id=current_user.id), cursor, limit)
+            notes, next_cursor = split_page(query.all(), limit)
+    except InvalidCursor:
+        abort(400, "Invalid cursor")
+
+    return jsonify(notes=notes_json(notes), next_cursor=next_cursor)
+
+
+@api.route("/notes/<int:note_id>", methods=["GET"])
+@read_only
+def get_note(note_id):
+    """
+    Return one of the authenticated user's notes.
+    """
+    return jsonify(notes_json([_user_note(note_id)])[0])
+
+
+@api.route("/notes", methods=["POST"])
+def create_notes():
+    """
+    Create a batch of notes.
+
+    Description:
+        The request body is '{"notes": [...]}', where each note has a
+        'title', a 'content' and optionally an ISO 8601 'date', a
+        'folder' name and a list of 'tags'.
+
+    Returns:
+        JSON with the 'ids' of the new notes, in the order they were sent,
+        and a 201 status. A 422 response lists the invalid notes.
+    """
+    items = _batch("notes")
+
+    notes, labels, errors = [], [], []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({"index": index, "error": "Expected an object"})
+            continue
+        folder, tags, labels_problem = _labels(item)
+        error = (note_error(item.get("title"), item.get("content"))
+                 or labels_problem)
+        note_date = None
+        if not error and item.get("date") is not None:
+            try:
+                note_date = datetime.fromisoformat(item["date"])
+            except (TypeError, ValueError):
+                error = "Date is not valid!"
+            else:
+                # Dates are stored as naive local times
+                if note_date.tzinfo is not None:
+                    note_date = note_date.astimezone().replace(tzinfo=None)
+        if error:
+            errors.append({"index": index, "error": error})
+            continue
+        notes.append(Note(note_title=item["title"],
+                          note_content=item["content"],
+                          note_date=note_date or datetime.now(),
+                          user_id=current_user.id))
+        labels.append((folder, tags))
+    if errors:
+        return _unprocessable(errors)
+
+    # Each folder is looked up once for the whole batch
+    folders = {}
+    for note, (folder, _) in zip(notes, labels):
+        if folder not in folders:
+            folders[folder] = folder_for(db.session, current_user.id, folder)
+        note.folder_id = folders[folder]
+    db.session.add_all(notes)
+    db.session.flush()
+    for note, (_, tags) in zip(notes, labels):
+        if tags:
+            set_tags(db.session, note, tags)
+    # Read the ids before committing, which expires the notes
+    ids = [note.id for note in notes]
+    db.session.commit()
+    invalidate_notes(current_user.id)
+    return jsonify(ids=ids), 201
+
+
+@api.route("/notes", methods=["PATCH"])
+def update_notes():
+    """
+    Update a batch of notes.
+
+    Description:
+        The request body is '{"notes": [...]}', where each note has its
+        'id' and the new 'title', 'content', 'folder' (null for none)
+        and/or list of 'tags'. As when a note is edited on its page, each
+        updated note's date is set to now, which moves it to the top of
+        the list.
+
+    Returns:
+        JSON with the number of notes 'updated'. A 422 response lists the
+        invalid notes, including ids that are not the user's notes.
+    """
+    items = _batch("notes")
+
+    ids = [_item_id(item) for item in items if _item_id(item) is not None]
+    notes = _user_notes(ids)
+
+    now = datetime.now()
+    errors = []
+    for index, item in enumerate(items):
+        note = notes.get(_item_id(item))
+        if note is None:
+            errors.append({"index": index, "error": "Note not found"})
+            continue
+        note_title = item.get("title", note.note_title)
+        note_content = item.get("content", note.note_content)
+        folder, tags, labels_problem = _labels(item)
+        error = note_error(note_title, note_content) or labels_problem
+        if error:
+            errors.append({"index": index, "error": error})
+            continue
+        note.note_title = note_title
+        note.note_content = note_content
+        note.note_date = now
+        if "folder" in item:
+            note.folder_id = folder_for(db.session, current_user.id, folder)
+        if "tags" in item:
+            set_tags(db.session, note, tags)
+    if errors:
+        db.session.rollback()
+        return _unprocessable(errors)
+
+    db.session.commit()
+    invalidate_notes(current_user.id)
+    return jsonify(updated=len(items))
+
+
+@api.route("/notes", methods=["DELETE"])
+def delete_notes():
+    """
+    Delete a batch of notes.
+
+    Description:
+        The request body is '{"ids": [...]}'. Ids that do not belong to the
+        user's notes are ignored, so repeating a delete is harmless.
+
+    Returns:
+        JSON with the number of notes 'deleted'.
+    """
+    ids = [note_id for note_id in _batch("ids") if type(note_id) is int]
+
+    deleted = 0
+    connection = db.session.connection()
+    for chunk in _chunks(ids):
+        owned = [note_id for note_id, in db.session.query(Note.id).filter(
+            Note.user_id == current_user.id, Note.id.in_(chunk))]
+        if not owned:
+            continue
+        unindex_notes(connection, note_ids=owned)
+        delete_revisions(connection, note_ids=owned)
+        untag_notes(connection, note_ids=owned)
+        record_deletions(connection, current_user.id, owned)
+        deleted += Note.query.filter(Note.id.in_(owned)).delete(
+            synchronize_session=False)
+    db.session.commit()
+    invalidate_notes(current_user.id)
+
+    return jsonify(deleted=deleted)
+
+
+@api.route("/notes/<int:note_id>/revisions", methods=["GET"])
+@read_only
+def note_revisions(note_id):
+    """
+    List the revisions of one of the authenticated user's notes.
+
+    Description:
+        Revisions are listed newest first, without their contents. The
+        'limit' query argument sets the page size, up to 'MAX_PAGE_SIZE',
+        and 'before' continues the list below a revision number.
+
+    Returns:
+        JSON with the 'revisions' and whether older ones exist
+        ('has_more'). A note that was never edited has no revisions.
+    """
+    _user_note(note_id)
+    limit = request.args.get(
+        "limit", current_app.config["NOTES_PAGE_SIZE"], type=int)
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    revisions, has_more = list_revisions(
+        note_id, request.args.get("before", type=int), limit)
+
+    return jsonify(revisions=[
+        {"revision": revision.revision,
+         "title": revision.note_title,
+         "size": revision.size,
+         "snapshot": revision.is_snapshot,
+         "date": (revision.created_at.isoformat()
+                  if revision.created_at else None)}
+        for revision in revisions], has_more=has_more)
+
+
+@api.route("/notes/<int:note_id>/revisions/<int:revision>",
+           methods=["GET"])
+@read_only
+def get_revision(note_id, revision):
+    """
+    Return the title and content of one revision of a note.
+    """
+    _user_note(note_id)
+    found = load_revision(note_id, revision)
+    if found is None:
+        abort(404)
+    return jsonify(revision=revision, title=found[0], content=found[1])
+
+
+@api.route("/notes/<int:note_id>/revisions/<int:revision>/restore",
+           methods=["POST"])
+def restore_revision(note_id, revision):
+    """
+    Restore a note to one of its revisions.
+
+    Description:
+        The note gets the revision's title and content and, as when it is
+        edited, the current date. The restored version is saved as a new
+        revision, so the history is never rewritten.
+
+    Returns:
+        JSON with the restored note.
+    """
+    note = _user_note(note_id)
+    found = load_revision(note_id, revision)
+    if found is None:
+        abort(404)
+
+    note.note_title, note.note_content = found
+    note.note_date = datetime.now()
+    db.session.commit()
+    invalidate_notes(current_user.id)
+    return jsonify(notes_json([note])[0])
+
+
+@api.route("/sync", methods=["GET"])
+@read_only
+def sync():
+    """
+    Return the changes to the authenticated user's notes since a cursor.
+
+    Description:
+        The 'cursor' query argument is the 'cursor' returned by the
+        previous sync, or 0 (the default) to download every note. Changes
+        are returned in batches of up to 'limit' changes, which defaults
+        to the 'SYNC_BATCH_SIZE' setting; while 'has_more' is true the
+        client should sync again straight away with the new cursor.
+
+    Returns:
+        JSON with the changed 'notes', the ids of 'deleted' notes, the
+        next 'cursor' and 'has_more'.
+    """
+    cursor = request.args.get("cursor", 0, type=int)
+    limit = request.args.get(
+        "limit", current_app.config["SYNC_BATCH_SIZE"], type=int)
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    if cursor < 0:
+        abort(400, "Invalid cursor")
+
+    notes, deleted, next_cursor, has_more = changes_since(
+        current_user.id, cursor, limit)
+
+    return jsonify(notes=notes_json(notes), deleted=deleted,
+                   cursor=next_cursor, has_more=has_more)
+
+
+@api.route("/folders", methods=["GET"])
+@read_only
+def list_folders():
+    """
+    List the authenticated user's folders that hold notes.
+
+    Returns:
+        JSON with the 'folders', each with its 'name' and note 'count',
+        sorted by name.
+    """
+    folders, _ = label_counts(db.session, current_user.id)
+    return jsonify(folders=[{"name": name, "count": count}
+                            for name, count in folders])
+
+
+@api.route("/tags", methods=["GET"])
+@read_only
+def list_tags():
+    """
+    List the authenticated user's tags that are in use.
+
+    Returns:
+        JSON with the 'tags', each with its 'name' and note 'count',
+        sorted by name.
+    """
+    _, tags = label_counts(db.session, current_user.id)
+    return jsonify(tags=[{"name": name, "count": count}
+                         for name, count in tags])
+
+
+def _format():
+    """
+    Read the export format from the 'format' query argument.
+    """
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in FORMATS:
+        abort(400, f"Unknown format '{fmt}'")
+    return fmt
+
+
+@api.route("/export", methods=["GET"])
+@read_only
+def export():
+    """
+    Stream all of the authenticated user's notes in the 'format' given
+    ('ndjson' by default, 'csv' or 'markdown').
+    """
+    return export_response(current_user.id, _format())
+
+
+@api.route("/import", methods=["POST"])
+def import_():
+    """
+    Import notes in the 'format' given from the raw request body.
+
+    Description:
+        The body is read as it arrives rather than buffered first, except
+        for 'markdown' zip archives, whose index is at the end of the file.
+        Notes are saved in batches, and invalid notes are skipped.
+
+    Returns:
+        JSON with the number of notes 'imported' and the 'errors' of the
+        skipped notes, each with its 1-based 'index' in the file.
+    """
+    fmt = _format()
+    stream = request.stream
+    if fmt == "markdown":
+        stream = io.BytesIO(request.get_data())
+
+    try:
+        imported, errors = import_notes(current_user.id, stream, fmt)
+    except InvalidUpload as error:
+        abort(400, str(error))
+    finally:
+        # Batches saved before a failure are kept
+        invalidate_notes(current_user.id)
+
+    return jsonify(imported=imported, errors=[
+        {"index": number, "error": message} for number, message in errors])
+
+
+@api.route("/jobs/<int:job_id>", methods=["GET"])
+def get_job(job_id):
+    """
+    Return the status of one of the authenticated user's background jobs.
+
+    Description:
+        Read from the primary database, as clients poll it while the job
+        changes.
+    """
+    return jsonify(job_status(Job.query.filter_by(
+        id=job_id, user_id=current_user.id).first_or_404()))
@@ -0,0 +1,481 @@
+"""
+QuickNote Async Views
+
+Description:
+    This module contains the async versions of the notes and auth views
+    served in ASGI mode (see 'quicknote.asgi'). Each view is registered
+    in 'ASYNC_VIEWS' under the endpoint of the WSGI view it replaces, so
+    URLs, templates, flash messages and redirects are the same in both
+    modes, and 'url_for' keeps working.
+    The views query the database with an 'AsyncSession' from
+    'quicknote.asgi.async_session' using the same models, and never touch
+    'db.session', whose scoped session would be shared by every request
+    running on the event loop. Session events, such as the change feed
+    numbering in 'quicknote.sync', run for async sessions too.
+    They share the WSGI views' caches and validation rules: the fragment
+    cache, conditional requests, the user cache and the password hashing
+    pool. Unlike the WSGI notes page, the async one is not streamed, as
+    the event loop is free while its notes are fetched.
+    Folders and tags are read and written by the same functions as in the
+    WSGI views, called through 'AsyncSession.run_sync'.
+
+    Dependencies:
+    - datetime: Stamps edited notes.
+    - functools.wraps: Preserves view metadata in the decorators.
+    - types.SimpleNamespace: Holds a rendered page of the notes list.
+    - Flask: Provides the request, templates, flash messages and
+      redirects.
+    - Flask-Login: Provides the authenticated user and logs users in and
+      out.
+    - sqlalchemy: Builds the queries.
+    - quicknote.asgi: Opens async database sessions.
+    - quicknote.conditional: Answers repeat page views with 304 responses.
+    - quicknote.fragments: Caches the rendered notes list.
+    - quicknote.models: Contains the User and Note models.
+    - quicknote.pagination: Splits the notes list into keyset pages.
+    - quicknote.passwords: Hashes and checks passwords off the event loop.
+    - quicknote.tags: Files notes in folders and tags, and lists them.
+    - quicknote.user_cache: Caches users who sign up or log in.
+    - quicknote.validation: Checks note titles and contents, folders and
+      tags, and signup details.
+"""
+from datetime import datetime
+from functools import wraps
+from types import SimpleNamespace
+from flask import (abort, current_app, flash, g, jsonify, make_response,
+                   redirect, render_template, request, url_for)
+from flask_login import current_user, login_user, logout_user
+from sqlalchemy import select
+from sqlalchemy.orm import load_only, undefer
+from quicknote.asgi import async_session
+from quicknote.conditional import applies, not_modified, set_validators
+from quicknote.fragments import cached_page, invalidate_notes, store_page
+from quicknote.models import Note, User
+from quicknote.pagination import (apply_keyset, split_page, decode_cursor,
+                                  InvalidCursor)
+from quicknote.passwords import check_password_async, hash_password_async
+from quicknote.tags import (clean_name, filtered_page, find_filter,
+                            folder_for, label_counts, note_labels,
+                            parse_tags, set_tags)
+from quicknote.user_cache import cache_user
+from quicknote.validation import labels_error, note_error, signup_error
+
+
+# Async views by the endpoint of the WSGI view they replace
+ASYNC_VIEWS = {}
+
+
+def async_view(endpoint):
+    """
+    Register a coroutine as the async view of an endpoint.
+    """
+    def register(view):
+        ASYNC_VIEWS[endpoint] = view
+        return view
+    return register
+
+
+def login_required(view):
+    """
+    Ask anonymous users to log in, like Flask-Login's 'login_required'.
+    """
+    @wraps(view)
+    async def decorated_view(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return current_app.login_manager.unauthorized()
+        return await view(*args, **kwargs)
+    return decorated_view
+
+
+def _wrote_notes():
+    """
+    Record a committed change to the user's notes.
+
+    Description:
+        Drops the user's cached list pages, and marks the request as a
+        write so WSGI views keep reading from the primary for a while
+        (see 'quicknote.replicas').
+    """
+    g.db_wrote = True
+    invalidate_notes(current_user.id)
+
+
+async def _notes_version(db_session, user_id):
+    """
+    Read the version of a user's notes, as 'quicknote.sync.notes_version'.
+    """
+    row = (await db_session.execute(
+        select(User.note_seq, User.notes_changed_at).where(
+            User.id == user_id))).first()
+    return (row.note_seq, row.notes_changed_at) if row else (0, None)
+
+
+async def _notes_list(db_session, cursor, list_filter=None):
+    """
+    Render a page of the user's notes list, using the fragment cache.
+
+    Args:
+        db_session (AsyncSession): The session to query.
+        cursor (str): The cursor of the previous page, or None.
+        list_filter (ListFilter, optional): The folder or tag the list is
+        limited to.
+
+    Returns:
+        tuple: The rendered list items and the cursor of the next page.
+        Aborts with a 400 error if the cursor is malformed.
+    """
+    if "notes_version" not in g:
+        g.notes_version = await _notes_version(db_session, current_user.id)
+
+    scope = list_filter.scope if list_filter is not None else ""
+    page = cached_page(current_user.id, cursor, scope)
+    if page is not None:
+        return page
+
+    limit = current_app.config["NOTES_PAGE_SIZE"]
+    if list_filter is not None:
+        try:
+            notes, next_cursor = await db_session.run_sync(
+                filtered_page, current_user.id, list_filter, cursor, limit)
+        except InvalidCursor:
+            abort(400)
+        return store_page(current_user.id, cursor, notes, next_cursor,
+                          scope=scope)
+
+    try:
+        statement = apply_keyset(
+            select(Note).options(
+                load_only(Note.id, Note.note_title, Note.note_date,
+                          Note.change_seq)
+            ).where(Note.user_id == current_user.id), cursor, limit)
+    except InvalidCursor:
+        abort(400)
+    rows = (await db_session.execute(statement)).scalars().all()
+    return store_page(current_user.id, cursor, *split_page(rows, limit))
+
+
+def _form_labels():
+    """
+    Read and check the folder and tags entered in a note form.
+
+    Returns:
+        tuple: The folder name, the list of tags and a message describing
+        the first problem found, or None.
+    """
+    folder = clean_name(request.form.get("folder", ""))
+    tags = parse_tags(request.form.get("tags", ""))
+    return folder, tags, labels_error(folder, tags)
+
+
+def _save_labels(session, note, folder, tags):
+    """
+    File a note in its folder and give it its tags, through 'run_sync'.
+    """
+    note.folder_id = folder_for(session, note.user_id, folder)
+    set_tags(session, note, tags)
+
+
+async def _conditional(db_session, render):
+    """
+    Answer a conditional request for a page of the user's notes.
+
+    Description:
+        The async counterpart of the 'conditional' decorator; 'render' is
+        awaited only when the browser's copy is out of date.
+    """
+    if not applies():
+        return await render()
+
+    note_seq, changed_at = await _notes_version(db_session, current_user.id)
+    g.notes_version = (note_seq, changed_at)
+
+    response = not_modified(note_seq)
+    if response is None:
+        response = make_response(await render())
+        if response.status_code != 200:
+            return response
+    set_validators(response, note_seq)
+    return response
+
+
+@async_view("notes.notes")
+@login_required
+async def notes():
+    """
+    Display a page of the authenticated user's notes.
+
+    Returns:
+        The rendered 'notes.html' template, or a 304 response.
+    """
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except InvalidCursor:
+            abort(400)
+
+    async with async_session() as db_session:
+        async def render():
+            list_filter = await db_session.run_sync(
+                find_filter, current_user.id, request.args)
+            folders, tags = await db_session.run_sync(
+                label_counts, current_user.id)
+            items, next_cursor = await _notes_list(
+                db_session, cursor, list_filter)
+            return render_template(
+                "notes.html", user=current_user, list_filter=list_filter,
+                folders=folders, tags=tags,
+                page=SimpleNamespace(items=items, next_cursor=next_cursor))
+
+        return await _conditional(db_session, render)
+
+
+@async_view("notes.notes_more")
+@login_required
+async def notes_more():
+    """
+    Render the next page of notes as an HTML fragment.
+
+    Returns:
+        The rendered 'note_items.html' fragment, with the cursor of the
+        following page in the 'X-Next-Cursor' header.
+    """
+    async with async_session() as db_session:
+        list_filter = await db_session.run_sync(
+            find_filter, current_user.id, request.args)
+        note_items, next_cursor = await _notes_list(
+            db_session, request.args.get("cursor"), list_filter)
+
+    response = make_response(note_items)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
+@async_view("notes.note_body")
+@login_required
+async def note_body(note_id):
+    """
+    Return the content of one of the authenticated user's notes as JSON.
+
+    Args:
+        note_id (int): The unique identifier of the note.
+    """
+    async with async_session() as db_session:
+        note = (await db_session.execute(
+            select(Note).options(load_only(Note.id, Note.note_content))
+            .where(Note.id == note_id, Note.user_id == current_user.id)
+        )).scalars().first()
+    if note is None:
+        abort(404)
+
+    return jsonify(id=note.id, note_content=note.note_content)
+
+
+@async_view("notes.add_note")
+@login_required
+async def add_note():
+    """
+    Add a new note.
+
+    Returns:
+        A redirection to the 'notes' view after adding the new note, or
+        the rendered 'add_note.html' template.
+    """
+    if request.method == "POST":
+        note_title = request.form.get("note_title")
+        note_content = request.form.get("note_content")
+        note_date = request.form.get("note_date")
+        folder, tags, labels_problem = _form_labels()
+
+        error = note_error(note_title, note_content) or labels_problem
+        if error:
+            flash(error, category="error")
+            return redirect(url_for("notes.add_note"))
+
+        async with async_session() as db_session:
+            new_note = Note(
+                note_content=note_content,
+                note_title=note_title,
+                note_date=note_date,
+                user_id=current_user.id
+            )
+            db_session.add(new_note)
+            await db_session.run_sync(_save_labels, new_note, folder, tags)
+            await db_session.commit()
+        _wrote_notes()
+        return redirect(url_for("notes.notes"))
+
+    return render_template("add_note.html", user=current_user)
+
+
+@async_view("notes.edit_note")
+@login_required
+async def edit_note(note_id):
+    """
+    Edit an existing note.
+
+    Args:
+        note_id (int): The unique identifier of the note to be edited.
+
+    Description:
+        Notes belonging to other users are reported as not found.
+
+    Returns:
+        A redirection to the 'notes' view after saving, or the rendered
+        'edit_note.html' template.
+    """
+    async with async_session() as db_session:
+        note = (await db_session.execute(
+            select(Note).options(undefer(Note.note_content))
+            .where(Note.id == note_id, Note.user_id == current_user.id)
+        )).scalars().first()
+        if note is None:
+            abort(404)
+
+        if request.method == "POST":
+            note.note_title = request.form.get("note_title")
+            note.note_content = request.form.get("note_content")
+            folder, tags, labels_problem = _form_labels()
+
+            error = (note_error(note.note_title, note.note_content)
+                     or labels_problem)
+            if error:
+                flash(error, category="error")
+                return redirect(url_for("notes.edit_note", note_id=note_id))
+
+            note.note_date = datetime.now()
+            await db_session.run_sync(_save_labels, note, folder, tags)
+            await db_session.commit()
+            _wrote_notes()
+            return redirect(url_for("notes.notes"))
+
+        async def render():
+            labels = await db_session.run_sync(note_labels, [note])
+            return render_template("edit_note.html", note=note,
+                                   labels=labels[note.id],
+                                   user=current_user)
+
+        return await _conditional(db_session, render)
+
+
+@async_view("notes.delete_note")
+@login_required
+async def delete_note(note_id):
+    """
+    Delete one of the authenticated user's notes.
+
+    Args:
+        note_id (int): The unique identifier of the note to be deleted.
+
+    Returns:
+        A redirection to the 'notes' view.
+    """
+    async with async_session() as db_session:
+        note = await db_session.get(Note, note_id)
+        if note is None:
+            abort(404)
+
+        if note.user_id != current_user.id:
+            flash("You are not authorized to delete this note.",
+                  category="error")
+            return redirect(url_for("notes.notes"))
+
+        await db_session.delete(note)
+        await db_session.commit()
+    _wrote_notes()
+    return redirect(url_for("notes.notes"))
+
+
+@async_view("auth.home")
+async def home():
+    """
+    Register a new user, or redirect logged in users to their notes.
+
+    Returns:
+        A redirection to the 'notes' view, or the rendered 'home.html'
+        template.
+    """
+    if current_user.is_authenticated:
+        return redirect(url_for("notes.notes"))
+
+    if request.method == "POST":
+        email = request.form.get("email")
+        first_name = request.form.get("first_name")
+        last_name = request.form.get("last_name")
+        password1 = request.form.get("password1")
+        password2 = request.form.get("password2")
+
+        async with async_session() as db_session:
+            exists = (await db_session.execute(
+                select(User.id).where(User.email == email))).first()
+            error = signup_error(email, first_name, last_name, password1,
+                                 password2)
+            if exists:
+                flash("Email already exists", category="error")
+
+            elif error:
+                flash(error, category="error")
+
+            else:
+                new_user = User(
+                    email=email,
+                    first_name=first_name,
+                    last_name=last_name,
+                    password=await hash_password_async(password1))
+                db_session.add(new_user)
+                await db_session.commit()
+                g.db_wrote = True
+                cache_user(new_user)
+                login_user(new_user, remember=True)
+                flash("Account Created!", category="success")
+                return redirect(url_for("notes.notes"))
+
+    return render_template("home.html", user=current_user)
+
+
+@async_view("auth.login")
+async def login():
+    """
+    Log in a user or display the login page.
+
+    Returns:
+        A redirection to the 'notes' view after a successful login, or the
+        rendered 'login.html' template.
+    """
+    if request.method == "POST":
+        email = request.form.get("email")
+        password = request.form.get("password")
+
+        async with async_session() as db_session:
+            user = (await db_session.execute(
+                select(User).where(User.email == email))).scalars().first()
+            if user:
+                password_matches, new_hash = await check_password_async(
+                    user.password, password)
+                if new_hash:
+                    user.password = new_hash
+                    await db_session.commit()
+                    g.db_wrote = True
+                if password_matches:
+                    cache_user(user)
+                    flash("Logged in Successfully!", category="success")
+                    login_user(user, remember=True)
+                    return redirect(url_for("notes.notes"))
+                else:
+                    flash("Incorrect Password, Try again.", category="error")
+            else:
+                flash("Email does not exist", category="error")
+
+    return render_template("login.html", user=current_user)
+
+
+@async_view("auth.logout")
+@login_required
+async def logout():
+    """
+    Log out the current user and redirect to the home page.
+    """
+    logout_user()
+    flash('You have been logged out successfully!', category="success")
+    return redirect(url_for("auth.home"))
@@ -0,0 +1,198 @@
+"""
+QuickNote Authentication Routes
+
+Description:
+    This module defines the 'auth' blueprint of the QuickNote application,
+    containing the routes for user registration, login and logout.
+
+    Dependencies:
+    - Flask: A web framework for building the application.
+    - Flask-Login: A Flask extension for managing user sessions and
+    authentication.
+    - quicknote.models: Contains the data model for users.
+    - quicknote.passwords: Hashes and checks passwords off the request
+      thread.
+    - quicknote.validation: Checks the signup details.
+"""
+from flask import (Blueprint, render_template, request, flash, redirect,
+                   url_for)
+from flask_login import login_user, login_required, logout_user, current_user
+from quicknote import db
+from quicknote.models import User
+from quicknote.passwords import check_password, hash_password
+from quicknote.validation import signup_error
+
+
+auth = Blueprint("auth", __name__)
+
+
+@auth.route("/", methods=["GET", "POST"])
+def home():
+    """
+    Route function for handling user registration and redirection.
+
+    If the current user is authenticated, redirects to the 'notes' page.
+    If the request method is POST, it retrieves user registration data from the
+    form, validates the input, and creates a new user if the data is valid.
+    If the email provided already exists in the database, it flashes an
+    error message.
+    Otherwise, it checks and validates the input data such as email,
+    first name ,last name, and passwords.
+    If all validations pass, a new user is created, added to the database,
+    and the user is logged in.
+    It then redirects to the 'notes' page after a successful account creation.
+
+    Returns:
+        If the user is already authenticated, redirects to 'notes'.
+        If the request method is POST and all input validations pass,
+        redirects to 'notes' after account creation.
+        Otherwise, renders the 'home.html' template for user registration.
+
+    Dependencies:
+        - current_user: User authentication status.
+        - request: Retrieves form data and method type (POST).
+        - redirect: Redirects to a specified route.
+        - url_for: Generates URLs for a specific function.
+        - flash: Displays flashed messages for different categories
+        (success or error).
+        - User: Represents the User model for interaction with the database.
+        - hash_password: Hashes the user's password for security.
+        - login_user: Logs in the user.
+        - db: Represents the database session.
+        - render_template: Renders the HTML template for user registration.
+
+    HTML Templates:
+        - 'home.html': Contains the user registration form.
+
+    Note:
+        - This function assumes the existence of a User model and an
+        'home.html' template.
+        - It employs Flask and its extensions for web functionalities.
+    """
+    if current_user.is_authenticated:
+        # If the user is already logged in, redirect to the notes page
+        return redirect(url_for("notes.notes"))
+
+    if request.method == "POST":
+        # Retrieving user registration data from the form
+        email = request.form.get("email")
+        first_name = request.form.get("first_name")
+        last_name = request.form.get("last_name")
+        password1 = request.form.get("password1")
+        password2 = request.form.get("password2")
+
+        # Checking if the email already exists in the database
+        user = User.query.filter_by(email=email).first()
+        # Validating input data
+        error = signup_error(email, first_name, last_name, password1,
+                             password2)
+        if user:
+            # Flash an error message if the email is already in use
+            flash("Email already exists", category="error")
+
+        elif error:
+            flash(error, category="error")
+
+        else:
+            # Creating a new user with validated data; hashing is turned
+            # away with a 503 error while too many logins are in progress
+            password = hash_password(password1)
+            new_user = User(
+                email=email,
+                first_name=first_name,
+                last_name=last_name,
+                password=password)
+            # Adding the new user to the database
+            db.session.add(new_user)
+            db.session.commit()
+            # Logging in the new user and redirecting to notes page
+            login_user(new_user, remember=True)
+            flash("Account Created!", category="success")
+            return redirect(url_for("notes.notes"))
+
+    # Render the registration template if the request method is not POST
+    return render_template("home.html", user=current_user)
+
+
+@auth.route("/login", methods=["GET", "POST"])
+def login():
+    """
+    Log in a user or display the login page.
+
+    Description:
+        This view function handles the login process for users.
+        If the HTTP request method is POST, it attempts to authenticate the
+        user using the provided email and password.
+        If the authentication is successful, the user is logged in and
+        redirected to the 'notes' view.
+        If the email or password is incorrect, appropriate flash messages
+        are shown.
+        Password hashes made with an older method or cost are replaced
+        with a current one when the user logs in.
+        If the request method is GET, it displays the login page, allowing
+        users to enter their credentials.
+
+    Returns:
+        A redirection to the 'notes' view after successful login or
+        the 'login.html' template for entering login credentials in the case of
+        a GET request.
+
+    """
+    if request.method == "POST":
+        # Extracting email and password from the login form
+        email = request.form.get("email")
+        password = request.form.get("password")
+
+        # Retrieving the user with the provided email from the database
+        user = User.query.filter_by(email=email).first()
+        if user:
+            # Check if the provided password matches the stored password hash
+            # for the user, upgrading the hash if it is out of date
+            password_matches, new_hash = check_password(user.password,
+                                                        password)
+            if new_hash:
+                user.password = new_hash
+                db.session.commit()
+            if password_matches:
+                # Flash a success message and log in the user if authentication
+                # is successful
+                flash("Logged in Successfully!", category="success")
+                login_user(user, remember=True)
+                # Redirect to the notes page after successful login
+                return redirect(url_for("notes.notes"))
+            else:
+                # Flash an error message if the provided password is incorrect
+                flash("Incorrect Password, Try again.", category="error")
+        else:
+            # Flash an error message if the email provided does not exist in
+            # the database
+            flash("Email does not exist", category="error")
+
+    # Render the login template if the request method is not POST
+    return render_template("login.html", user=current_user)
+
+
+@auth.route("/logout")
+@login_required
+def logout():
+    """
+    Log out the current user and redirect to the home page.
+
+    Description:
+        This view function logs out the currently authenticated user,
+        effectively ending their session.
+        After logging out, the user is redirected to the application's
+        home page.
+        Users typically use this endpoint to securely end their session when
+        they are done with their tasks.
+
+    Returns:
+        A redirection to the 'home' view after successfully logging out
+        the user.
+    """
+    # Logs out the currently authenticated user
+    logout_user()
+    # Flash message for successful logout
+    flash('You have been logged out successfully!', category="success")
+    # Redirects to the 'home' view after logging out
+    return redirect(url_for("auth.home"))
@@ -0,0 +1,41 @@
+"""
+QuickNote Metrics Routes
+
+Description:
+    This module defines the 'metrics' blueprint of the QuickNote
+    application, which exposes the process's performance metrics.
+
+    Dependencies:
+    - Flask: A web framework for building the application.
+    - quicknote.metrics: The registry holding the metrics.
+"""
+from flask import Blueprint, Response, abort, current_app, request
+from quicknote.metrics import registry
+
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("/metrics")
+def metrics():
+    """
+    Expose the application's performance metrics.
+
+    Description:
+        This view function renders the process's metrics in the Prometheus
+        text format. It is only served to requests from the local machine,
+        or to requests carrying the 'METRICS_TOKEN' setting as a bearer
+        token, so it can be scraped without being public.
+
+    Returns:
+        A plain text response with the metrics, or a 404 error for
+        requests that are not allowed to read them.
+    """
+    token = current_app.config["METRICS_TOKEN"]
+    is_local = request.remote_addr in ("127.0.0.1", "::1")
+    if not is_local and not (
+            token and request.headers.get("Authorization")
+            == f"Bearer {token}"):
+        abort(404)
+
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,434 @@
+"""
+QuickNote Notes Routes
+
+Description:
+    This module defines the 'notes' blueprint of the QuickNote application,
+    containing the routes for listing, searching, creating, editing and
+    deleting notes.
+
+    Dependencies:
+    - Flask: A web framework for building the application.
+    - Flask-Login: A Flask extension for managing user sessions and
+    authentication.
+    - datetime: Used for date and time operations.
+    - sqlalchemy.orm: Limits the columns loaded for note lists, and loads
+      note contents where they are shown.
+    - quicknote.conditional: Answers repeat page views with 304 responses.
+    - quicknote.fragments: Caches the rendered notes list.
+    - quicknote.models: Contains the data model for notes.
+    - quicknote.pagination: Splits the notes list into keyset pages.
+    - quicknote.replicas: Serves read-only views from database replicas.
+    - quicknote.search: Runs full-text searches over notes.
+    - quicknote.streaming: Streams the notes page while it is rendered.
+    - quicknote.tags: Files notes in folders and tags, and lists them.
+    - quicknote.validation: Checks note titles and contents, folders and
+      tags.
+"""
+from datetime import datetime
+from functools import partial
+from flask import (Blueprint, render_template, request, flash, redirect,
+                   url_for, abort, make_response, current_app, jsonify)
+from flask_login import login_required, current_user
+from sqlalchemy.orm import load_only, undefer
+from quicknote import db
+from quicknote.conditional import conditional
+from quicknote.fragments import invalidate_notes, notes_list
+from quicknote.models import Note
+from quicknote.pagination import (apply_keyset, split_page, decode_cursor,
+                                  InvalidCursor)
+from quicknote.replicas import read_only
+from quicknote.search import search_notes
+from quicknote.streaming import stream_template
+from quicknote.tags import (clean_name, filtered_page, find_filter,
+                            folder_for, label_counts, note_labels,
+                            parse_tags, set_tags)
+from quicknote.validation import labels_error, note_error
+
+
+notes_bp = Blueprint("notes", __name__)
+
+
+def _notes_page(cursor, list_filter=None):
+    """
+    Fetch one page of the authenticated user's notes.
+
+    Description:
+        Only the columns shown in the list, and the change sequence that
+        keys each note's cached list item, are loaded. Note contents can
+        be up to 5000 characters long and are fetched one at a time from
+        the 'note_body' view when a note is opened.
+
+    Args:
+        cursor (str): The cursor of the previous page, or None for the
+        first page.
+        list_filter (ListFilter, optional): The folder or tag the list is
+        limited to.
+
+    Returns:
+        tuple: The notes on the page and the cursor for the next page.
+        Aborts with a 400 error if the cursor is malformed.
+    """
+    limit = current_app.config["NOTES_PAGE_SIZE"]
+    try:
+        if list_filter is not None:
+            return filtered_page(db.session, current_user.id, list_filter,
+                                 cursor, limit)
+        query = apply_keyset(
+            Note.query.options(
+                load_only(Note.id, Note.note_title, Note.note_date,
+                          Note.change_seq)
+            ).filter_by(user_id=current_user.id), cursor, limit)
+    except InvalidCursor:
+        abort(400)
+    return split_page(query.all(), limit)
+
+
+class _LazyNotesPage:
+    """
+    A page of the notes list that is fetched when the template uses it.
+
+    Attributes:
+        cursor (str): The cursor of the previous page, or None.
+        list_filter (ListFilter): The folder or tag the list is limited
+        to, or None.
+
+    Description:
+        The notes page is streamed, so its header is sent before the notes
+        are queried and rendered.
+    """
+
+    def __init__(self, cursor, list_filter=None):
+        self.cursor = cursor
+        self.list_filter = list_filter
+        self._page = None
+
+    def _load(self):
+        if self._page is None:
+            self._page = _list_page(self.cursor, self.list_filter)
+        return self._page
+
+    @property
+    def items(self):
+        return self._load()[0]
+
+    @property
+    def next_cursor(self):
+        return self._load()[1]
+
+
+def _list_page(cursor, list_filter):
+    """
+    Render a page of the notes list, or of the notes in a folder or with a
+    tag, through the fragment cache.
+    """
+    if list_filter is None:
+        return notes_list(current_user.id, cursor, _notes_page)
+    return notes_list(current_user.id, cursor,
+                      partial(_notes_page, list_filter=list_filter),
+                      scope=list_filter.scope)
+
+
+def _form_labels():
+    """
+    Read and check the folder and tags entered in a note form.
+
+    Returns:
+        tuple: The folder name, the list of tags and a message describing
+        the first problem found, or None.
+    """
+    folder = clean_name(request.form.get("folder", ""))
+    tags = parse_tags(request.form.get("tags", ""))
+    return folder, tags, labels_error(folder, tags)
+
+
+@notes_bp.route("/notes", methods=(["GET", "POST"]))
+@login_required
+@read_only
+@conditional
+def notes():
+    """
+    Display a list of notes for the authenticated user.
+
+    Description:
+        This view function retrieves and displays the first page of notes
+        belonging to the authenticated user.
+        Notes are ordered newest first and paginated with a keyset cursor,
+        so each page costs the same regardless of how many notes the user
+        has. An optional 'cursor' query argument starts the list at a later
+        page, which is used when JavaScript is not available.
+        A 'folder' or 'tag' query argument limits the list to the notes in
+        that folder or with that tag. The user's folders and tags are
+        listed with their note counts, which are stored rather than
+        counted.
+        Users can view and manage their notes through this page.
+        Repeat visits are answered with '304 Not Modified' while the user's
+        notes are unchanged, and the rendered list is served from the
+        fragment cache until they change.
+        The page is streamed: its header is sent before the notes are
+        fetched, so the time to the first byte does not depend on them.
+
+    Returns:
+        A streamed 'notes.html' template displaying the page of notes and
+        the cursor for the next page.
+    """
+    # Check the cursor now, as errors cannot be reported once the page
+    # has started streaming
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except InvalidCursor:
+            abort(400)
+
+    # Find the folder or tag to filter by, and the counts shown next to
+    # the list, from their indexes
+    list_filter = find_filter(db.session, current_user.id, request.args)
+    folders, tags = label_counts(db.session, current_user.id)
+
+    # Streams the 'notes.html' template with a page of the notes
+    # associated with the authenticated user arranged by date in
+    # descending order, which is fetched and rendered as the template
+    # reaches it unless the rendered page is already cached
+    return stream_template(
+        "notes.html", page=_LazyNotesPage(cursor, list_filter),
+        list_filter=list_filter, folders=folders, tags=tags,
+        user=current_user)
+
+
+@notes_bp.route("/notes/more")
+@login_required
+@read_only
+def notes_more():
+    """
+    Render the next page of notes as an HTML fragment.
+
+    Description:
+        This view function is requested by the notes page when the user
+        scrolls to the end of the list or clicks 'Load More'.
+        It renders only the list items for the page that follows the
+        'cursor' query argument so they can be appended to the list.
+        The cursor for the following page is returned in the
+        'X-Next-Cursor' header and is omitted on the last page. Rendered
+        pages are served from the fragment cache. The 'folder' and 'tag'
+        query arguments filter the list as on the notes page.
+
+    Returns:
+        The rendered 'note_items.html' fragment.
+    """
+    note_items, next_cursor = _list_page(
+        request.args.get("cursor"),
+        find_filter(db.session, current_user.id, request.args))
+
+    response = make_response(note_items)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
+@notes_bp.route("/notes/<int:note_id>/body")
+@login_required
+@read_only
+def note_body(note_id):
+    """
+    Return the content of one of the authenticated user's notes as JSON.
+
+    Args:
+        note_id (int): The unique identifier of the note.
+
+    Description:
+        This view function is requested by the notes and search pages when
+        a note is opened, because the lists only include note titles and
+        dates. Notes belonging to other users are reported as not found.
+
+    Returns:
+        A JSON object with the note's 'id' and 'note_content'.
+    """
+    note = Note.query.options(
+        load_only(Note.id, Note.note_content)
+    ).filter_by(id=note_id, user_id=current_user.id).first_or_404()
+
+    return jsonify(id=note.id, note_content=note.note_content)
+
+
+@notes_bp.route("/search")
+@login_required
+@read_only
+def search():
+    """
+    Search the authenticated user's notes.
+
+    Description:
+        This view function runs a ranked full-text search over the titles
+        and contents of the user's notes using the 'q' query argument.
+        Results are ordered by relevance and split into pages selected
+        with the 'page' query argument.
+        An empty search redirects back to the notes list.
+
+    Returns:
+        A rendered 'search.html' template displaying the matching notes.
+    """
+    terms = request.args.get("q", "").strip()
+    if not terms:
+        return redirect(url_for("notes.notes"))
+
+    # Fall back to the first page if the page number is not valid
+    page = max(request.args.get("page", 1, type=int), 1)
+    notes, has_next = search_notes(
+        current_user.id, terms, page, current_app.config["NOTES_PAGE_SIZE"])
+
+    return render_template(
+        "search.html", notes=notes, terms=terms, page=page,
+        has_next=has_next, user=current_user)
+
+
+@notes_bp.route("/add_note", methods=["GET", "POST"])
+@login_required
+def add_note():
+    """
+    Add a new note.
+
+    Description:
+        This view function allows authenticated users to add a new note.
+        If the HTTP request method is POST, it retrieves the note title,
+        content, and an optional date, folder and comma separated tags
+        from the submitted form.
+        It validates that the title and content meet minimum length
+        requirements, and that the folder and tags are not too long.
+        If both conditions are met, a new note is created and added to
+        the database. Users are then redirected to the 'notes' view to see
+        their updated list of notes.
+
+    Returns:
+        A redirection to the 'notes' view after adding the new note.
+    """
+    if request.method == "POST":
+        # Retrieve note details from the form
+        note_title = request.form.get("note_title")
+        note_content = request.form.get("note_content")
+        note_date = request.form.get("note_date")
+
+        folder, tags, labels_problem = _form_labels()
+
+        # Validate the length of note title and content
+        error = note_error(note_title, note_content) or labels_problem
+        if error:
+            flash(error, category="error")
+            return redirect(url_for("notes.add_note"))
+
+        else:
+            # Create a new note with validated data and the current user's ID
+            new_note = Note(
+                note_content=note_content,
+                note_title=note_title,
+                note_date=note_date,
+                user_id=current_user.id,
+                folder_id=folder_for(db.session, current_user.id, folder)
+            )
+
+            # Add the new note and its tags to the database and redirect
+            # to the 'notes' view
+            db.session.add(new_note)
+            set_tags(db.session, new_note, tags)
+            db.session.commit()
+            invalidate_notes(current_user.id)
+            return redirect(url_for("notes.notes"))
+
+    # Render the 'add_note.html' template for creating a new note
+    return render_template("add_note.html", user=current_user)
+
+
+@notes_bp.route("/edit_note/<int:note_id>", methods=["GET", "POST"])
+@login_required
+@read_only
+@conditional
+def edit_note(note_id):
+    """
+    Edit an existing note.
+
+    Args:
+        note_id (int): The unique identifier of the note to be edited.
+
+    Description:
+        This view function allows authenticated users to edit the title,
+        content, folder and tags of an existing note.
+        It retrieves the note with the given 'note_id' from the database.
+        If the HTTP request method is POST, it checks if the provided title
+        and content meet the minimum length requirements.
+        If both conditions are met, the note's date is updated to the current
+        date and the changes are saved to the database.
+        Repeat visits to the edit page are answered with '304 Not Modified'
+        while the user's notes are unchanged.
+        Notes belonging to other users are reported as not found.
+
+    Returns:
+        A redirection to the 'notes' view, displaying the updated or
+        unchanged note.
+    """
+    # Retrieve the authenticated user's note with the given 'note_id' or
+    # return a 404 error if not found, with its content for the form
+    note = Note.query.options(undefer(Note.note_content)).filter_by(
+        id=note_id, user_id=current_user.id).first_or_404()
+
+    if request.method == "POST":
+        # Update note details based on the form submission
+        note.note_title = request.form.get("note_title")
+        note.note_content = request.form.get("note_content")
+
+        folder, tags, labels_problem = _form_labels()
+
+        # Validate the length of note title and content
+        error = (note_error(note.note_title, note.note_content)
+                 or labels_problem)
+        if error:
+            flash(error, category="error")
+            return redirect(url_for("notes.edit_note", note_id=note_id))
+
+        else:
+            # Set the note's date to the current time and
+            # commit changes to the database
+            note.note_date = datetime.now()
+            note.folder_id = folder_for(db.session, note.user_id, folder)
+            set_tags(db.session, note, tags)
+            db.session.commit()
+            invalidate_notes(current_user.id)
+            # Redirect to the 'notes' view after editing
+            return redirect(url_for("notes.notes"))
+
+    # Render the 'edit_note.html' template to allow users to
+    # edit the selected note, with its folder and tags filled in
+    return render_template("edit_note.html", note=note,
+                           labels=note_labels(db.session, [note])[note.id],
+                           user=current_user)
+
+
+@notes_bp.route("/delete_note/<int:note_id>")
+@login_required
+def delete_note(note_id):
+    """
+    Delete a note based on the provided note_id.
+
+    Parameters:
+    note_id (int): The unique identifier of the note to be deleted.
+
+    Returns:
+    A redirection to the 'notes' route upon successful deletion.
+    If the note does not belong to the logged-in user, it flashes a message
+    indicating lack of authorization and redirects to the 'notes' route.
+
+    Note:
+    This function requires the user to be logged in ('@login_required')
+    to delete a note.
+    """
+    note = Note.query.get_or_404(note_id)
+
+    # Check if the note belongs to the logged-in user
+    if note.user_id == current_user.id:
+        db.session.delete(note)
+        db.session.commit()
+        invalidate_notes(current_user.id)
+        return redirect(url_for("notes.notes"))
+    else:
+        # If the note does not belong to the logged-in user,
+        # handle unauthorized deletion
+        flash("You are not authorized to delete this note.", category="error")
+        return redirect(url_for("notes.notes"))
@@ -0,0 +1,223 @@
+"""
+QuickNote Search Module
+
+Description:
+    This module provides ranked full-text search over note titles and
+    contents.
+    On PostgreSQL each note carries a 'search_vector' tsvector column that
+    is covered by a GIN index together with 'user_id'. In development mode
+    on SQLite, an FTS5 virtual table named 'note_fts' holds the same text
+    keyed by the note id. Other databases have no index; their searches
+    fall back to matching every word against note titles with ILIKE,
+    as contents are stored compressed (see 'quicknote.compressed').
+    The index is kept up to date from the application: every flush that
+    inserts, edits or deletes notes updates the matching index entries in
+    the same transaction, using the plain text held by the Note objects.
+    Code that changes notes without the ORM unit of work (bulk UPDATE or
+    DELETE statements) must call 'index_notes' or 'unindex_notes' itself.
+
+    Dependencies:
+    - sqlalchemy: Provides the DDL, SQL expressions and session events.
+    - quicknote.models: Contains the Note model being searched.
+"""
+from sqlalchemy import (DDL, and_, column, event, func, inspect,
+                        literal_column, table, text)
+from sqlalchemy.orm import Session, load_only
+from quicknote.models import Note
+
+
+# Text search configuration used to build and query the PostgreSQL index
+SEARCH_CONFIG = "english"
+
+# Title matches rank higher than content matches
+_PG_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(:note_title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(:note_content, '')), 'B')")
+
+
+# The SQLite FTS5 table, keyed by note id through its rowid
+note_fts = table("note_fts", column("rowid"))
+
+
+# Create the search index structures whenever the note table is created
+# with 'db.create_all()'. Existing databases get them from migrations.
+event.listen(Note.__table__, "after_create", DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS note_fts "
+    "USING fts5(note_title, note_content, tokenize='porter unicode61')"
+).execute_if(dialect="sqlite"))
+event.listen(Note.__table__, "after_create", DDL(
+    "ALTER TABLE note ADD COLUMN IF NOT EXISTS search_vector tsvector"
+).execute_if(dialect="postgresql"))
+event.listen(Note.__table__, "after_create", DDL(
+    "CREATE EXTENSION IF NOT EXISTS btree_gin"
+).execute_if(dialect="postgresql"))
+event.listen(Note.__table__, "after_create", DDL(
+    "CREATE INDEX IF NOT EXISTS ix_note_user_id_search_vector "
+    "ON note USING gin (user_id, search_vector)"
+).execute_if(dialect="postgresql"))
+event.listen(Note.__table__, "before_drop", DDL(
+    "DROP TABLE IF EXISTS note_fts"
+).execute_if(dialect="sqlite"))
+
+
+def index_notes(connection, notes):
+    """
+    Add or refresh the search index entries of the given notes.
+
+    Args:
+        connection: The database connection of the current transaction.
+        notes (list): Dictionaries with 'id', 'note_title' and
+        'note_content' keys.
+    """
+    if not notes:
+        return
+
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        connection.execute(text(
+            f"UPDATE note SET search_vector = {_PG_VECTOR} WHERE id = :id"),
+            notes)
+    elif dialect == "sqlite":
+        connection.execute(text(
+            "INSERT OR REPLACE INTO note_fts "
+            "(rowid, note_title, note_content) "
+            "VALUES (:id, :note_title, :note_content)"), notes)
+
+
+def unindex_notes(connection, note_ids=None, user_id=None):
+    """
+    Remove search index entries for deleted notes.
+
+    Args:
+        connection: The database connection of the current transaction.
+        note_ids (list, optional): The ids of the deleted notes.
+        user_id (int, optional): Remove the entries of every note owned
+        by this user instead. Must be called before the notes are deleted.
+
+    Description:
+        On PostgreSQL the index lives on the note rows themselves, so
+        deleting a note also removes its entry and nothing needs to be done.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+
+    if user_id is not None:
+        connection.execute(text(
+            "DELETE FROM note_fts WHERE rowid IN "
+            "(SELECT id FROM note WHERE user_id = :user_id)"),
+            {"user_id": user_id})
+    elif note_ids:
+        connection.execute(
+            text("DELETE FROM note_fts WHERE rowid = :id"),
+            [{"id": note_id} for note_id in note_ids])
+
+
+def _text_changed(note):
+    """
+    Check whether a flushed note's title or content was modified.
+    """
+    state = inspect(note)
+    return (state.attrs.note_title.history.has_changes()
+            or state.attrs.note_content.history.has_changes())
+
+
+@event.listens_for(Session, "after_flush")
+def _update_index(session, flush_context):
+    """
+    Keep the search index in step with notes written by the ORM.
+
+    Description:
+        This session event runs after every flush, while the lists of new,
+        modified and deleted objects still describe what was just written.
+        Index changes are made on the same connection, so they commit or
+        roll back together with the notes themselves.
+    """
+    # 'session.new' builds a new set on every access, so read it once
+    new = session.new
+    changed = [
+        {"id": note.id,
+         "note_title": note.note_title,
+         "note_content": note.note_content}
+        for note in list(new) + list(session.dirty)
+        if isinstance(note, Note) and (note in new or _text_changed(note))]
+    deleted = [
+        note.id for note in session.deleted if isinstance(note, Note)]
+
+    if changed or deleted:
+        connection = session.connection()
+        index_notes(connection, changed)
+        unindex_notes(connection, note_ids=deleted)
+
+
+def _fts5_query(terms):
+    """
+    Turn free text into an FTS5 query that matches all of its words.
+
+    Description:
+        Each word is quoted so that characters with a special meaning in
+        the FTS5 query syntax are matched literally. The last word is
+        matched as a prefix so results appear while a word is being typed.
+    """
+    words = ['"' + word.replace('"', '""') + '"' for word in terms.split()]
+    if words:
+        words[-1] += "*"
+    return " ".join(words)
+
+
+def _like_pattern(word):
+    """
+    Build an ILIKE pattern matching a word anywhere, taken literally.
+    """
+    word = (word.replace("\\", "\\\\").replace("%", "\\%")
+            .replace("_", "\\_"))
+    return f"%{word}%"
+
+
+def search_notes(user_id, terms, page=1, per_page=50):
+    """
+    Find a user's notes matching the search terms, best matches first.
+
+    Args:
+        user_id (int): The owner of the notes being searched.
+        terms (str): The text entered in the search box.
+        page (int): The 1-based page of results.
+        per_page (int): The number of results per page.
+
+    Returns:
+        tuple: The notes on the requested page, and whether a further
+        page of results exists. Only the id, title, date and change
+        sequence of the notes are loaded.
+    """
+    query = Note.query.options(
+        load_only(Note.id, Note.note_title, Note.note_date, Note.change_seq)
+    ).filter(Note.user_id == user_id)
+    dialect = query.session.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, terms)
+        vector = literal_column("note.search_vector")
+        query = query.filter(vector.op("@@")(tsquery)).order_by(
+            func.ts_rank_cd(vector, tsquery).desc(), Note.id.desc())
+    elif dialect == "sqlite":
+        fts_query = _fts5_query(terms)
+        if not fts_query:
+            return [], False
+        # bm25 scores are lower for better matches; titles weigh more
+        query = query.join(
+            note_fts, note_fts.c.rowid == Note.id
+        ).filter(
+            literal_column("note_fts").op("MATCH")(fts_query)
+        ).order_by(
+            literal_column("bm25(note_fts, 10.0, 1.0)"), Note.id.desc())
+    else:
+        words = terms.split()
+        if not words:
+            return [], False
+        # No index to rank with, so the newest matching titles come first
+        query = query.filter(and_(*(
+            Note.note_title.ilike(_like_pattern(word), escape="\\")
+            for word in words))).order_by(
+                Note.note_date.desc(), Note.id.desc())
+
+    rows = query.offset((page - 1) * per_page).limit(per_page + 1).all()
+    return rows[:per_page], len(rows) > per_page
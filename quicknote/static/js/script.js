@@ -26,48 +26,108 @@ document.addEventListener('DOMContentLoaded', function () {
         i18n: {done: "Select"}
     });
 
-    // Collapsibles initialization
+    // Collapsibles initialization. Note lists only include titles, so a
+    // note's content is fetched the first time it is opened
     let collapsibles = document.querySelectorAll('.collapsible');
-    M.Collapsible.init(collapsibles);
+    M.Collapsible.init(collapsibles, {
+        onOpenStart: function (item) {
+            let content = item.querySelector('.note-content[data-body-url]');
+            if (!content || content.hasAttribute('data-loaded')) {
+                return;
+            }
+            content.setAttribute('data-loaded', '');
+            fetch(content.getAttribute('data-body-url'), {credentials: 'same-origin'}).then(response => {
+                if (!response.ok) {
+                    throw new Error('Failed to load the note.');
+                }
+                return response.json();
+            }).then(note => {
+                content.textContent = note.note_content;
+            }).catch(error => {
+                // Allow another attempt the next time the note is opened
+                content.removeAttribute('data-loaded');
+                content.textContent = 'This note could not be loaded.';
+                console.error('Error:', error);
+            });
+        }
+    });
 
     // Modals for note deletion;
     let modals = document.querySelectorAll('.modal');
     M.Modal.init(modals);
 
-    // Delete specific notes based on note.id
-    // Select all elements with the class 'delete-button'
-    let deleteButtons = document.querySelectorAll('.delete-button');
-
-    // Iterate through each delete button
-    deleteButtons.forEach(button => {
-        // Add a click event listener to each delete button
-        button.addEventListener('click', function () {
-            // Get the specific note ID associated with the delete button
-            let noteId = this.getAttribute('data-note-id');
+    // Load the next page of notes when the 'Load More' link is clicked
+    // or scrolled into view
+    let loadMore = document.querySelector('#load-more-notes');
+    if (loadMore) {
+        let notesList = document.querySelector('#notes-list');
+        let loading = false;
 
-            // Access the modal associated with the specific note ID
-            let modal = M.Modal.getInstance(document.querySelector(`#modal${noteId}`));
-            modal.open(); // Open the modal for confirmation
-
-            // Locate the confirmation button within the modal
-            let confirmButton = document.querySelector(`#confirm-delete-${noteId}`);
-
-            // Add a click event listener to the confirmation button
-            confirmButton.addEventListener('click', function () {
-                // Send a GET request to the server to delete the note with the given noteId
-                fetch(`/delete_note/${noteId}`, {
-                    method: 'GET'
-                }).then(response => {
-                    // Check if the deletion request was successful
-                    if (response.ok) {
-                        window.location.href = 'notes.html'; // Redirect to the notes page after successful deletion
+        let loadNextPage = function () {
+            let cursor = loadMore.getAttribute('data-next-cursor');
+            if (loading || !cursor) {
+                return;
+            }
+            loading = true;
+            // The URLs keep any folder or tag filter of the list
+            let url = new URL(loadMore.getAttribute('data-more-url'), window.location.href);
+            url.searchParams.set('cursor', cursor);
+            fetch(url, {credentials: 'same-origin'}).then(response => {
+                if (!response.ok) {
+                    throw new Error('Failed to load more notes.');
+                }
+                let nextCursor = response.headers.get('X-Next-Cursor');
+                return response.text().then(html => {
+                    // Append the new list items
+                    let page = document.createElement('ul');
+                    page.innerHTML = html;
+                    while (page.firstElementChild) {
+                        notesList.appendChild(page.firstElementChild);
+                    }
+                    if (nextCursor) {
+                        loadMore.setAttribute('data-next-cursor', nextCursor);
+                        let next = new URL(loadMore.href);
+                        next.searchParams.set('cursor', nextCursor);
+                        loadMore.href = next.toString();
                     } else {
-                        console.error('Failed to delete the note.');
+                        // Remove the link once the last page has been loaded
+                        loadMore.removeAttribute('data-next-cursor');
+                        loadMore.parentElement.removeChild(loadMore);
                     }
-                }).catch(error => {
-                    console.error('Error:', error); // Log any errors encountered during the deletion process
                 });
+            }).catch(error => {
+                console.error('Error:', error);
+            }).finally(() => {
+                loading = false;
             });
+        };
+
+        loadMore.addEventListener('click', function (event) {
+            event.preventDefault();
+            loadNextPage();
         });
-    });
-});
\ No newline at end of file
+
+        // Infinite scroll: load the next page as the link comes into view
+        if ('IntersectionObserver' in window) {
+            let observer = new IntersectionObserver(entries => {
+                if (entries.some(entry => entry.isIntersecting)) {
+                    loadNextPage();
+                }
+            }, {rootMargin: '200px'});
+            observer.observe(loadMore);
+        }
+    }
+
+    // Point the shared delete modal at the note whose 'Delete' button was
+    // clicked. The listener is on the document so that notes added by
+    // 'Load More' are handled too
+    let confirmDelete = document.querySelector('#confirm-delete-note');
+    if (confirmDelete) {
+        document.addEventListener('click', function (event) {
+            let button = event.target.closest('.delete-button');
+            if (button) {
+                confirmDelete.href = button.getAttribute('data-delete-url');
+            }
+        });
+    }
+});
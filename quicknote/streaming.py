@@ -0,0 +1,75 @@
+"""
+QuickNote Streaming Module
+
+Description:
+    This module renders templates as a stream, so the start of a page is
+    sent to the browser while the rest is still being rendered, instead of
+    the whole page being built in memory first.
+    The browser can then fetch the page's stylesheets and scripts while
+    the server works on the slow part of the page, such as a notes list
+    that is only queried when the template reaches it.
+    Jinja produces a page in many small pieces; they are joined into
+    chunks of at least 'STREAM_CHUNK_SIZE', so each chunk is worth a
+    network write and a compression flush.
+    Streamed responses are sent after the view returns, so errors raised
+    while rendering cannot become error pages. Views must check their
+    input before streaming. The session cookie is also sent before the
+    template renders, so flashed messages are taken from the session
+    beforehand.
+
+    Dependencies:
+    - Flask: Provides the templates, signals and request context.
+"""
+from flask import (before_render_template, current_app,
+                   get_flashed_messages, stream_with_context,
+                   template_rendered)
+
+
+def _chunked(pieces, size):
+    """
+    Join small pieces of text into chunks of at least 'size' characters.
+    """
+    buffer, buffered = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= size:
+            yield "".join(buffer)
+            buffer, buffered = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def stream_template(template_name, **context):
+    """
+    Render a template as a streamed response.
+
+    Args:
+        template_name (str): The name of the template to render.
+        **context: The variables passed to the template.
+
+    Description:
+        This works like 'render_template', including the template context
+        processors and the rendering signals, but the template is rendered
+        while the response is being sent. The request context is kept
+        alive until then, so the template can still use 'url_for',
+        'current_user' and flashed messages.
+
+    Returns:
+        Response: A streamed HTML response.
+    """
+    app = current_app._get_current_object()
+    # Removes the messages from the session while it can still be saved;
+    # the template's own calls then read them from the request context
+    get_flashed_messages()
+    app.update_template_context(context)
+    template = app.jinja_env.get_template(template_name)
+
+    def generate():
+        before_render_template.send(app, template=template, context=context)
+        yield from _chunked(template.generate(context),
+                            app.config["STREAM_CHUNK_SIZE"])
+        template_rendered.send(app, template=template, context=context)
+
+    return app.response_class(stream_with_context(generate()),
+                              mimetype="text/html")
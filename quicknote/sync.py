@@ -0,0 +1,173 @@
+"""
+QuickNote Sync Module
+
+Description:
+    This module keeps a change feed of every user's notes, so that
+    offline clients can download only what changed since they last
+    synced instead of the whole notes list.
+    Each user has a change sequence, 'User.note_seq', that grows by one
+    for every note created, edited or deleted. A changed note stores the
+    sequence number of its change in 'Note.change_seq', and a deleted note
+    leaves a 'NoteTombstone' with the sequence number of its deletion.
+    Clients keep the highest sequence number they have seen as their
+    cursor and ask for the changes after it.
+    Sequence numbers are taken by incrementing the user's row, which
+    locks it until the transaction ends. Two transactions changing the
+    same user's notes therefore commit in sequence order, so a client
+    never skips a change that commits late.
+    Changes made through the ORM are numbered automatically by a session
+    event. Code that deletes notes with bulk DELETE statements must call
+    'record_deletions' itself. When an account is deleted its notes,
+    tombstones and user row all go, and its clients learn of it from the
+    sync endpoint answering 401.
+    Because the sequence changes whenever any of a user's notes change,
+    'notes_version' also serves as a cheap version number for pages that
+    show the user's notes.
+
+    Dependencies:
+    - collections.defaultdict: Groups changed notes by owner.
+    - datetime: Timestamps changes.
+    - sqlalchemy: Provides the statements, session events and loader
+      options.
+    - quicknote.models: Contains the User, Note and NoteTombstone models.
+"""
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session, undefer
+from quicknote.models import User, Note, NoteTombstone
+
+
+def reserve_seqs(connection, user_id, count):
+    """
+    Take the next 'count' change sequence numbers of a user.
+
+    Args:
+        connection: The database connection of the current transaction.
+        user_id (int): The user whose notes are changing.
+        count (int): How many sequence numbers to take.
+
+    Returns:
+        int: The first of the reserved sequence numbers.
+    """
+    connection.execute(
+        update(User.__table__).where(User.__table__.c.id == user_id).values(
+            note_seq=User.__table__.c.note_seq + count,
+            notes_changed_at=datetime.now()))
+    last = connection.execute(select(User.__table__.c.note_seq).where(
+        User.__table__.c.id == user_id)).scalar()
+    return last - count + 1
+
+
+def notes_version(user_id):
+    """
+    Return the version of a user's notes with one primary key lookup.
+
+    Args:
+        user_id (int): The user whose notes are shown.
+
+    Returns:
+        tuple: The user's change sequence and the time their notes last
+        changed, which is None if they never have.
+    """
+    row = User.query.with_entities(
+        User.note_seq, User.notes_changed_at).filter_by(id=user_id).first()
+    return (row.note_seq, row.notes_changed_at) if row else (0, None)
+
+
+def record_deletions(connection, user_id, note_ids):
+    """
+    Write tombstones for notes deleted without the ORM.
+
+    Args:
+        connection: The database connection of the current transaction.
+        user_id (int): The owner of the deleted notes.
+        note_ids (list): The ids of the deleted notes.
+    """
+    if not note_ids:
+        return
+
+    first = reserve_seqs(connection, user_id, len(note_ids))
+    now = datetime.now()
+    connection.execute(insert(NoteTombstone.__table__), [
+        {"note_id": note_id, "user_id": user_id,
+         "change_seq": first + offset, "deleted_at": now}
+        for offset, note_id in enumerate(note_ids)])
+
+
+@event.listens_for(Session, "before_flush")
+def _number_changes(session, flush_context, instances):
+    """
+    Number the notes about to be written, and tombstone deleted ones.
+
+    Description:
+        This session event runs before every flush. Notes are grouped by
+        owner so each user's row is only incremented once per flush.
+    """
+    changed = defaultdict(list)
+    deleted = defaultdict(list)
+
+    for note in session.new:
+        if isinstance(note, Note) and note.user_id is not None:
+            changed[note.user_id].append(note)
+    for note in session.dirty:
+        if isinstance(note, Note) and session.is_modified(note):
+            changed[note.user_id].append(note)
+    for note in session.deleted:
+        if isinstance(note, Note) and note.id is not None:
+            deleted[note.user_id].append(note)
+
+    if not changed and not deleted:
+        return
+
+    connection = session.connection(mapper=Note.__mapper__)
+    now = datetime.now()
+    for user_id in set(changed) | set(deleted):
+        notes = changed[user_id]
+        gone = deleted[user_id]
+        seq = reserve_seqs(connection, user_id, len(notes) + len(gone))
+        for note in notes:
+            note.change_seq = seq
+            seq += 1
+        for note in gone:
+            session.add(NoteTombstone(note_id=note.id, user_id=user_id,
+                                      change_seq=seq, deleted_at=now))
+            seq += 1
+
+
+def changes_since(user_id, cursor, limit):
+    """
+    Find the changes to a user's notes after a cursor.
+
+    Args:
+        user_id (int): The user syncing their notes.
+        cursor (int): The highest sequence number the client has seen,
+        or 0 for a full sync.
+        limit (int): The most changes to return.
+
+    Description:
+        The notes and tombstones after the cursor are each read through
+        their (user_id, change_seq) index, so the work done depends on the
+        number of changes rather than the number of notes.
+
+    Returns:
+        tuple: The changed notes, the ids of deleted notes, the cursor to
+        send next time and whether more changes are waiting.
+    """
+    notes = Note.query.options(undefer(Note.note_content)).filter(
+        Note.user_id == user_id, Note.change_seq > cursor
+    ).order_by(Note.change_seq).limit(limit + 1).all()
+    tombstones = NoteTombstone.query.filter(
+        NoteTombstone.user_id == user_id, NoteTombstone.change_seq > cursor
+    ).order_by(NoteTombstone.change_seq).limit(limit + 1).all()
+
+    # Merge the two feeds in sequence order and keep the first 'limit'
+    merged = sorted(notes + tombstones, key=lambda row: row.change_seq)
+    page = merged[:limit]
+    next_cursor = page[-1].change_seq if page else cursor
+
+    return ([row for row in page if isinstance(row, Note)],
+            [row.note_id for row in page
+             if isinstance(row, NoteTombstone)],
+            next_cursor,
+            len(merged) > limit)
@@ -0,0 +1,498 @@
+"""
+QuickNote Tags Module
+
+Description:
+    This module organises notes into folders and tags, and lists the notes
+    in one folder or with one tag.
+    A note is in at most one folder ('Note.folder_id') and has up to
+    'MAX_TAGS' tags, linked through 'NoteTag' rows. Folders and tags are
+    created the first time a user names them, and are only listed while
+    they hold notes. Tags are lower case; folder names keep their case.
+    Each folder and tag keeps its number of notes in 'note_count', which
+    is changed by increments in the same transaction as the notes, so the
+    counts shown next to the notes list never count notes.
+    A page of the notes in a folder is read through the (user_id,
+    folder_id, note_date, id) index of the note table. A page of the notes
+    with a tag is read from the (user_id, tag_id, note_date, note_id)
+    index of 'note_tag' alone, which holds a copy of each note's date;
+    only the notes on the page are then loaded, by primary key. Both use
+    the same keyset cursors as the full list, so every page costs the same.
+    Folder moves and note deletions made through the ORM are counted by a
+    session event, which also keeps the copied note dates up to date.
+    Tags are set with 'set_tags', which renumbers the note in the change
+    feed so cached lists and syncing clients see the change, and batches
+    of new notes, such as imports, are tagged with 'tag_new_notes'. Code
+    that deletes notes with bulk DELETE statements must call
+    'untag_notes' itself.
+    Every function takes the session to use, so the async views can call
+    them through 'AsyncSession.run_sync'.
+
+    Dependencies:
+    - collections: Adds up count changes and groups tags by note.
+    - sqlalchemy: Provides the statements, session events and loader
+      options.
+    - quicknote.models: Contains the Note, Folder, Tag and NoteTag models.
+    - quicknote.pagination: Splits the filtered lists into keyset pages.
+"""
+from collections import Counter, defaultdict
+from sqlalchemy import (bindparam, delete, event, func, insert, inspect,
+                        select, update)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.orm.attributes import flag_modified
+from quicknote.models import Folder, Note, NoteTag, Tag
+from quicknote.pagination import apply_keyset, split_page
+
+
+# Notes per IN (...) clause, below the bound parameter limit of older
+# SQLite
+ID_CHUNK_SIZE = 500
+
+folder_table = Folder.__table__
+tag_table = Tag.__table__
+note_tag = NoteTag.__table__
+
+
+def clean_name(name):
+    """
+    Collapse the spaces in a folder or tag name.
+    """
+    return " ".join(name.split()) if isinstance(name, str) else name
+
+
+def clean_tags(names):
+    """
+    Clean a list of tags, dropping empty and repeated ones.
+
+    Returns:
+        list: The tags in lower case, in the order given, or 'names'
+        itself if it is not a list of strings.
+    """
+    if not isinstance(names, list) or not all(
+            isinstance(name, str) for name in names):
+        return names
+    tags = []
+    for name in names:
+        name = clean_name(name).lower()
+        if name and name not in tags:
+            tags.append(name)
+    return tags
+
+
+def parse_tags(text):
+    """
+    Split the comma separated tags typed in a note form.
+    """
+    return clean_tags((text or "").split(","))
+
+
+def _connection(session):
+    return session.connection(mapper=Note.__mapper__)
+
+
+def _count(connection, table, changes):
+    """
+    Add the changes in a Counter to the 'note_count' of folders or tags.
+    """
+    rows = [{"row_id": row_id, "delta": delta}
+            for row_id, delta in changes.items() if delta]
+    if rows:
+        connection.execute(
+            update(table).where(table.c.id == bindparam("row_id")).values(
+                note_count=table.c.note_count + bindparam("delta")), rows)
+
+
+def _insert_missing(connection, table, rows):
+    """
+    Insert rows, skipping those whose name the user already has.
+
+    Description:
+        Two requests may create the same folder or tag at once; the
+        second insert is then ignored instead of failing.
+    """
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        statement = postgresql.insert(table).on_conflict_do_nothing()
+    elif dialect == "sqlite":
+        statement = sqlite.insert(table).on_conflict_do_nothing()
+    else:
+        statement = insert(table)
+    connection.execute(statement, rows)
+
+
+def _label_ids(connection, table, user_id, names):
+    """
+    Find the ids of a user's folders or tags, creating the missing ones.
+
+    Returns:
+        dict: The ids, keyed by name.
+    """
+    if not names:
+        return {}
+    query = select(table.c.name, table.c.id).where(
+        table.c.user_id == user_id, table.c.name.in_(names))
+    ids = dict(connection.execute(query).all())
+    missing = [name for name in names if name not in ids]
+    if missing:
+        _insert_missing(connection, table, [
+            {"user_id": user_id, "name": name, "note_count": 0}
+            for name in missing])
+        ids = dict(connection.execute(query).all())
+    return ids
+
+
+def folder_for(session, user_id, name):
+    """
+    Find the id of a user's folder, creating it if needed.
+
+    Args:
+        session: The session of the current transaction.
+        user_id (int): The owner of the folder.
+        name (str): The folder's name, or None or '' for no folder.
+
+    Returns:
+        int: The folder's id, or None for no folder.
+    """
+    name = clean_name(name)
+    if not name:
+        return None
+    return _label_ids(_connection(session), folder_table, user_id,
+                      [name])[name]
+
+
+def set_tags(session, note, names):
+    """
+    Give a note exactly the tags listed.
+
+    Args:
+        session: The session of the current transaction.
+        note (Note): The note, which is flushed first if it is new.
+        names (list): The tags, cleaned with 'clean_tags'.
+
+    Description:
+        Only the tags added or removed are written, and their counts are
+        changed by one.
+
+    Returns:
+        bool: Whether the note's tags changed.
+    """
+    new = note.id is None
+    if new:
+        session.flush()
+    connection = _connection(session)
+
+    current = dict(connection.execute(
+        select(tag_table.c.name, tag_table.c.id).join(
+            note_tag, note_tag.c.tag_id == tag_table.c.id
+        ).where(note_tag.c.note_id == note.id)).all())
+    added = _label_ids(connection, tag_table, note.user_id,
+                       [name for name in names if name not in current])
+    removed = [tag_id for name, tag_id in current.items()
+               if name not in names]
+    if not added and not removed:
+        return False
+
+    if added:
+        connection.execute(insert(note_tag), [
+            {"note_id": note.id, "tag_id": tag_id, "user_id": note.user_id,
+             "note_date": note.note_date} for tag_id in added.values()])
+    if removed:
+        connection.execute(delete(note_tag).where(
+            note_tag.c.note_id == note.id, note_tag.c.tag_id.in_(removed)))
+    changes = Counter(added.values())
+    changes.subtract(removed)
+    _count(connection, tag_table, changes)
+
+    if not new:
+        # Renumber the note, so cached lists and syncing clients see the
+        # new tags even when nothing else about it changed
+        flag_modified(note, "change_seq")
+    return True
+
+
+def tag_new_notes(session, tagged):
+    """
+    Give a batch of new notes their tags.
+
+    Args:
+        session: The session of the current transaction.
+        tagged (list): (note, tags) pairs of notes without tags yet, such
+        as imported notes, with the tags cleaned with 'clean_tags'. The
+        notes are flushed first.
+
+    Description:
+        The tags of all the notes are looked up or created, linked and
+        counted with one statement each per user, instead of one round of
+        statements per note as with 'set_tags'.
+    """
+    if not tagged:
+        return
+    session.flush()
+    connection = _connection(session)
+
+    by_user = defaultdict(list)
+    for note, tags in tagged:
+        by_user[note.user_id].append((note, tags))
+    for user_id, pairs in by_user.items():
+        names = list(dict.fromkeys(name for _, tags in pairs
+                                   for name in tags))
+        ids = _label_ids(connection, tag_table, user_id, names)
+        rows = [{"note_id": note.id, "tag_id": ids[name],
+                 "user_id": user_id, "note_date": note.note_date}
+                for note, tags in pairs for name in tags]
+        connection.execute(insert(note_tag), rows)
+        _count(connection, tag_table,
+               Counter(row["tag_id"] for row in rows))
+
+
+def untag_notes(connection, user_id=None, note_ids=None):
+    """
+    Remove the tags of notes deleted without the ORM.
+
+    Args:
+        connection: The database connection of the current transaction.
+        user_id (int, optional): Remove the tags of all of this user's
+        notes, whose folders and tags are deleted with them, so no counts
+        are changed.
+        note_ids (list, optional): Remove the tags of these notes, and
+        take them out of their folders' and tags' counts. Must run before
+        the notes themselves are deleted, as their folders are read from
+        them.
+    """
+    if user_id is not None:
+        connection.execute(delete(note_tag).where(
+            note_tag.c.user_id == user_id))
+        return
+    if not note_ids:
+        return
+
+    tags = Counter(dict(connection.execute(
+        select(note_tag.c.tag_id, func.count()).where(
+            note_tag.c.note_id.in_(note_ids)
+        ).group_by(note_tag.c.tag_id)).all()))
+    folders = Counter(dict(connection.execute(
+        select(Note.__table__.c.folder_id, func.count()).where(
+            Note.__table__.c.id.in_(note_ids),
+            Note.__table__.c.folder_id.isnot(None)
+        ).group_by(Note.__table__.c.folder_id)).all()))
+
+    _count(connection, tag_table, Counter({
+        tag_id: -count for tag_id, count in tags.items()}))
+    _count(connection, folder_table, Counter({
+        folder_id: -count for folder_id, count in folders.items()}))
+    if tags:
+        connection.execute(delete(note_tag).where(
+            note_tag.c.note_id.in_(note_ids)))
+
+
+def _previous_folder(connection, note, history):
+    """
+    Return the folder a dirty note was in before this flush.
+    """
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    # The folder was set without being loaded first
+    return connection.execute(select(Note.__table__.c.folder_id).where(
+        Note.__table__.c.id == note.id)).scalar()
+
+
+@event.listens_for(Session, "before_flush")
+def _update_labels(session, flush_context, instances):
+    """
+    Count notes into and out of folders, and keep tag dates current.
+
+    Description:
+        This session event runs before every flush. New notes count
+        towards their folder, moved notes leave one folder for another,
+        and deleted notes lose their tags and leave their folder. Notes
+        whose date changed have it copied to their tag links, so the tag
+        lists stay in date order.
+    """
+    new = [note for note in session.new if isinstance(note, Note)]
+    dirty = [note for note in session.dirty
+             if isinstance(note, Note) and note.id is not None
+             and session.is_modified(note)]
+    deleted = [note.id for note in session.deleted
+               if isinstance(note, Note) and note.id is not None]
+    if not any(note.folder_id is not None for note in new) and not dirty \
+            and not deleted:
+        return
+
+    connection = _connection(session)
+    folders = Counter(note.folder_id for note in new
+                      if note.folder_id is not None)
+    dates = []
+    for note in dirty:
+        state = inspect(note)
+        history = state.attrs.folder_id.history
+        if history.has_changes():
+            previous = _previous_folder(connection, note, history)
+            if previous != note.folder_id:
+                folders[previous] -= 1
+                folders[note.folder_id] += 1
+        if state.attrs.note_date.history.has_changes():
+            dates.append({"link_note_id": note.id,
+                          "link_note_date": note.note_date})
+    folders.pop(None, None)
+
+    _count(connection, folder_table, folders)
+    if dates:
+        connection.execute(
+            update(note_tag).where(
+                note_tag.c.note_id == bindparam("link_note_id")
+            ).values(note_date=bindparam("link_note_date")), dates)
+    untag_notes(connection, note_ids=deleted)
+
+
+def note_labels(session, notes):
+    """
+    Read the folder and tags of several notes with two queries.
+
+    Returns:
+        dict: For each note id, a dict with the 'folder' name, or None,
+        and the sorted list of 'tags'.
+    """
+    if not notes:
+        return {}
+    connection = _connection(session)
+    folder_ids = {note.folder_id for note in notes
+                  if note.folder_id is not None}
+    folders = dict(connection.execute(
+        select(folder_table.c.id, folder_table.c.name).where(
+            folder_table.c.id.in_(folder_ids))).all()) if folder_ids else {}
+
+    tags = defaultdict(list)
+    note_ids = [note.id for note in notes]
+    for start in range(0, len(note_ids), ID_CHUNK_SIZE):
+        for note_id, name in connection.execute(
+                select(note_tag.c.note_id, tag_table.c.name).join(
+                    tag_table, tag_table.c.id == note_tag.c.tag_id
+                ).where(note_tag.c.note_id.in_(
+                    note_ids[start:start + ID_CHUNK_SIZE])
+                ).order_by(tag_table.c.name)):
+            tags[note_id].append(name)
+
+    return {note.id: {"folder": folders.get(note.folder_id),
+                      "tags": tags[note.id]} for note in notes}
+
+
+def label_counts(session, user_id):
+    """
+    List a user's non-empty folders and tags with their note counts.
+
+    Returns:
+        tuple: The folders and the tags, each a list of rows with a
+        'name' and a 'note_count', sorted by name.
+    """
+    def counts(table):
+        return session.execute(
+            select(table.c.name, table.c.note_count).where(
+                table.c.user_id == user_id, table.c.note_count > 0
+            ).order_by(table.c.name)).all()
+
+    return counts(folder_table), counts(tag_table)
+
+
+class ListFilter:
+    """
+    A folder or tag the notes list is limited to.
+
+    Attributes:
+        kind (str): 'folder' or 'tag'.
+        name (str): The folder or tag name.
+        id (int): Its id, or None if the user has no such folder or tag.
+    """
+
+    def __init__(self, kind, name, id):
+        self.kind = kind
+        self.name = name
+        self.id = id
+
+    @property
+    def scope(self):
+        """
+        The part of the fragment cache key that tells filtered lists apart.
+        """
+        return f"{self.kind}:{self.id}"
+
+    @property
+    def url_args(self):
+        """
+        The query arguments selecting this filter.
+        """
+        return {self.kind: self.name}
+
+
+def find_filter(session, user_id, args):
+    """
+    Read the folder or tag to filter the notes list by.
+
+    Args:
+        session: The session to query.
+        user_id (int): The owner of the notes.
+        args (dict): The query arguments. A 'tag' is used before a
+        'folder' if both are given.
+
+    Returns:
+        ListFilter: The filter, or None if the list is not filtered.
+    """
+    for kind, table in (("tag", tag_table), ("folder", folder_table)):
+        name = clean_name(args.get(kind) or "")
+        if not name:
+            continue
+        if kind == "tag":
+            name = name.lower()
+        row_id = session.execute(select(table.c.id).where(
+            table.c.user_id == user_id, table.c.name == name)).scalar()
+        return ListFilter(kind, name, row_id)
+    return None
+
+
+def filtered_page(session, user_id, list_filter, cursor, limit,
+                  options=None):
+    """
+    Fetch one page of the notes in a folder or with a tag.
+
+    Args:
+        session: The session to query.
+        user_id (int): The owner of the notes.
+        list_filter (ListFilter): The folder or tag.
+        cursor (str): The cursor of the previous page, or None.
+        limit (int): The number of notes on the page.
+        options (list, optional): Loader options for the notes, instead
+        of loading only the columns shown in the list.
+
+    Description:
+        Raises 'InvalidCursor' if the cursor is malformed.
+
+    Returns:
+        tuple: The notes on the page and the cursor for the next page.
+    """
+    if options is None:
+        options = [load_only(Note.id, Note.note_title, Note.note_date,
+                             Note.change_seq)]
+    if list_filter.id is None:
+        if cursor:
+            apply_keyset(select(Note), cursor, limit)
+        return [], None
+
+    if list_filter.kind == "folder":
+        rows = session.execute(apply_keyset(
+            select(Note).options(*options).where(
+                Note.user_id == user_id,
+                Note.folder_id == list_filter.id), cursor, limit
+        )).scalars().all()
+        return split_page(rows, limit)
+
+    # The page is found in the tag index, then its notes are loaded
+    note_ids = session.execute(apply_keyset(
+        select(NoteTag.note_id).where(
+            NoteTag.user_id == user_id, NoteTag.tag_id == list_filter.id),
+        cursor, limit, NoteTag.note_date, NoteTag.note_id)).scalars().all()
+    notes = {note.id: note for note in session.execute(
+        select(Note).options(*options).where(Note.id.in_(note_ids))
+    ).scalars()} if note_ids else {}
+    return split_page([notes[note_id] for note_id in note_ids
+                       if note_id in notes], limit)
@@ -0,0 +1,405 @@
+"""
+QuickNote Export and Import Module
+
+Description:
+    This module exports a user's notes to a file and imports them again,
+    for backups and for moving notes between accounts.
+    Three formats are supported:
+    - ndjson: One JSON object per line, with 'title', 'content', 'date',
+      'folder' and 'tags' keys, the same keys as the JSON API.
+    - csv: A header row followed by one row per note, with the tags
+      separated by commas.
+    - markdown: A zip archive with one Markdown file per note, holding
+      the title, date, folder and tags in a front matter block.
+    Exports are generators that read the notes in batches of
+    'EXPORT_BATCH_SIZE' from a server-side cursor and yield the file a
+    piece at a time, so memory use stays flat whatever the account size.
+    Imports read the upload one note at a time and save the notes in
+    transactions of 'IMPORT_BATCH_SIZE' notes through the ORM, so the
+    search index and sync change feed are kept up to date. Folders and
+    tags are looked up or created once per batch. Notes that fail
+    validation are skipped and reported; the rest are imported.
+    'export_response' wraps an export in a streaming download response.
+
+    Dependencies:
+    - csv, io, json, zipfile: Read and write the export formats.
+    - re: Builds file names for Markdown notes.
+    - datetime: Parses note dates.
+    - Flask: Provides the settings and the streaming response.
+    - sqlalchemy.orm.undefer: Loads note contents with the notes.
+    - quicknote.db: The database instance used to save notes.
+    - quicknote.models: Contains the Note model.
+    - quicknote.tags: Reads and restores the folders and tags of notes.
+    - quicknote.validation: Checks imported notes.
+"""
+import csv
+import io
+import json
+import re
+import zipfile
+from datetime import datetime
+from flask import Response, current_app, stream_with_context
+from sqlalchemy.orm import undefer
+from quicknote import db
+from quicknote.models import Note
+from quicknote.tags import (clean_name, clean_tags, folder_for,
+                            note_labels, parse_tags, tag_new_notes)
+from quicknote.validation import labels_error, note_error
+
+
+# File extension and MIME type of each format
+FORMATS = {
+    "ndjson": ("ndjson", "application/x-ndjson"),
+    "csv": ("csv", "text/csv"),
+    "markdown": ("zip", "application/zip"),
+}
+
+CSV_FIELDS = ("title", "content", "date", "folder", "tags")
+
+# Skipped notes reported back to the user, at most
+MAX_REPORTED_ERRORS = 100
+
+
+class InvalidUpload(ValueError):
+    """
+    Raised when an uploaded file cannot be read at all.
+    """
+
+
+def _user_notes(user_id):
+    """
+    Yield a user's notes oldest first, a batch at a time.
+
+    Description:
+        'stream_results' asks the database driver for a server-side
+        cursor where it supports one, so rows are fetched as they are
+        needed instead of all at once.
+    """
+    return (Note.query.options(undefer(Note.note_content))
+            .filter_by(user_id=user_id)
+            .order_by(Note.note_date, Note.id)
+            .execution_options(stream_results=True)
+            .yield_per(current_app.config["EXPORT_BATCH_SIZE"]))
+
+
+def _records(user_id):
+    """
+    Yield each of a user's notes with its export record.
+
+    Description:
+        The folders and tags are read for a batch of notes at a time.
+    """
+    def labelled(notes):
+        labels = note_labels(db.session, notes)
+        for note in notes:
+            yield note, {
+                "title": note.note_title,
+                "content": note.note_content,
+                "date": (note.note_date.isoformat()
+                         if note.note_date else None),
+                "folder": labels[note.id]["folder"],
+                "tags": labels[note.id]["tags"],
+            }
+
+    batch_size = current_app.config["EXPORT_BATCH_SIZE"]
+    batch = []
+    for note in _user_notes(user_id):
+        batch.append(note)
+        if len(batch) >= batch_size:
+            yield from labelled(batch)
+            batch = []
+    yield from labelled(batch)
+
+
+def export_ndjson(user_id):
+    """
+    Yield a user's notes as newline-delimited JSON.
+    """
+    for _, record in _records(user_id):
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def export_csv(user_id):
+    """
+    Yield a user's notes as CSV, starting with a header row.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for _, record in _records(user_id):
+        writer.writerow(dict(record, folder=record["folder"] or "",
+                             tags=", ".join(record["tags"])))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+class _ChunkWriter(io.RawIOBase):
+    """
+    Write-only stream that collects bytes until they are taken.
+
+    Description:
+        The stream is not seekable, so 'zipfile' writes each member's
+        sizes after its data and never goes back to earlier parts of the
+        archive, which lets the archive be sent while it is being built.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _markdown_name(note):
+    """
+    Build a unique, readable file name for a note in the archive.
+    """
+    slug = re.sub(r"[^a-z0-9]+", "-", (note.note_title or "").lower())
+    date = note.note_date.strftime("%Y-%m-%d") if note.note_date else "note"
+    return f"{date}-{note.id}-{slug.strip('-') or 'note'}.md"
+
+
+def _markdown(record):
+    """
+    Render a note's export record as Markdown with a front matter block.
+
+    Description:
+        The front matter values are written as JSON, which is also valid
+        YAML, so titles containing any characters round-trip.
+    """
+    header = "".join(
+        f"{key}: {json.dumps(record[key], ensure_ascii=False)}\n"
+        for key in ("title", "date", "folder", "tags"))
+    return f"---\n{header}---\n\n{record['content']}\n"
+
+
+def export_markdown(user_id):
+    """
+    Yield a zip archive holding one Markdown file per note.
+    """
+    output = _ChunkWriter()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+        for note, record in _records(user_id):
+            archive.writestr(_markdown_name(note),
+                             _markdown(record).encode("utf-8"))
+            yield output.take()
+    yield output.take()
+
+
+EXPORTERS = {
+    "ndjson": export_ndjson,
+    "csv": export_csv,
+    "markdown": export_markdown,
+}
+
+
+def export_response(user_id, fmt):
+    """
+    Build a response that streams a user's notes as a file download.
+
+    Args:
+        user_id (int): The user whose notes are exported.
+        fmt (str): One of the keys of 'FORMATS'.
+
+    Description:
+        The request context is kept alive while the response is sent, so
+        the export can keep reading from the database session.
+
+    Returns:
+        Response: The streaming response.
+    """
+    extension, mimetype = FORMATS[fmt]
+    filename = f"quicknote-{datetime.now():%Y%m%d}.{extension}"
+    return Response(
+        stream_with_context(EXPORTERS[fmt](user_id)), mimetype=mimetype,
+        headers={"Content-Disposition":
+                 f'attachment; filename="{filename}"'})
+
+
+def _read_ndjson(stream):
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig")
+    for line in text:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+
+def _read_csv(stream):
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    if not reader.fieldnames or "title" not in reader.fieldnames:
+        raise InvalidUpload("The CSV file must have a 'title' column")
+    yield from reader
+
+
+def _parse_markdown(text):
+    """
+    Read the title, date, folder, tags and content of an exported
+    Markdown note.
+    """
+    record = {"title": None, "date": None, "content": text}
+    if text.startswith("---\n"):
+        header, separator, body = text[4:].partition("\n---\n")
+        if separator:
+            for line in header.splitlines():
+                key, _, value = line.partition(":")
+                if key.strip() in ("title", "date", "folder", "tags"):
+                    try:
+                        record[key.strip()] = json.loads(value)
+                    except ValueError:
+                        record[key.strip()] = value.strip()
+            record["content"] = body.strip("\n")
+    return record
+
+
+def _read_markdown(stream):
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile:
+        raise InvalidUpload("The file is not a zip archive")
+    with archive:
+        for info in archive.infolist():
+            if info.is_dir() or not info.filename.endswith(".md"):
+                continue
+            yield _parse_markdown(
+                archive.read(info).decode("utf-8", "replace"))
+
+
+READERS = {
+    "ndjson": _read_ndjson,
+    "csv": _read_csv,
+    "markdown": _read_markdown,
+}
+
+
+def _note(user_id, record):
+    """
+    Build a Note from an imported record, or return an error message.
+    """
+    if not isinstance(record, dict):
+        return None, "Not a note"
+
+    error = note_error(record.get("title"), record.get("content"))
+    if error:
+        return None, error
+
+    note_date = datetime.now()
+    if record.get("date"):
+        try:
+            note_date = datetime.fromisoformat(record["date"])
+        except (TypeError, ValueError):
+            return None, "Date is not valid!"
+        # Dates are stored as naive local times
+        if note_date.tzinfo is not None:
+            note_date = note_date.astimezone().replace(tzinfo=None)
+
+    return Note(note_title=record["title"], note_content=record["content"],
+                note_date=note_date, user_id=user_id), None
+
+
+def _labels(record):
+    """
+    Read the folder and tags of an imported record.
+
+    Description:
+        Tags may be a list, or a comma separated string as in CSV files.
+        Records without a folder or tags, such as older exports, are
+        imported without them.
+
+    Returns:
+        tuple: The folder name, the list of tags and a message describing
+        the first problem found, or None.
+    """
+    folder = clean_name(record.get("folder") or None)
+    tags = record.get("tags") or []
+    tags = parse_tags(tags) if isinstance(tags, str) else clean_tags(tags)
+    return folder, tags, labels_error(folder, tags)
+
+
+def _save(user_id, batch, folders):
+    """
+    Save a batch of imported notes with their folders and tags.
+
+    Args:
+        user_id (int): The user receiving the notes.
+        batch (list): (note, folder, tags) triples.
+        folders (dict): The folder ids already looked up, by name, which
+        is updated.
+    """
+    for note, folder, _ in batch:
+        if folder not in folders:
+            folders[folder] = folder_for(db.session, user_id, folder)
+        note.folder_id = folders[folder]
+    db.session.add_all([note for note, _, _ in batch])
+    tag_new_notes(db.session, [(note, tags) for note, _, tags in batch
+                               if tags])
+    db.session.commit()
+
+
+def import_notes(user_id, stream, fmt):
+    """
+    Import notes from an uploaded file into a user's account.
+
+    Args:
+        user_id (int): The user receiving the notes.
+        stream: A binary file object with the upload. Markdown archives
+        must be seekable.
+        fmt (str): One of the keys of 'FORMATS'.
+
+    Description:
+        Each batch of 'IMPORT_BATCH_SIZE' notes is committed in its own
+        transaction, so a failure part way through keeps the batches
+        already saved.
+
+    Returns:
+        tuple: The number of notes imported, and a list of up to
+        'MAX_REPORTED_ERRORS' (record number, error) pairs for skipped
+        notes. Raises 'InvalidUpload' if the file cannot be read.
+    """
+    batch_size = current_app.config["IMPORT_BATCH_SIZE"]
+    imported, errors, batch, folders = 0, [], [], {}
+
+    for number, record in enumerate(READERS[fmt](stream), start=1):
+        note, error = _note(user_id, record)
+        if not error:
+            folder, tags, error = _labels(record)
+        if error:
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append((number, error))
+            continue
+
+        batch.append((note, folder, tags))
+        if len(batch) >= batch_size:
+            _save(user_id, batch, folders)
+            imported += len(batch)
+            batch = []
+
+    if batch:
+        _save(user_id, batch, folders)
+        imported += len(batch)
+
+    return imported, errors
+
+
+def format_for(filename):
+    """
+    Guess the import format from an uploaded file's name.
+    """
+    extension = filename.rsplit(".", 1)[-1].lower() if filename else ""
+    for fmt, (fmt_extension, _) in FORMATS.items():
+        if extension in (fmt, fmt_extension):
+            return fmt
+    return None
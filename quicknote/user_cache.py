@@ -0,0 +1,114 @@
+"""
+QuickNote User Cache Module
+
+Description:
+    This module caches the user rows that Flask-Login needs to rebuild
+    'current_user' on every authenticated request, so most page views no
+    longer read the user table.
+    Cached users are rebuilt as detached 'User' objects holding only the
+    profile columns. The password hash is never cached; code that needs it,
+    such as the login view, queries the user table directly.
+    Views that change or delete a user must call 'invalidate_user' after
+    committing.
+
+    Dependencies:
+    - flask.current_app: Provides the cache belonging to the running app.
+    - sqlalchemy.orm.make_transient_to_detached: Marks rebuilt users as
+      existing rows without attaching them to a session.
+    - quicknote.cache: Provides the tiered cache and shared backends.
+    - quicknote.models: Contains the User model being cached.
+"""
+from flask import current_app
+from sqlalchemy.orm import make_transient_to_detached
+from quicknote.cache import TieredCache, load_backend
+from quicknote.models import User
+
+
+# Columns copied into the cache; the password hash is left out on purpose
+CACHED_COLUMNS = ("id", "first_name", "last_name", "email")
+
+
+def init_app(app):
+    """
+    Create the user cache for an application.
+
+    Args:
+        app (Flask): The application being configured.
+
+    Description:
+        The cache size and lifetimes come from the 'USER_CACHE_SIZE',
+        'USER_CACHE_TTL' and 'USER_CACHE_LOCAL_TTL' settings. The shared
+        backend named by 'CACHE_BACKEND' is created once per application
+        and reused by every cache that needs it.
+    """
+    if "cache_backend" not in app.extensions:
+        app.extensions["cache_backend"] = load_backend(
+            app.config.get("CACHE_BACKEND"))
+
+    app.extensions["user_cache"] = TieredCache(
+        "user:",
+        maxsize=app.config.get("USER_CACHE_SIZE", 10000),
+        ttl=app.config.get("USER_CACHE_TTL", 300),
+        local_ttl=app.config.get("USER_CACHE_LOCAL_TTL", 30),
+        backend=app.extensions["cache_backend"])
+
+
+def load_user(user_id):
+    """
+    Return the user with the given id, using the cache when possible.
+
+    Args:
+        user_id (int): The unique identifier of the user.
+
+    Returns:
+        User: A detached user object, or None if no such user exists.
+    """
+    cache = current_app.extensions["user_cache"]
+
+    fields = cache.get(user_id)
+    if fields is None:
+        user = User.query.get(user_id)
+        if user is None:
+            return None
+        fields = cache_user(user)
+
+    user = User(**fields)
+    make_transient_to_detached(user)
+    return user
+
+
+def is_cached(user_id):
+    """
+    Return whether a user is in the cache.
+    """
+    return current_app.extensions["user_cache"].get(user_id) is not None
+
+
+def cache_user(user):
+    """
+    Put a user in the cache.
+
+    Args:
+        user: A User, or a row holding at least the 'CACHED_COLUMNS'.
+
+    Description:
+        The async views load users with the async database session and
+        cache them here, so Flask-Login then finds them without a
+        blocking query.
+
+    Returns:
+        dict: The cached fields.
+    """
+    fields = {column: getattr(user, column) for column in CACHED_COLUMNS}
+    current_app.extensions["user_cache"].set(user.id, fields)
+    return fields
+
+
+def invalidate_user(user_id):
+    """
+    Drop a user from the cache after their row was changed or deleted.
+
+    Args:
+        user_id (int): The unique identifier of the user.
+    """
+    current_app.extensions["user_cache"].delete(user_id)
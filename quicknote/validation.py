@@ -0,0 +1,128 @@
+"""
+QuickNote Validation Module
+
+Description:
+    This module holds the rules that note titles and contents, folder and
+    tag names, and new accounts, must meet. They are shared by the forms,
+    the JSON API and the async views, so something that can be saved one
+    way can be saved every other way.
+
+    Dependencies:
+    - None.
+"""
+
+
+# Longest title and content a note may have
+TITLE_MAX_LENGTH = 30
+CONTENT_MAX_LENGTH = 5000
+
+# Longest folder or tag name, and the most tags a note may have
+LABEL_MAX_LENGTH = 30
+MAX_TAGS = 10
+
+
+def note_error(note_title, note_content):
+    """
+    Check a note's title and content.
+
+    Args:
+        note_title (str): The title of the note.
+        note_content (str): The content of the note.
+
+    Returns:
+        str: A message describing the first problem found, or None if the
+        note is valid.
+    """
+    if not isinstance(note_title, str) or len(note_title.strip()) < 1:
+        return "Title is too short!"
+
+    elif not isinstance(note_content, str) or len(note_content.strip()) < 1:
+        return "Note is too short!"
+
+    elif len(note_title) > TITLE_MAX_LENGTH:
+        return "Title is too long!"
+
+    elif len(note_content) > CONTENT_MAX_LENGTH:
+        return "Note is too long!"
+
+    return None
+
+
+def labels_error(folder, tags):
+    """
+    Check the folder and tags given to a note.
+
+    Args:
+        folder (str): The name of the note's folder, or None.
+        tags (list): The note's tags, already split and cleaned.
+
+    Returns:
+        str: A message describing the first problem found, or None if the
+        folder and tags are valid.
+    """
+    if folder is not None and not isinstance(folder, str):
+        return "Folder is not valid!"
+
+    elif folder and len(folder) > LABEL_MAX_LENGTH:
+        return "Folder name is too long!"
+
+    elif not isinstance(tags, list) or not all(
+            isinstance(tag, str) for tag in tags):
+        return "Tags are not valid!"
+
+    elif len(tags) > MAX_TAGS:
+        return f"A note can have at most {MAX_TAGS} tags!"
+
+    elif any(len(tag) > LABEL_MAX_LENGTH for tag in tags):
+        return "Tag is too long!"
+
+    return None
+
+
+def signup_error(email, first_name, last_name, password1, password2):
+    """
+    Check the details entered in the signup form.
+
+    Args:
+        email (str): The email address.
+        first_name (str): The first name.
+        last_name (str): The last name.
+        password1 (str): The password.
+        password2 (str): The password, repeated.
+
+    Description:
+        Whether the email address is already in use is checked by the
+        caller, before these rules.
+
+    Returns:
+        str: A message describing the first problem found, or None if the
+        details are valid.
+    """
+    if not email or len(email.strip()) < 4:
+        return "The Email must consist of more than 3 characters"
+
+    elif len(email.strip()) > 150:
+        return "The Email must consist of less than 150 characters"
+
+    elif not first_name or len(first_name.strip()) < 2:
+        return "The First Name must consist of more than 1 character"
+
+    elif len(first_name.strip()) > 30:
+        return "The First Name must consist of less than 30 characters"
+
+    elif not last_name or len(last_name.strip()) < 2:
+        return "The Last Name must consist of more than 1 character"
+
+    elif len(last_name.strip()) > 30:
+        return "The Last Name must consist of less than 30 characters"
+
+    elif password1 != password2:
+        return "The Passwords do not match"
+
+    elif not password1 or len(password1.strip()) < 7:
+        return "The Password must be at least 7 characters"
+
+    elif len(password1.strip()) > 150:
+        return "The Password is too Long!"
+
+    return None
@@ -4,16 +4,21 @@ QuickNote Application Entry Point
 Description:
     This module serves as the entry point for the QuickNote application.
     It launches the Flask application using the Flask development server when
-    executed directly.
+    executed directly, and exposes 'app' for production WSGI servers.
+    In production the application is served by Gunicorn, configured in
+    'gunicorn.conf.py' ('gunicorn --config gunicorn.conf.py run:app').
     The server configuration is based on environment variables defined in
     the 'os' module, specifying the host, port, and debug mode.
 
 Dependencies:
     - os: Provides access to the operating system environment.
-    - quicknote.app: The Flask application instance for QuickNote.
+    - quicknote.create_app: Builds the Flask application for QuickNote.
 """
 import os
-from quicknote import app
+from quicknote import create_app
+
+
+app = create_app()
 
 
 if __name__ == "__main__":
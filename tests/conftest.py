@@ -0,0 +1,57 @@
+"""
+QuickNote Test Fixtures
+
+Description:
+    This module provides the fixtures shared by the tests: an application
+    using a fresh SQLite database for each test, with its tables created
+    from the models, and a user to own the notes the tests create.
+    The tests run with 'python -m pytest' from the project root.
+
+    Dependencies:
+    - pytest: Runs the tests and provides the fixtures.
+    - quicknote: Provides the application factory and database.
+    - quicknote.models: Contains the User model.
+"""
+import pytest
+from quicknote import create_app, db
+from quicknote.models import User
+
+
+@pytest.fixture
+def app(tmp_path):
+    """
+    Create an application with an empty database, inside its context.
+    """
+    app = create_app({
+        "TESTING": True,
+        "SECRET_KEY": "test",
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'quicknote.db'}",
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def _add_user(email):
+    user = User(email=email, first_name="Ann", last_name="Lee",
+                password="!")
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+@pytest.fixture
+def user_id(app):
+    """
+    Create a user and return their id.
+    """
+    return _add_user("ann@example.com")
+
+
+@pytest.fixture
+def other_user_id(app):
+    """
+    Create a second user, whose notes must never show up for the first.
+    """
+    return _add_user("bob@example.com")
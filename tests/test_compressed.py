@@ -0,0 +1,111 @@
+"""
+QuickNote Compressed Text Tests
+
+Description:
+    These tests check the stored format of note contents: a marker byte
+    followed by the UTF-8 text (raw) or the text compressed with zlib,
+    chosen by the size threshold.
+
+    Dependencies:
+    - pytest: Runs the tests.
+    - sqlalchemy: Reads the stored bytes.
+    - quicknote.compressed: Encodes and decodes stored text.
+    - quicknote.db: The database the notes are saved to.
+    - quicknote.models: Contains the Note model.
+"""
+import pytest
+from sqlalchemy import text
+from quicknote import db
+from quicknote.compressed import (DEFAULT_MIN_SIZE, RAW, ZLIB, decode,
+                                  encode)
+from quicknote.models import Note
+
+
+@pytest.mark.parametrize("size, marker", [
+    (0, RAW),
+    (DEFAULT_MIN_SIZE - 1, RAW),
+    (DEFAULT_MIN_SIZE, ZLIB),
+    (DEFAULT_MIN_SIZE * 20, ZLIB),
+])
+def test_threshold(size, marker):
+    """
+    Compressible text is compressed from the threshold size up.
+    """
+    value = encode("a" * size)
+    assert value[:1] == marker
+    assert decode(value) == "a" * size
+
+
+def test_threshold_counts_bytes():
+    """
+    The threshold applies to the UTF-8 size, not the number of characters.
+    """
+    content = "é" * (DEFAULT_MIN_SIZE // 2)
+    assert encode(content)[:1] == ZLIB
+    assert encode(content[1:])[:1] == RAW
+    assert decode(encode(content)) == content
+
+
+def test_incompressible_text_stays_raw(app):
+    """
+    Text that zlib cannot shrink is stored raw even above the threshold.
+    """
+    # Level 0 only wraps the text, so the result is always larger
+    app.config["CONTENT_COMPRESS_LEVEL"] = 0
+    content = "a" * DEFAULT_MIN_SIZE * 4
+    value = encode(content)
+    assert value == RAW + content.encode("utf-8")
+    assert decode(value) == content
+
+
+def test_unknown_marker():
+    """
+    Values not written by 'encode' are rejected rather than misread.
+    """
+    with pytest.raises(ValueError):
+        decode(b"\x02data")
+
+
+def _stored(note_id):
+    return bytes(db.session.execute(
+        text("SELECT note_content FROM note WHERE id = :id"),
+        {"id": note_id}).scalar())
+
+
+@pytest.mark.parametrize("compression, long_marker", [
+    (True, ZLIB),
+    (False, RAW),
+])
+def test_column_round_trip(app, user_id, compression, long_marker):
+    """
+    Note contents read back unchanged, stored per the settings.
+    """
+    app.config["CONTENT_COMPRESSION"] = compression
+    min_size = app.config["CONTENT_COMPRESS_MIN_SIZE"]
+    short = Note(note_title="s", note_content="x" * (min_size - 1),
+                 user_id=user_id)
+    long = Note(note_title="l", note_content="y" * min_size,
+                user_id=user_id)
+    db.session.add_all([short, long])
+    db.session.commit()
+
+    assert _stored(short.id)[:1] == RAW
+    assert _stored(long.id)[:1] == long_marker
+
+    db.session.expire_all()
+    assert (db.session.get(Note, short.id).note_content
+            == "x" * (min_size - 1))
+    assert db.session.get(Note, long.id).note_content == "y" * min_size
+
+
+def test_values_readable_after_setting_change(app, user_id):
+    """
+    Contents stored compressed can still be read with compression off.
+    """
+    note = Note(note_title="t", note_content="z" * 1000, user_id=user_id)
+    db.session.add(note)
+    db.session.commit()
+
+    app.config["CONTENT_COMPRESSION"] = False
+    db.session.expire_all()
+    assert db.session.get(Note, note.id).note_content == "z" * 1000
@@ -0,0 +1,113 @@
+"""
+QuickNote Revision Tests
+
+Description:
+    These tests check that note revisions stored as deltas and snapshots
+    rebuild to exactly the versions that were saved.
+
+    Dependencies:
+    - pytest: Runs the tests.
+    - quicknote.db: The database the notes are saved to.
+    - quicknote.models: Contains the Note and NoteRevision models.
+    - quicknote.revisions: Builds, applies and loads revisions.
+"""
+import pytest
+from quicknote import db
+from quicknote.models import Note, NoteRevision
+from quicknote.revisions import apply_delta, load_revision, make_delta
+
+
+BASE = " ".join(f"word{index}" for index in range(300))
+
+
+@pytest.mark.parametrize("old, new", [
+    ("", ""),
+    ("", "new note"),
+    ("old note", ""),
+    ("same text", "same text"),
+    ("the quick brown fox", "the slow brown fox"),
+    ("the quick brown fox", "a quick brown fox jumps"),
+    ("line one\nline two\n", "line one\n  inserted\nline two\n"),
+    ("naïve café", "naïve café ünïcode ✓"),
+    (BASE, BASE.replace("word150", "changed").replace("word152 ", "")),
+], ids=["empty", "create", "clear", "same", "replace", "ends", "lines",
+        "unicode", "long"])
+def test_delta_round_trip(old, new):
+    """
+    Applying the delta between two contents to the first gives the second.
+    """
+    operations = make_delta(old, new)
+    assert operations is not None
+    assert apply_delta(old, operations) == new
+
+
+def test_large_rewrite_has_no_delta():
+    """
+    Rewrites too large to compare are left to be stored as snapshots.
+    """
+    old = " ".join(f"a{index}" for index in range(1000))
+    new = " ".join(f"b{index}" for index in range(1000))
+    assert make_delta(old, new) is None
+
+
+def _snapshots(note_id):
+    return [row.revision for row in NoteRevision.query.filter_by(
+        note_id=note_id, is_snapshot=True).order_by(NoteRevision.revision)]
+
+
+def test_every_revision_rebuilds_across_snapshots(app, user_id):
+    """
+    Each revision, whether a delta or a snapshot, rebuilds exactly.
+    """
+    app.config["REVISION_SNAPSHOT_INTERVAL"] = 3
+
+    # Small edits stored as deltas, a rewrite stored as a snapshot because
+    # its delta is larger, then small edits again
+    versions = [(f"v{index}", BASE.replace(f"word{index * 10} ",
+                                           f"edit{index} "))
+                for index in range(8)]
+    versions.append(("rewrite", " ".join(
+        f"other{index}" for index in range(200))))
+    versions.append(("after", versions[-1][1] + " appended"))
+
+    note = Note(note_title=versions[0][0], note_content=versions[0][1],
+                user_id=user_id)
+    db.session.add(note)
+    db.session.commit()
+    for title, content in versions[1:]:
+        note.note_title = title
+        note.note_content = content
+        db.session.commit()
+
+    # A snapshot starts the history, then every third revision, and the
+    # rewrite starts a new run
+    assert _snapshots(note.id) == [1, 4, 7, 9]
+    for number, (title, content) in enumerate(versions, start=1):
+        assert load_revision(note.id, number) == (title, content)
+    assert load_revision(note.id, len(versions) + 1) is None
+
+
+def test_unedited_note_has_no_revisions(app, user_id):
+    """
+    History only starts with a note's first edit.
+    """
+    note = Note(note_title="t", note_content="c", user_id=user_id)
+    db.session.add(note)
+    db.session.commit()
+    assert load_revision(note.id, 1) is None
+
+
+def test_revisions_removed_with_note(app, user_id):
+    """
+    Deleting a note through the ORM deletes its revisions.
+    """
+    note = Note(note_title="t", note_content="one", user_id=user_id)
+    db.session.add(note)
+    db.session.commit()
+    note.note_content = "two"
+    db.session.commit()
+    note_id = note.id
+
+    db.session.delete(note)
+    db.session.commit()
+    assert NoteRevision.query.filter_by(note_id=note_id).count() == 0
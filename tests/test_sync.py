@@ -0,0 +1,102 @@
+"""
+QuickNote Sync Tests
+
+Description:
+    These tests check that the change feed read by 'changes_since' gives a
+    client every edit and delete after its cursor, once.
+
+    Dependencies:
+    - quicknote.db: The database the notes are saved to.
+    - quicknote.models: Contains the Note model.
+    - quicknote.sync: Reads the change feed and records bulk deletions.
+"""
+from quicknote import db
+from quicknote.models import Note
+from quicknote.sync import changes_since, record_deletions
+
+
+def _add_notes(user_id, count):
+    notes = [Note(note_title=f"n{index}", note_content=f"c{index}",
+                  user_id=user_id) for index in range(count)]
+    db.session.add_all(notes)
+    db.session.commit()
+    return notes
+
+
+def test_edit_and_delete(app, user_id):
+    """
+    A client at a cursor sees later edits and deletes, and nothing else.
+    """
+    kept, removed, untouched = _add_notes(user_id, 3)
+    notes, deleted, cursor, has_more = changes_since(user_id, 0, 100)
+    assert {note.id for note in notes} == {kept.id, removed.id,
+                                           untouched.id}
+    assert deleted == []
+    assert not has_more
+
+    removed_id = removed.id
+    kept.note_content = "edited"
+    db.session.delete(removed)
+    db.session.commit()
+
+    notes, deleted, next_cursor, has_more = changes_since(
+        user_id, cursor, 100)
+    assert [note.id for note in notes] == [kept.id]
+    assert notes[0].note_content == "edited"
+    assert deleted == [removed_id]
+    assert next_cursor > cursor
+    assert not has_more
+
+    # Nothing is sent twice
+    assert changes_since(user_id, next_cursor, 100) == (
+        [], [], next_cursor, False)
+
+    # A full sync gets the notes as they are now
+    notes, deleted, _, _ = changes_since(user_id, 0, 100)
+    assert {note.id for note in notes} == {kept.id, untouched.id}
+    assert deleted == [removed_id]
+
+
+def test_bulk_delete(app, user_id):
+    """
+    Notes deleted without the ORM are reported through their tombstones.
+    """
+    notes = _add_notes(user_id, 3)
+    _, _, cursor, _ = changes_since(user_id, 0, 100)
+
+    note_ids = [note.id for note in notes[:2]]
+    record_deletions(db.session.connection(), user_id, note_ids)
+    Note.query.filter(Note.id.in_(note_ids)).delete(
+        synchronize_session=False)
+    db.session.commit()
+
+    notes, deleted, _, _ = changes_since(user_id, cursor, 100)
+    assert notes == []
+    assert sorted(deleted) == sorted(note_ids)
+
+
+def test_pages(app, user_id):
+    """
+    Following the cursor page by page returns every change exactly once.
+    """
+    notes = _add_notes(user_id, 5)
+    db.session.delete(notes[0])
+    notes[1].note_title = "edited"
+    db.session.commit()
+
+    seen, gone, cursor, has_more = [], [], 0, True
+    while has_more:
+        page, deleted, cursor, has_more = changes_since(user_id, cursor, 2)
+        assert len(page) + len(deleted) <= 2
+        seen += [note.id for note in page]
+        gone += deleted
+    assert sorted(seen) == sorted(note.id for note in notes[1:])
+    assert gone == [notes[0].id]
+
+
+def test_other_users(app, user_id, other_user_id):
+    """
+    Each user's feed only holds their own notes.
+    """
+    _add_notes(other_user_id, 2)
+    assert changes_since(user_id, 0, 100) == ([], [], 0, False)
@@ -0,0 +1,138 @@
+"""
+QuickNote Folder and Tag Tests
+
+Description:
+    These tests check that the note counts stored on folders and tags stay
+    equal to the number of notes they hold as notes are moved, retagged
+    and deleted.
+
+    Dependencies:
+    - sqlalchemy: Counts the notes in each folder and tag.
+    - quicknote.db: The database the notes are saved to.
+    - quicknote.models: Contains the Note, Folder, Tag and NoteTag models.
+    - quicknote.tags: Files and tags notes.
+"""
+from sqlalchemy import func
+from quicknote import db
+from quicknote.models import Folder, Note, NoteTag, Tag
+from quicknote.tags import folder_for, set_tags, tag_new_notes, untag_notes
+
+
+def _counts(user_id):
+    """
+    Return the stored folder and tag counts, checked against the notes.
+    """
+    folders = dict(db.session.query(Folder.name, Folder.note_count)
+                   .filter_by(user_id=user_id))
+    tags = dict(db.session.query(Tag.name, Tag.note_count)
+                .filter_by(user_id=user_id))
+
+    in_folders = dict(db.session.query(Folder.name, func.count(Note.id))
+                      .outerjoin(Note, Note.folder_id == Folder.id)
+                      .filter(Folder.user_id == user_id)
+                      .group_by(Folder.name))
+    tagged = dict(db.session.query(Tag.name, func.count(NoteTag.note_id))
+                  .outerjoin(NoteTag, NoteTag.tag_id == Tag.id)
+                  .filter(Tag.user_id == user_id)
+                  .group_by(Tag.name))
+    assert folders == in_folders
+    assert tags == tagged
+    return folders, tags
+
+
+def _add_note(user_id, folder=None, tags=()):
+    note = Note(note_title="t", note_content="c", user_id=user_id,
+                folder_id=folder_for(db.session, user_id, folder))
+    db.session.add(note)
+    set_tags(db.session, note, list(tags))
+    db.session.commit()
+    return note
+
+
+def test_move(app, user_id):
+    """
+    Moving notes between folders moves their counts with them.
+    """
+    first = _add_note(user_id, "work")
+    second = _add_note(user_id, "work")
+    assert _counts(user_id)[0] == {"work": 2}
+
+    first.folder_id = folder_for(db.session, user_id, "home")
+    db.session.commit()
+    assert _counts(user_id)[0] == {"work": 1, "home": 1}
+
+    second.folder_id = None
+    db.session.commit()
+    assert _counts(user_id)[0] == {"work": 0, "home": 1}
+
+    # Setting the folder without loading the note first
+    db.session.expire_all()
+    note = db.session.get(Note, first.id)
+    db.session.expire(note, ["folder_id"])
+    note.folder_id = folder_for(db.session, user_id, "work")
+    db.session.commit()
+    assert _counts(user_id)[0] == {"work": 1, "home": 0}
+
+
+def test_retag(app, user_id):
+    """
+    Only the tags added or removed change their counts.
+    """
+    first = _add_note(user_id, tags=["a", "b"])
+    _add_note(user_id, tags=["b"])
+    assert _counts(user_id)[1] == {"a": 1, "b": 2}
+
+    assert set_tags(db.session, first, ["b", "c"])
+    db.session.commit()
+    assert _counts(user_id)[1] == {"a": 0, "b": 2, "c": 1}
+
+    assert not set_tags(db.session, first, ["c", "b"])
+    assert set_tags(db.session, first, [])
+    db.session.commit()
+    assert _counts(user_id)[1] == {"a": 0, "b": 1, "c": 0}
+
+
+def test_tag_new_notes(app, user_id):
+    """
+    Tagging a batch of new notes counts each tag once per note.
+    """
+    notes = [Note(note_title="t", note_content="c", user_id=user_id)
+             for _ in range(3)]
+    db.session.add_all(notes)
+    tag_new_notes(db.session, [(notes[0], ["a", "b"]), (notes[1], ["a"]),
+                               (notes[2], ["c"])])
+    db.session.commit()
+    assert _counts(user_id)[1] == {"a": 2, "b": 1, "c": 1}
+
+
+def test_delete(app, user_id):
+    """
+    Deleted notes leave their folders' and tags' counts.
+    """
+    first = _add_note(user_id, "work", ["a"])
+    second = _add_note(user_id, "work", ["a", "b"])
+    third = _add_note(user_id, "home", ["b"])
+    _add_note(user_id, "home", ["a"])
+
+    db.session.delete(first)
+    db.session.commit()
+    assert _counts(user_id) == ({"work": 1, "home": 2}, {"a": 2, "b": 2})
+
+    # Bulk deletes, as done by the API, remove the tags first
+    note_ids = [second.id, third.id]
+    untag_notes(db.session.connection(), note_ids=note_ids)
+    Note.query.filter(Note.id.in_(note_ids)).delete(
+        synchronize_session=False)
+    db.session.commit()
+    assert _counts(user_id) == ({"work": 0, "home": 1}, {"a": 1, "b": 0})
+
+
+def test_users_kept_apart(app, user_id, other_user_id):
+    """
+    Folders and tags with the same names belong to each user separately.
+    """
+    _add_note(user_id, "work", ["a"])
+    _add_note(other_user_id, "work", ["a"])
+    _add_note(other_user_id, "work", ["a"])
+    assert _counts(user_id) == ({"work": 1}, {"a": 1})
+    assert _counts(other_user_id) == ({"work": 2}, {"a": 2})
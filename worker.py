@@ -0,0 +1,47 @@
+"""
+QuickNote Job Worker Entry Point
+
+Description:
+    This module runs a worker of the QuickNote background job queue (see
+    'quicknote.jobs'). Start one or more alongside the web server with
+    'python worker.py'; on Heroku this is the 'worker' process in the
+    Procfile. The worker uses the same settings and database as the
+    application.
+    SIGTERM and SIGINT stop the worker from claiming new jobs and let the
+    running ones finish; jobs cut short by a hard kill are retried by
+    another worker once their lock times out.
+    With '--once' the worker exits as soon as no job is due, which suits
+    running it from cron or by hand.
+
+Dependencies:
+    - argparse: Parses the command line.
+    - logging: Reports the worker's progress.
+    - signal: Stops the worker gracefully.
+    - quicknote.create_app: Builds the Flask application for QuickNote.
+    - quicknote.jobs: Runs the queued jobs.
+"""
+import argparse
+import logging
+import signal
+from quicknote import create_app
+from quicknote.jobs import Worker
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python worker.py")
+    parser.add_argument("--threads", type=int,
+                        help="jobs run at once (default JOB_WORKER_THREADS)")
+    parser.add_argument("--once", action="store_true",
+                        help="exit once no job is due")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s %(levelname)s %(message)s")
+    worker = Worker(create_app(), threads=args.threads)
+    for signal_number in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signal_number, lambda *_: worker.stop())
+    worker.run(until_empty=args.once)
+
+
+if __name__ == "__main__":
+    main()